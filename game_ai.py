@@ -1,18 +1,54 @@
 """
 game_ai.py
 
-This file implements the AI logic for a 3D Tic Tac Toe game. 
+This file implements the AI logic for a 3D Tic Tac Toe game.
 The AI uses the alpha-beta pruning algorithm to determine the best move.
+The search runs on bitboards (see game_bitboard.py) instead of the 3D list,
+can share a transposition table (see game_tt.py) between searches, and skips
+moves that are mirror images of an earlier move (see game_symmetry.py).
+Moves are searched in the order given by a pluggable orderer (see game_ordering.py).
 
 Functions:
     - alpha_beta: Implements the alpha-beta pruning algorithm.
+    - iterative_deepening: Searches 1, 2, 3... plies deep until a time budget runs out.
+    - node_counts: Compares the nodes visited by plain alpha-beta, PVS and aspiration windows.
+    - is_win_score: Checks if a search value is a forced win or loss.
+    - win_distance: Number of plies until the win or loss a search value stands for.
+
+Classes:
+    - Search: The alpha-beta recursion on bitboards and its state.
+    - TracedSearch: Search that also fills a SearchTrace (see game_trace.py).
+    - SearchTimeout: Raised inside a search when its deadline has passed.
 """
 
-import game_logic
+import time
+
+import game_bitboard
+import game_evaluator
+import game_ordering
+import game_symmetry
+import game_trace
+import game_tt
+
+# A win found at ply p from the root scores WIN_SCORE - p (negated for the AI), so a faster
+# win or a slower loss is preferred. Values beyond WIN_THRESHOLD are wins; heuristic
+# scores stay far below it.
+WIN_THRESHOLD = game_bitboard.WIN_SCORE - game_bitboard.CELLS
+DRAW_SCORE = 0  # Value of a full board without a win, whatever the stones on it
+TIME_CHECK_INTERVAL = 1024  # Nodes between two looks at the clock
+ASPIRATION_WINDOW = 100  # Half-width of the aspiration window around the previous value
 
-GOOD_ENOUGH_THRESHOLD = 500  # Adjust as per requirements
+# Search settings compared by node_counts: (principal variation search, aspiration window)
+ALGORITHMS = {
+    "alpha-beta": (False, None),
+    "pvs": (True, None),
+    "aspiration": (False, ASPIRATION_WINDOW),
+    "pvs+aspiration": (True, ASPIRATION_WINDOW),
+}
+# Used by computer_move: fewest nodes at depths 4 and 5 (python game_benchmark.py --algorithms)
+ENGINE_ALGORITHM = "pvs+aspiration"
 
-def alpha_beta(player, depth, alpha, beta, board):
+def alpha_beta(player, depth, alpha, beta, board, tt=None, trace=None):
     """
     Implement the alpha-beta pruning algorithm to find the best move.
 
@@ -22,69 +58,463 @@ def alpha_beta(player, depth, alpha, beta, board):
         alpha (float): Alpha value for the algorithm.
         beta (float): Beta value for the algorithm.
         board (list): The current state of the game board.
+        tt (TranspositionTable): Optional table to reuse results from earlier searches.
+        trace (SearchTrace): Optional trace to collect search statistics in.
 
     Returns:
         tuple: Best value calculated by the algorithm and the best move as (z, x, y).
     """
-    if depth == 0 or game_logic.check_win(1, board) or game_logic.check_win(-1, board):  # Terminal state or depth limit reached
-        return game_logic.evaluate(board, depth), None
-
-    best_move = None
-
-    # Logic for MAX player (i.e., our player)
-    if player == 1:
-        best_value = float('-inf')
-        
-        # Check all possible moves
-        for z in range(4):
-            for x in range(4):
-                for y in range(4):
-                    if board[z][x][y] == 0:  # if cell is empty
-                        board[z][x][y] = player  # make a move
-                        value, _ = alpha_beta(-1, depth - 1, alpha, beta, board)  # simulate opponent's turn
-                        board[z][x][y] = 0  # undo the move
-
-                        # Update best value and move if needed
-                        if value > best_value:
-                            best_value = value
-                            best_move = (z, x, y)
-
-                        # If a move is found that's "good enough", break out
-                        print("CHECK MAX " + str(best_value >= GOOD_ENOUGH_THRESHOLD))
-                        if best_value >= GOOD_ENOUGH_THRESHOLD:
-                            return best_value, best_move
-
-                        # Update alpha and prune if necessary
-                        alpha = max(alpha, best_value)
-                        if beta <= alpha:
-                            break  # pruning
-
-    # Logic for MIN player (i.e., the opponent)
+    search = Search(board, tt) if trace is None else TracedSearch(board, tt, trace=trace)
+    best_value, best_cell = search.run(player, depth, alpha, beta)
+    if best_cell is None:
+        return best_value, None
+    return best_value, game_bitboard.cell_to_move(best_cell)
+
+
+def iterative_deepening(player, board, time_budget_ms, max_depth=None, tt=None, stop_event=None, trace=None,
+                        evaluator_class=game_evaluator.Evaluator, pvs=False, aspiration_window=None):
+    """
+    Search 1, 2, 3... plies deep until the time budget runs out, and return the best move
+    of the deepest search that finished. Each iteration tries the previous best move first.
+    The depth 1 search always finishes, so there is always a move to play.
+
+    Args:
+        player (int): 1 for the MAX player, -1 for the MIN player.
+        board (list): The current state of the game board.
+        time_budget_ms (float): Wall-clock budget in milliseconds, or None for no limit.
+        max_depth (int): Deepest iteration to run, or None to go until the board is full.
+        tt (TranspositionTable): Optional table to reuse results from earlier searches.
+        stop_event (threading.Event): Optional event; setting it stops the search early,
+                                      e.g. to cancel a search running in a background thread.
+        trace (SearchTrace): Optional trace to collect search statistics and iteration timings in.
+        evaluator_class (type): The evaluator to score leaves with (see game_evaluator.EVALUATORS).
+        pvs (bool): Use principal variation search (see Search).
+        aspiration_window (int): If set, each iteration after the first searches a window of
+                                 this size around the value of the iteration two plies
+                                 shallower first (the heuristic swings between odd and even
+                                 depths), and the full window only if the value falls outside it.
+
+    Returns:
+        tuple: (best value, best move as (z, x, y), depth of the last finished iteration).
+               The move is None if the game is already over or the search was stopped
+               before depth 1 finished.
+    """
+    start = time.perf_counter()
+    if trace is None:
+        search = Search(board, tt, evaluator_class=evaluator_class, pvs=pvs)
     else:
-        best_value = float('inf')
-        
-        # Check all possible moves
-        for z in range(4):
-            for x in range(4):
-                for y in range(4):
-                    if board[z][x][y] == 0:  # if cell is empty
-                        board[z][x][y] = player  # make a move
-                        value, _ = alpha_beta(1, depth - 1, alpha, beta, board)  # simulate our turn
-                        board[z][x][y] = 0  # undo the move
-
-                        # Update best value and move if needed
-                        if value < best_value:
-                            best_value = value
-                            best_move = (z, x, y)
-
-                        # If a move is found that's "bad enough", break out
-                        print("CHECK MIN " + str(best_value <= -GOOD_ENOUGH_THRESHOLD))
-                        if best_value <= -GOOD_ENOUGH_THRESHOLD:
-                            return best_value, best_move
-
-                        # Update beta and prune if necessary
-                        beta = min(beta, best_value)
-                        if beta <= alpha:
-                            break  # pruning
-    
-    return best_value, best_move
\ No newline at end of file
+        search = TracedSearch(board, tt, evaluator_class=evaluator_class, pvs=pvs, trace=trace)
+    search.stop_event = stop_event
+    empty_cells = game_bitboard.CELLS - (search.xs | search.os).bit_count()
+    if max_depth is None or max_depth > empty_cells:
+        max_depth = empty_cells
+
+    best_value, best_cell, completed = game_bitboard.evaluate(search.xs, search.os), None, 0
+    values = {}  # Value of each finished iteration, by depth
+    for depth in range(1, max_depth + 1):
+        if depth > 1 and time_budget_ms is not None:
+            elapsed = time.perf_counter() - start
+            remaining = time_budget_ms / 1000 - elapsed
+            # The next iteration takes at least as long as all the previous ones together
+            if remaining <= elapsed:
+                break
+            search.deadline = start + time_budget_ms / 1000
+        iteration_start, iteration_nodes = time.perf_counter(), search.nodes
+        try:
+            center = values[depth - 2] if depth - 2 in values else best_value
+            if aspiration_window and best_cell is not None and not is_win_score(center):
+                alpha, beta = center - aspiration_window, center + aspiration_window
+                value, cell = search.run(player, depth, alpha, beta, best_cell)
+                if value <= alpha or value >= beta:
+                    value, cell = search.run(player, depth, float('-inf'), float('inf'), best_cell)
+            else:
+                value, cell = search.run(player, depth, float('-inf'), float('inf'), best_cell)
+        except SearchTimeout:
+            break
+        best_value, completed = value, depth
+        values[depth] = value
+        if trace is not None:
+            trace.record_iteration(depth, time.perf_counter() - iteration_start, search.nodes - iteration_nodes,
+                                   value, game_bitboard.cell_to_move(cell) if cell is not None else None)
+        if cell is None:
+            break  # The game is already over
+        best_cell = cell
+        if is_win_score(value):
+            break  # The fastest forced win or loss was found, searching deeper changes nothing
+
+    move = game_bitboard.cell_to_move(best_cell) if best_cell is not None else None
+    return best_value, move, completed
+
+
+def is_win_score(value):
+    """
+    Check if a search value is a forced win or loss rather than a heuristic score.
+
+    Args:
+        value (int): A value returned by the search.
+
+    Returns:
+        bool: True for a win or loss.
+    """
+    return abs(value) > WIN_THRESHOLD
+
+
+def win_distance(value):
+    """
+    Count the plies until the win or loss a search value stands for.
+
+    Args:
+        value (int): A value returned by the search, with is_win_score(value) True.
+
+    Returns:
+        int: Plies from the searched position to the winning move, that move included.
+    """
+    return game_bitboard.WIN_SCORE - abs(value)
+
+
+def _to_table(value, ply):
+    """Make a win score relative to the node at the given ply before storing it."""
+    if value > WIN_THRESHOLD:
+        return value + ply
+    if value < -WIN_THRESHOLD:
+        return value - ply
+    return value
+
+
+def _from_table(value, ply):
+    """Make a stored win score relative to the root again, for a node at the given ply."""
+    if value > WIN_THRESHOLD:
+        return value - ply
+    if value < -WIN_THRESHOLD:
+        return value + ply
+    return value
+
+
+def node_counts(board, depth, player=-1):
+    """
+    Run the same iterative deepening search with each setting in ALGORITHMS, each with
+    a fresh transposition table and no time limit, and count the nodes visited.
+
+    Args:
+        board (list): The position to search.
+        depth (int): Deepest iteration.
+        player (int): The side to move.
+
+    Returns:
+        dict: For each name in ALGORITHMS, a dict with nodes, value and move.
+              Different moves with the same value are equally good.
+    """
+    counts = {}
+    for name, (pvs, aspiration_window) in ALGORITHMS.items():
+        trace = game_trace.SearchTrace()
+        value, move, _ = iterative_deepening(player, board, None, depth, game_tt.TranspositionTable(), trace=trace,
+                                             pvs=pvs, aspiration_window=aspiration_window)
+        counts[name] = {"nodes": trace.totals()["nodes"], "value": value, "move": move}
+    return counts
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its deadline has passed."""
+
+
+class Search:
+    """
+    Alpha-beta search from one root position.
+
+    Attributes:
+        xs (int): Mask of the cells held by the player (1) at the root.
+        os (int): Mask of the cells held by the AI (-1) at the root.
+        evaluator (Evaluator): Line counters, kept in step with the position being searched.
+        evaluator_class (type): The class of evaluator, used to rebuild it after a timeout.
+        tt (TranspositionTable): The table shared with other searches, or None.
+        symmetry_group (tuple): Transforms used to prune mirrored moves.
+        orderer (MoveOrderer): Decides the order moves are searched in.
+        pvs (bool): Whether moves after the first are searched with a null window first.
+        deadline (float): time.perf_counter() value after which the search stops, or None.
+        stop_event (threading.Event): Event that stops the search when set, or None.
+        nodes (int): Number of positions visited since the search was created.
+    """
+
+    def __init__(self, board, tt=None, symmetry_group=game_symmetry.EVALUATION_SYMMETRIES, orderer=None,
+                 evaluator_class=game_evaluator.Evaluator, pvs=False):
+        """
+        Set up a search from a 3D list board.
+
+        Args:
+            board (list): The current state of the game board.
+            tt (TranspositionTable): Optional table to reuse results from earlier searches.
+            symmetry_group (tuple): Transforms used to prune mirrored moves. The default only
+                                    uses the symmetries the evaluation is invariant under, so
+                                    pruning never changes the result. Pass () to disable it.
+            orderer (MoveOrderer): Move ordering to use. Defaults to a new MoveOrderer;
+                                   pass game_ordering.NoOrdering() for plain z/x/y order.
+            evaluator_class (type): The evaluator to score leaves with. Its score must be
+                                    invariant under symmetry_group.
+            pvs (bool): Search every move after the first with a null window (principal
+                        variation search), and again with the full window only if it is better.
+        """
+        self.xs, self.os = game_bitboard.from_board(board)
+        self.evaluator_class = evaluator_class
+        self.evaluator = evaluator_class(self.xs, self.os)
+        self.pvs = pvs
+        self.tt = tt
+        self.symmetry_group = symmetry_group
+        self.orderer = orderer if orderer is not None else game_ordering.MoveOrderer()
+        self.root_depth = 0
+        self.deadline = None
+        self.stop_event = None
+        self.nodes = 0
+
+    def run(self, player, depth, alpha, beta, first=None):
+        """
+        Search the root position.
+
+        Args:
+            player (int): The side to move, 1 for MAX or -1 for MIN.
+            depth (int): Depth to search for the alpha-beta pruning.
+            alpha (float): Alpha value for the algorithm.
+            beta (float): Beta value for the algorithm.
+            first (int): Root move to try first, e.g. the best move of a shallower search.
+
+        Returns:
+            tuple: Best value calculated by the algorithm and the best move as a bit index.
+
+        Raises:
+            SearchTimeout: If the deadline passed or the stop event was set before the search finished.
+        """
+        key = game_tt.hash_position(self.xs, self.os, player)
+        symmetries = game_symmetry.stabilizer(self.xs, self.os, self.symmetry_group)
+        self.root_depth = depth
+        try:
+            return self.search(player, depth, alpha, beta, self.xs, self.os, key, None, symmetries, first)
+        except SearchTimeout:
+            # The moves made on the way down were never undone
+            self.evaluator = self.evaluator_class(self.xs, self.os)
+            raise
+
+    def should_stop(self):
+        """
+        Check if the search has to stop.
+
+        Returns:
+            bool: True if the deadline has passed or the stop event is set.
+        """
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            return True
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def search(self, player, depth, alpha, beta, xs, os, key, last=None, symmetries=(), first=None):
+        """
+        Alpha-beta recursion on bitboards. Moves come from the orderer, with the first move
+        or transposition table move as its hint, skipping cells that a symmetry of the position
+        maps onto a cell already tried. Only the lines through the last move are
+        checked for a win, since a position that reaches this point was not won before
+        that move. Leaf scores are read off the evaluator, which is kept in step with
+        the masks on make and unmake. Wins score WIN_SCORE minus their distance from the
+        root, and are stored in the transposition table relative to the node instead.
+        A full board without a win is a draw and scores DRAW_SCORE, whatever depth is left,
+        so no depth can leave a node without moves at +/-inf.
+
+        Args:
+            player (int): 1 for the MAX player, -1 for the MIN player.
+            depth (int): Depth to search for the alpha-beta pruning.
+            alpha (float): Alpha value for the algorithm.
+            beta (float): Beta value for the algorithm.
+            xs (int): Mask of the cells held by the player (1).
+            os (int): Mask of the cells held by the AI (-1).
+            key (int): Zobrist key of the position and side to move.
+            last (int): Bit index of the move that led here, or None to check the whole board.
+            symmetries (tuple): Transforms known to leave the position unchanged. A child keeps
+                                those that fix the cell played, so the set empties after a
+                                few plies and pruning only costs anything near the root.
+            first (int): Move to try first instead of the transposition table move.
+
+        Returns:
+            tuple: Best value calculated by the algorithm and the best move as a bit index.
+        """
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and self.should_stop():
+            raise SearchTimeout()
+
+        # Terminal state, scored by how many plies from the root the win came
+        ply = self.root_depth - depth
+        if last is None:
+            if game_bitboard.check_win(xs) or game_bitboard.check_win(os):
+                return game_bitboard.evaluate(xs, os), None
+        elif player == 1:
+            if game_bitboard.is_winning_move(os, last):
+                return ply - game_bitboard.WIN_SCORE, None
+        elif game_bitboard.is_winning_move(xs, last):
+            return game_bitboard.WIN_SCORE - ply, None
+
+        # A full board without a win is a draw
+        if xs | os == game_bitboard.FULL:
+            return DRAW_SCORE, None
+
+        # Depth limit reached
+        if depth == 0:
+            return self.evaluator.total, None
+
+        # Mate-distance pruning: no win from here comes sooner than the next move, so if
+        # either side already has a win at least that fast, this node cannot change anything
+        fastest_win = game_bitboard.WIN_SCORE - ply - 1
+        if alpha < -fastest_win:
+            alpha = -fastest_win
+        if beta > fastest_win:
+            beta = fastest_win
+        if alpha >= beta:
+            return alpha, None
+
+        # Reuse an earlier search of this position if it went deep enough
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            entry = tt.probe(key)
+            if entry is not None:
+                _, tt_value, tt_depth, bound, tt_move = entry
+                tt_value = _from_table(tt_value, ply)
+                if tt_depth >= depth:
+                    if bound == game_tt.EXACT:
+                        return tt_value, tt_move
+                    if bound == game_tt.LOWER:
+                        alpha = max(alpha, tt_value)
+                    else:
+                        beta = min(beta, tt_value)
+                    if beta <= alpha:
+                        return tt_value, tt_move
+
+        alpha_start, beta_start = alpha, beta
+        evaluator = self.evaluator
+        keys = game_tt.KEYS[player]
+        child_key = key ^ game_tt.SIDE_KEY
+        best_move = None
+        pvs = self.pvs
+        hint = first if first is not None else tt_move
+        moves = self.orderer.order(player, xs, os, ply, hint)
+        if len(symmetries) > 1:
+            moves = game_symmetry.unique_moves(moves, symmetries)
+
+        # Logic for MAX player (i.e., our player)
+        if player == 1:
+            best_value = float('-inf')
+
+            # Check all possible moves
+            for cell in moves:
+                evaluator.make(cell, player)  # make a move
+                child_symmetries = _fixing(symmetries, cell)
+                if pvs and best_move is not None and beta - alpha > 1:
+                    # Principal variation search: first check with a null window that the move is no better
+                    value, _ = self.search(-1, depth - 1, alpha, alpha + 1, xs | 1 << cell, os, child_key ^ keys[cell], cell, child_symmetries)
+                    if alpha < value < beta:
+                        value, _ = self.search(-1, depth - 1, alpha, beta, xs | 1 << cell, os, child_key ^ keys[cell], cell, child_symmetries)
+                else:
+                    value, _ = self.search(-1, depth - 1, alpha, beta, xs | 1 << cell, os, child_key ^ keys[cell], cell, child_symmetries)  # simulate opponent's turn
+                evaluator.unmake(cell, player)  # undo the move
+
+                # Update best value and move if needed
+                if value > best_value:
+                    best_value = value
+                    best_move = cell
+
+                # Update alpha and prune if necessary
+                alpha = max(alpha, best_value)
+                if beta <= alpha:
+                    self.orderer.cutoff(player, cell, ply, depth)
+                    break  # pruning
+
+        # Logic for MIN player (i.e., the opponent)
+        else:
+            best_value = float('inf')
+
+            # Check all possible moves
+            for cell in moves:
+                evaluator.make(cell, player)  # make a move
+                child_symmetries = _fixing(symmetries, cell)
+                if pvs and best_move is not None and beta - alpha > 1:
+                    # Principal variation search: first check with a null window that the move is no better
+                    value, _ = self.search(1, depth - 1, beta - 1, beta, xs, os | 1 << cell, child_key ^ keys[cell], cell, child_symmetries)
+                    if alpha < value < beta:
+                        value, _ = self.search(1, depth - 1, alpha, beta, xs, os | 1 << cell, child_key ^ keys[cell], cell, child_symmetries)
+                else:
+                    value, _ = self.search(1, depth - 1, alpha, beta, xs, os | 1 << cell, child_key ^ keys[cell], cell, child_symmetries)  # simulate our turn
+                evaluator.unmake(cell, player)  # undo the move
+
+                # Update best value and move if needed
+                if value < best_value:
+                    best_value = value
+                    best_move = cell
+
+                # Update beta and prune if necessary
+                beta = min(beta, best_value)
+                if beta <= alpha:
+                    self.orderer.cutoff(player, cell, ply, depth)
+                    break  # pruning
+
+        if tt is not None and best_move is not None:
+            if best_value <= alpha_start:
+                bound = game_tt.UPPER
+            elif best_value >= beta_start:
+                bound = game_tt.LOWER
+            else:
+                bound = game_tt.EXACT
+            tt.store(key, _to_table(best_value, ply), depth, bound, best_move)
+
+        return best_value, best_move
+
+
+class TracedSearch(Search):
+    """
+    Search that also counts nodes, cutoffs, leaf evaluations and transposition table hits
+    in a SearchTrace. Only used when tracing is requested, so Search itself carries no
+    instrumentation.
+
+    Attributes:
+        trace (SearchTrace): Where the counters go.
+    """
+
+    def __init__(self, board, tt=None, symmetry_group=game_symmetry.EVALUATION_SYMMETRIES, orderer=None,
+                 evaluator_class=game_evaluator.Evaluator, pvs=False, trace=None):
+        """
+        Set up a traced search. Same arguments as Search, plus:
+
+        Args:
+            trace (SearchTrace): Where the counters go. A new one is created if None.
+        """
+        super().__init__(board, tt, symmetry_group, orderer, evaluator_class, pvs)
+        self.trace = trace if trace is not None else game_trace.SearchTrace()
+        self.orderer = game_trace.CutoffCounter(self.orderer, self.trace)
+
+    def run(self, player, depth, alpha, beta, first=None):
+        """Search the root position like Search.run, counting transposition table probes."""
+        hits, misses = (self.tt.hits, self.tt.misses) if self.tt is not None else (0, 0)
+        try:
+            return super().run(player, depth, alpha, beta, first)
+        finally:
+            if self.tt is not None:
+                self.trace.tt_hits += self.tt.hits - hits
+                self.trace.tt_misses += self.tt.misses - misses
+
+    def search(self, player, depth, alpha, beta, xs, os, key, last=None, symmetries=(), first=None):
+        """Count the node, then search it like Search.search."""
+        trace = self.trace
+        ply = self.root_depth - depth
+        trace.grow(ply)
+        trace.nodes[ply] += 1
+        if depth == 0:
+            trace.leaf_evals[ply] += 1
+        if not trace.timings:
+            return super().search(player, depth, alpha, beta, xs, os, key, last, symmetries, first)
+        start = time.perf_counter()
+        try:
+            return super().search(player, depth, alpha, beta, xs, os, key, last, symmetries, first)
+        finally:
+            trace.ply_seconds[ply] += time.perf_counter() - start
+
+
+def _fixing(symmetries, cell):
+    """Keep the symmetries that map a cell onto itself, or () once only the identity is left."""
+    if len(symmetries) <= 1:
+        return ()
+    fixing = tuple(perm for perm in symmetries if perm[cell] == cell)
+    return fixing if len(fixing) > 1 else ()
+
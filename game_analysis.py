@@ -0,0 +1,276 @@
+"""
+game_analysis.py
+
+This file replays recorded games (see game_record.py) and checks every move with the
+alpha-beta search. Before each move the position is searched for its best value, the
+move actually played is searched for its own value, and a move that gives away at least
+BLUNDER_MARGIN (from the mover's point of view) is flagged as a blunder. Throwing away a
+forced win or walking into a forced loss always is one, since win scores dwarf the margin.
+
+Archives are streamed: games are read one at a time and handed to a pool of worker
+processes in batches, so memory stays flat however large the record files are. The
+statistics kept while reading are bounded as well:
+    - per ply (at most 64): moves analysed, blunders and total value given away,
+    - per opening position, up to opening_plies moves in, in canonical form: games through
+      it, their results and the average search value. The number of such positions is
+      bounded by the positions that exist at those plies, not by the number of games.
+
+Example:
+    python game_analysis.py games.rec --depth 2 --blunders blunders.jsonl
+
+Classes:
+    - AnalysisStats: Statistics collected over the analysed games.
+
+Functions:
+    - analyze_game: Checks every move of one game.
+    - analyze_archive: Analyses record files with a pool of worker processes.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+
+import game_ai
+import game_bitboard
+import game_record
+import game_symmetry
+import game_tt
+
+DEFAULT_DEPTH = 2
+BLUNDER_MARGIN = 1000  # Value a move may give away before it is a blunder
+OPENING_PLIES = 4      # Opening positions are tracked up to this many moves in
+BATCH_SIZE = 1024      # Games read ahead and handed to the workers at a time
+
+# Column of each finished result in an AnalysisStats.openings entry
+_RESULT_COLUMNS = {game_record.X_WON: 1, game_record.O_WON: 2, game_record.DRAW: 3}
+
+# Transposition table of the current worker process, cleared between games
+_worker_tt = None
+
+def _shift_win(value):
+    """Express a win score of a child search as seen from its parent, one ply further away."""
+    if not game_ai.is_win_score(value):
+        return value
+    return value - 1 if value > 0 else value + 1
+
+
+def analyze_game(moves, depth=DEFAULT_DEPTH, margin=BLUNDER_MARGIN, tt=None):
+    """
+    Search every position of a game and compare the move played with the best one.
+
+    Args:
+        moves (bytes): The cells played, X first.
+        depth (int): Depth of the search for the best move.
+        margin (int): Value a move may give away before it is flagged.
+        tt (TranspositionTable): Optional table shared by the searches.
+
+    Returns:
+        dict: best_values (search value before each move, from X's point of view),
+              losses (value each move gave away, from the mover's point of view) and
+              blunders (one dict per flagged move: ply, cell, best cell, loss, value of
+              the move played and best value).
+    """
+    xs = os = 0
+    player = 1
+    best_values, losses, blunders = [], [], []
+    for ply, cell in enumerate(moves):
+        # Never search deeper than the cells left to play
+        empty_cells = game_bitboard.CELLS - ply
+        best_value, best_cell = game_ai.Search(game_bitboard.to_board(xs, os), tt).run(
+            player, min(depth, empty_cells), float('-inf'), float('inf'))
+
+        # Value of the move played, in the same frame as best_value
+        xs_after, os_after = (xs | 1 << cell, os) if player == 1 else (xs, os | 1 << cell)
+        if cell == best_cell:
+            played_value = best_value
+        elif game_bitboard.is_winning_move(xs_after if player == 1 else os_after, cell):
+            played_value = player * (game_bitboard.WIN_SCORE - 1)
+        else:
+            value, _ = game_ai.Search(game_bitboard.to_board(xs_after, os_after), tt).run(
+                -player, min(depth, empty_cells) - 1, float('-inf'), float('inf'))
+            played_value = _shift_win(value)
+
+        loss = max(0, (best_value - played_value) * player)
+        best_values.append(best_value)
+        losses.append(loss)
+        if loss >= margin:
+            blunders.append({"ply": ply, "cell": cell, "best": best_cell, "loss": loss,
+                             "value": played_value, "best_value": best_value})
+        xs, os = xs_after, os_after
+        player = -player
+    return {"best_values": best_values, "losses": losses, "blunders": blunders}
+
+
+def _analyze_task(task):
+    """Analyse one game. Runs in a worker process."""
+    global _worker_tt
+    moves, depth, margin = task
+    if _worker_tt is None:
+        _worker_tt = game_tt.TranspositionTable()
+    _worker_tt.clear()
+    return analyze_game(moves, depth, margin, _worker_tt)
+
+
+class AnalysisStats:
+    """
+    Statistics collected over the analysed games.
+
+    Attributes:
+        opening_plies (int): Opening positions are tracked up to this many moves in.
+        games (int): Games analysed.
+        results (dict): Games per result (see game_record.RESULTS).
+        ply_moves (list): Moves analysed at each ply.
+        ply_blunders (list): Blunders at each ply.
+        ply_loss (list): Total value given away at each ply.
+        openings (dict): Canonical (X mask, O mask) -> [games, X wins, O wins, draws,
+                         sum of the search values], for positions up to opening_plies moves
+                         in that a move was played from.
+    """
+
+    def __init__(self, opening_plies=OPENING_PLIES):
+        """
+        Start with no games.
+
+        Args:
+            opening_plies (int): Track opening positions up to this many moves in.
+        """
+        self.opening_plies = opening_plies
+        self.games = 0
+        self.results = dict.fromkeys(game_record.RESULTS, 0)
+        self.ply_moves = [0] * game_bitboard.CELLS
+        self.ply_blunders = [0] * game_bitboard.CELLS
+        self.ply_loss = [0] * game_bitboard.CELLS
+        self.openings = {}
+
+    def add(self, result, moves, analysis):
+        """
+        Add one analysed game.
+
+        Args:
+            result (int): The game's result.
+            moves (bytes): The cells played, X first.
+            analysis (dict): What analyze_game returned for the game.
+        """
+        self.games += 1
+        self.results[result] += 1
+        for ply, loss in enumerate(analysis["losses"]):
+            self.ply_moves[ply] += 1
+            self.ply_loss[ply] += loss
+        for blunder in analysis["blunders"]:
+            self.ply_blunders[blunder["ply"]] += 1
+
+        # Opening positions, each counted once per game it was searched in
+        xs = os = 0
+        for ply in range(min(self.opening_plies + 1, len(moves))):
+            cxs, cos, _ = game_symmetry.canonicalize(xs, os, game_symmetry.EVALUATION_SYMMETRIES)
+            entry = self.openings.setdefault((cxs, cos), [0, 0, 0, 0, 0])
+            entry[0] += 1
+            if result in _RESULT_COLUMNS:
+                entry[_RESULT_COLUMNS[result]] += 1
+            entry[4] += analysis["best_values"][ply]
+            if ply % 2 == 0:
+                xs |= 1 << moves[ply]
+            else:
+                os |= 1 << moves[ply]
+
+    @property
+    def moves(self):
+        """int: Moves analysed."""
+        return sum(self.ply_moves)
+
+    @property
+    def blunders(self):
+        """int: Moves flagged as blunders."""
+        return sum(self.ply_blunders)
+
+    def top_openings(self, count=10):
+        """
+        List the most played opening positions.
+
+        Args:
+            count (int): Number of positions.
+
+        Returns:
+            list: (X mask, O mask, games, X wins, O wins, draws, average search value),
+                  most played first.
+        """
+        ranked = sorted(self.openings.items(), key=lambda item: (-item[1][0], item[0]))[:count]
+        return [(xs, os, games, x_wins, o_wins, draws, total / games)
+                for (xs, os), (games, x_wins, o_wins, draws, total) in ranked]
+
+
+def analyze_archive(paths, depth=DEFAULT_DEPTH, margin=BLUNDER_MARGIN, workers=None, batch_size=BATCH_SIZE,
+                    blunder_file=None, progress=None, stats=None):
+    """
+    Analyse every game of some record files over a pool of worker processes.
+
+    Args:
+        paths (list): The record files, read in order.
+        depth (int): Depth of the search for the best move.
+        margin (int): Value a move may give away before it is flagged.
+        workers (int): Number of worker processes. Defaults to the number of CPU cores.
+        batch_size (int): Games read ahead at a time; bounds the memory used.
+        blunder_file (file): Optional open text file to write one JSON line per blunder to.
+        progress (callable): Optional function called with the number of games analysed so far.
+        stats (AnalysisStats): Statistics to add to. Defaults to a new AnalysisStats.
+
+    Returns:
+        AnalysisStats: The statistics of the analysed games.
+    """
+    stats = stats if stats is not None else AnalysisStats()
+    games = itertools.chain.from_iterable(game_record.read_games(path) for path in paths)
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            # Pool.imap would read the whole archive ahead, so batches are handed out one at a time
+            batch = list(itertools.islice(games, batch_size))
+            if not batch:
+                break
+            analyses = pool.map(_analyze_task, [(moves, depth, margin) for _, _, moves in batch])
+            for (difficulty, result, moves), analysis in zip(batch, analyses):
+                if blunder_file is not None:
+                    for blunder in analysis["blunders"]:
+                        blunder_file.write(json.dumps(dict(game=stats.games, difficulty=difficulty, **blunder)) + "\n")
+                stats.add(result, moves, analysis)
+            if progress is not None:
+                progress(stats.games)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check every move of recorded games with the search.")
+    parser.add_argument("paths", nargs="+", help="game record files")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="search depth (default: %d)" % DEFAULT_DEPTH)
+    parser.add_argument("--margin", type=int, default=BLUNDER_MARGIN,
+                        help="value a move may give away before it is a blunder (default: %d)" % BLUNDER_MARGIN)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="games read ahead at a time (default: %d)" % BATCH_SIZE)
+    parser.add_argument("--openings", type=int, default=10, help="most played opening positions to list (default: 10)")
+    parser.add_argument("--blunders", default=None, help="JSONL file to write one line per blunder to")
+    args = parser.parse_args()
+
+    def report(games):
+        print("\r%d games analysed" % games, end="", flush=True)
+
+    if args.blunders is not None:
+        with open(args.blunders, "w") as out_file:
+            result = analyze_archive(args.paths, args.depth, args.margin, args.workers, args.batch_size, out_file, report)
+    else:
+        result = analyze_archive(args.paths, args.depth, args.margin, args.workers, args.batch_size, None, report)
+
+    print()
+    print("%d games, %d moves, %d blunders (%.2f%%)" % (
+        result.games, result.moves, result.blunders, 100 * result.blunders / max(1, result.moves)))
+    print("Results: %d X wins, %d O wins, %d draws, %d unfinished" % (
+        result.results[game_record.X_WON], result.results[game_record.O_WON],
+        result.results[game_record.DRAW], result.results[game_record.UNFINISHED]))
+    print("%4s %8s %9s %10s" % ("ply", "moves", "blunders", "avg loss"))
+    for ply in range(game_bitboard.CELLS):
+        if result.ply_moves[ply]:
+            print("%4d %8d %9d %10.1f" % (ply, result.ply_moves[ply], result.ply_blunders[ply],
+                                          result.ply_loss[ply] / result.ply_moves[ply]))
+    print("Most played opening positions (canonical masks):")
+    for xs, os, games, x_wins, o_wins, draws, value in result.top_openings(args.openings):
+        print("  X %016x O %016x: %d games, %d/%d/%d X/O/draw, average value %+.0f" % (
+            xs, os, games, x_wins, o_wins, draws, value))
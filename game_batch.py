@@ -0,0 +1,192 @@
+"""
+game_batch.py
+
+This file scores many boards at once with NumPy, for self-play analysis and training
+data where game_logic.evaluate, one board at a time, is far too slow.
+
+Boards come as an (N, 4, 4, 4) int8 array with the same layout as the 3D list board:
+boards[n, z, x, y] is 1 for the player, -1 for the AI and 0 for an empty cell. Every
+line is gathered at once through LINE_INDEX, a 76x4 table of flat cell indices, and
+the heuristic of game_logic.evaluate is rebuilt from the line sums, quirks included
+(see game_bitboard.heuristic). The scores match game_logic.evaluate exactly.
+
+Unlike the engine modules, this one needs NumPy.
+
+Functions:
+    - to_array: Stacks 3D list boards into an (N, 4, 4, 4) int8 array.
+    - line_sums: Player stones minus AI stones on every line of every board.
+    - line_counts: Player and AI stones on every line of every board.
+    - win_flags: Which boards the player or the AI has won.
+    - evaluate_batch: The game_logic.evaluate score of every board.
+    - check_parity: Compares evaluate_batch with game_logic.evaluate on random boards.
+"""
+
+import numpy as np
+
+import game_bitboard
+
+CHUNK_SIZE = 1 << 16  # Boards processed at a time; bounds the (chunk, 76, 4) gather
+
+def _cells(mask):
+    """List the cell indices of a mask in increasing order."""
+    return [cell for cell in range(game_bitboard.CELLS) if mask >> cell & 1]
+
+
+# Flat cell indices of the 4 cells of every line, in game_bitboard.LINES order
+LINE_INDEX = np.array([_cells(line) for line in game_bitboard.LINES], dtype=np.intp)
+
+_LINE_NUMBER = {line: number for number, line in enumerate(game_bitboard.LINES)}
+ROW_COLUMN_INDEX = np.array([[_LINE_NUMBER[row], _LINE_NUMBER[column]]
+                             for row, column in game_bitboard.ROW_COLUMN_PAIRS], dtype=np.intp)
+LAYER_DIAGONAL_INDEX = np.array([[_LINE_NUMBER[diagonal], _LINE_NUMBER[anti_diagonal]]
+                                 for diagonal, anti_diagonal in game_bitboard.LAYER_DIAGONAL_PAIRS], dtype=np.intp)
+PILLAR_INDEX = np.array([_LINE_NUMBER[pillar] for pillar in game_bitboard.PILLARS], dtype=np.intp)
+CENTER_INDEX = np.array(_cells(game_bitboard.CENTER), dtype=np.intp)
+
+# LINE_SCORES as a lookup table indexed by line sum + 4
+SCORE_TABLE = np.array([game_bitboard.LINE_SCORES.get(line_sum, 0) for line_sum in range(-4, 5)], dtype=np.int32)
+
+def to_array(boards):
+    """
+    Stack 3D list boards into one array.
+
+    Args:
+        boards (list): 4x4x4 lists where board[z][x][y] is 1, -1 or 0.
+
+    Returns:
+        numpy.ndarray: An (N, 4, 4, 4) int8 array.
+    """
+    return np.array(boards, dtype=np.int8).reshape(-1, 4, 4, 4)
+
+
+def _flat(boards):
+    """View an (N, 4, 4, 4) array as (N, 64)."""
+    boards = np.asarray(boards)
+    if boards.shape[1:] != (4, 4, 4):
+        raise ValueError("expected an (N, 4, 4, 4) array of boards, got shape %s" % (boards.shape,))
+    return boards.reshape(len(boards), game_bitboard.CELLS)
+
+
+def line_sums(boards):
+    """
+    Add up every line of every board.
+
+    Args:
+        boards (numpy.ndarray): An (N, 4, 4, 4) int8 array of boards.
+
+    Returns:
+        numpy.ndarray: An (N, 76) int8 array, player stones minus AI stones per line.
+    """
+    return _flat(boards)[:, LINE_INDEX].sum(axis=2, dtype=np.int8)
+
+
+def line_counts(boards):
+    """
+    Count the stones of each side on every line of every board.
+
+    Args:
+        boards (numpy.ndarray): An (N, 4, 4, 4) int8 array of boards.
+
+    Returns:
+        tuple: Two (N, 76) int8 arrays: player (1) stones and AI (-1) stones per line.
+    """
+    lines = _flat(boards)[:, LINE_INDEX]
+    return (lines == 1).sum(axis=2, dtype=np.int8), (lines == -1).sum(axis=2, dtype=np.int8)
+
+
+def win_flags(boards, sums=None):
+    """
+    Find the boards with a completed line.
+
+    Args:
+        boards (numpy.ndarray): An (N, 4, 4, 4) int8 array of boards.
+        sums (numpy.ndarray): The line_sums of the boards, if already computed.
+
+    Returns:
+        tuple: Two (N,) bool arrays: the player (1) has won, the AI (-1) has won.
+    """
+    if sums is None:
+        sums = line_sums(boards)
+    return (sums == 4).any(axis=1), (sums == -4).any(axis=1)
+
+
+def _evaluate_chunk(flat):
+    """evaluate_batch for an (n, 64) array."""
+    sums = flat[:, LINE_INDEX].sum(axis=2, dtype=np.int8)
+    scores = SCORE_TABLE[sums + 4]  # (n, 76) score of every line on its own
+
+    # Row/column pairs and layer-diagonal pairs: the second line only counts if its sum differs
+    first, second = ROW_COLUMN_INDEX[:, 0], ROW_COLUMN_INDEX[:, 1]
+    score = (scores[:, first] + np.where(sums[:, second] != sums[:, first], scores[:, second], 0)).sum(axis=1)
+    first, second = LAYER_DIAGONAL_INDEX[:, 0], LAYER_DIAGONAL_INDEX[:, 1]
+    score += game_bitboard.LAYER_DIAGONAL_WEIGHT * (
+        scores[:, first] + np.where(sums[:, second] != sums[:, first], scores[:, second], 0)).sum(axis=1)
+    score += scores[:, PILLAR_INDEX].sum(axis=1)
+
+    # Center control: the AI gains and the player loses CENTER_VALUE per center cell
+    score -= game_bitboard.CENTER_VALUE * flat[:, CENTER_INDEX].sum(axis=1, dtype=np.int32)
+
+    score = np.where((sums == -4).any(axis=1), -game_bitboard.WIN_SCORE, score)
+    return np.where((sums == 4).any(axis=1), game_bitboard.WIN_SCORE, score).astype(np.int32)
+
+
+def evaluate_batch(boards, chunk_size=CHUNK_SIZE):
+    """
+    Score every board like game_logic.evaluate.
+
+    Args:
+        boards (numpy.ndarray): An (N, 4, 4, 4) int8 array of boards.
+        chunk_size (int): Boards scored at a time, to bound the temporary arrays.
+
+    Returns:
+        numpy.ndarray: An (N,) int32 array: WIN_SCORE where the player has won,
+                       -WIN_SCORE where the AI has won, otherwise the heuristic score.
+    """
+    flat = _flat(boards)
+    if len(flat) <= chunk_size:
+        return _evaluate_chunk(flat)
+    return np.concatenate([_evaluate_chunk(flat[start:start + chunk_size])
+                           for start in range(0, len(flat), chunk_size)])
+
+
+def check_parity(count=100000, seed=0, reference_evaluate=None):
+    """
+    Check evaluate_batch against game_logic.evaluate (or an independent reference, see
+    tests/reference_logic.py) on random boards with 0 to 64 stones, and win_flags against
+    game_bitboard.check_win. Run with python game_batch.py.
+
+    Args:
+        count (int): Number of random boards.
+        seed (int): Random seed.
+        reference_evaluate (callable): evaluate(board, depth) to compare the scores with.
+                                       Defaults to game_logic.evaluate.
+
+    Returns:
+        int: Number of boards checked.
+
+    Raises:
+        AssertionError: On the first board where the results differ.
+    """
+    if reference_evaluate is None:
+        import game_logic  # Only needed for the check
+        reference_evaluate = game_logic.evaluate
+
+    rng = np.random.default_rng(seed)
+    stones = rng.integers(0, game_bitboard.CELLS + 1, size=count)
+    boards = rng.choice(np.array([1, -1], dtype=np.int8), size=(count, game_bitboard.CELLS))
+    boards[np.arange(game_bitboard.CELLS) >= stones[:, None]] = 0
+    boards = rng.permuted(boards, axis=1).reshape(count, 4, 4, 4)
+
+    scores = evaluate_batch(boards)
+    x_wins, o_wins = win_flags(boards)
+    for n in range(count):
+        board = boards[n].tolist()
+        assert scores[n] == reference_evaluate(board, 0), "score differs on board %d" % n
+        xs, os = game_bitboard.from_board(board)
+        assert x_wins[n] == game_bitboard.check_win(xs) and o_wins[n] == game_bitboard.check_win(os), \
+            "win flags differ on board %d" % n
+    return count
+
+
+if __name__ == "__main__":
+    print("%d boards OK" % check_parity(20000))
@@ -0,0 +1,319 @@
+"""
+game_benchmark.py
+
+This file measures the speed of the evaluation and search hot paths on a fixed corpus
+of positions, so changes to the engine can be compared run to run.
+
+Measured:
+    - check_win and evaluate (the 3D list versions in game_logic and the bitboard
+      versions in game_bitboard): calls per second over the corpus.
+    - the alpha-beta search at each difficulty depth, one search per corpus position
+      with a fresh transposition table: nodes per second, leaf evaluations per second,
+      time-to-move percentiles and the peak memory allocated during a search.
+
+Results can be saved as JSON and compared against a saved baseline; the comparison
+exits with status 1 if any metric got worse by more than the tolerance.
+
+Example:
+    python game_benchmark.py --save baseline.json
+    python game_benchmark.py --baseline baseline.json
+    python game_benchmark.py --algorithms --depths 4 5
+
+Functions:
+    - corpus_boards: Builds the 3D list boards of the corpus.
+    - bench_calls: Measures the calls per second of a position function.
+    - bench_search: Measures the search at one depth over the corpus.
+    - run_benchmarks: Runs every benchmark.
+    - compare: Lists the metrics that regressed against a baseline.
+    - compare_algorithms: Counts the nodes of each search algorithm over the corpus.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import game_ai
+import game_bitboard
+import game_logic
+import game_trace
+import game_tt
+
+# Fixed positions as (player cells, AI cells), the AI to move. None contains a win or
+# an immediate win for the AI, so every search has work to do.
+CORPUS = {
+    "opening": (
+        ((11,), ()),
+        ((28, 56), (29,)),
+        ((16, 37, 54), (4, 18)),
+    ),
+    "midgame": (
+        ((2, 11, 13, 17, 39, 42, 58, 59), (0, 9, 20, 35, 45, 51, 53)),
+        ((2, 6, 24, 40, 42, 43, 44, 48, 52, 54), (1, 15, 31, 34, 35, 45, 46, 49, 56)),
+        ((4, 5, 11, 14, 16, 33, 39, 44, 47, 49, 55, 59), (6, 7, 20, 21, 24, 27, 28, 34, 37, 38, 56)),
+    ),
+    "endgame": (
+        ((0, 5, 6, 11, 12, 23, 24, 29, 30, 34, 36, 37, 41, 49, 52, 53, 55, 56, 57, 62, 63),
+         (1, 2, 3, 4, 9, 13, 14, 16, 17, 27, 31, 32, 35, 38, 39, 44, 48, 54, 58, 60)),
+        ((1, 3, 5, 7, 10, 11, 16, 18, 19, 22, 23, 24, 27, 29, 37, 38, 39, 42, 46, 49, 50, 59, 60, 63),
+         (2, 6, 8, 14, 15, 21, 26, 28, 31, 32, 35, 41, 43, 44, 47, 48, 51, 52, 55, 56, 58, 61, 62)),
+        ((2, 4, 6, 8, 11, 13, 15, 18, 21, 23, 25, 27, 28, 31, 32, 38, 42, 44, 45, 46, 48, 49, 51, 53, 57, 58, 60),
+         (0, 1, 3, 5, 10, 12, 14, 17, 19, 20, 22, 26, 29, 33, 34, 36, 37, 39, 40, 47, 50, 54, 55, 59, 61, 63)),
+    ),
+}
+
+DIFFICULTY_DEPTHS = (2, 4, 6)  # Easy, Difficult, Insane
+DEFAULT_TOLERANCE = 0.15  # Relative change allowed before a metric counts as a regression
+
+# Metric name endings and whether a larger value is better
+_DIRECTIONS = (
+    ("_per_second", True),
+    ("_ms", False),
+    ("_kb", False),
+    ("nodes", False),
+)
+
+def corpus_boards():
+    """
+    Build the corpus positions.
+
+    Returns:
+        list: (phase, 3D list board) pairs in corpus order.
+    """
+    return [
+        (phase, game_bitboard.to_board(sum(1 << cell for cell in xs), sum(1 << cell for cell in os)))
+        for phase, positions in CORPUS.items()
+        for xs, os in positions
+    ]
+
+
+def bench_calls(function, arguments, min_seconds=0.2):
+    """
+    Measure how many calls per second a function manages over a set of arguments.
+
+    Args:
+        function (callable): The function to time.
+        arguments (list): Argument tuples; each round calls the function once per tuple.
+        min_seconds (float): Keep doubling the rounds until a run takes at least this long.
+
+    Returns:
+        float: Calls per second.
+    """
+    rounds = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for args in arguments:
+                function(*args)
+        seconds = time.perf_counter() - start
+        if seconds >= min_seconds:
+            return rounds * len(arguments) / seconds
+        rounds *= 2
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def bench_search(boards, depth, memory=True):
+    """
+    Search every board to a fixed depth for the AI (-1), each with a fresh transposition table.
+    The timed searches run untraced; the leaf counts and memory peaks come from a second,
+    traced pass over the same positions, which visits the same nodes.
+
+    Args:
+        boards (list): 3D list boards to search.
+        depth (int): Depth of each search.
+        memory (bool): Also run the traced pass under tracemalloc to record the memory peak.
+
+    Returns:
+        dict: nodes, seconds, nodes_per_second, leaf_evals_per_second, the time-to-move
+              p50_ms, p90_ms and max_ms, and peak_memory_kb (None if memory is False).
+    """
+    times, nodes = [], 0
+    for board in boards:
+        search = game_ai.Search(board, game_tt.TranspositionTable())
+        start = time.perf_counter()
+        search.run(-1, depth, float('-inf'), float('inf'))
+        times.append(time.perf_counter() - start)
+        nodes += search.nodes
+    seconds = sum(times)
+
+    leaf_evals, peak = 0, 0
+    if memory:
+        for board in boards:
+            tt, trace = game_tt.TranspositionTable(), game_trace.SearchTrace()
+            tracemalloc.start()
+            try:
+                game_ai.alpha_beta(-1, depth, float('-inf'), float('inf'), board, tt, trace)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            leaf_evals += sum(trace.leaf_evals)
+
+    return {
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_second": nodes / seconds,
+        "leaf_evals_per_second": leaf_evals / seconds if memory else None,
+        "p50_ms": _percentile(times, 0.5) * 1000,
+        "p90_ms": _percentile(times, 0.9) * 1000,
+        "max_ms": max(times) * 1000,
+        "peak_memory_kb": peak / 1024 if memory else None,
+    }
+
+
+def run_benchmarks(depths=DIFFICULTY_DEPTHS, memory=True, progress=None):
+    """
+    Run every benchmark on the corpus.
+
+    Args:
+        depths (tuple): Search depths to measure.
+        memory (bool): Measure leaf evaluations and memory peaks (a second, slower pass).
+        progress (callable): Optional function called with the name of each benchmark as it starts.
+
+    Returns:
+        dict: Machine-readable results: environment, "calls" (calls per second per
+              function) and "search" (bench_search results per depth).
+    """
+    boards = [board for _, board in corpus_boards()]
+    masks = [game_bitboard.from_board(board) for board in boards]
+    calls = {}
+    for name, function, arguments in (
+        ("game_logic.check_win", game_logic.check_win, [(player, board) for board in boards for player in (1, -1)]),
+        ("game_logic.evaluate", game_logic.evaluate, [(board, 0) for board in boards]),
+        ("game_bitboard.check_win", game_bitboard.check_win, [(xs,) for xs, _ in masks] + [(os,) for _, os in masks]),
+        ("game_bitboard.evaluate", game_bitboard.evaluate, masks),
+    ):
+        if progress is not None:
+            progress(name)
+        calls[name] = {"calls_per_second": bench_calls(function, arguments)}
+
+    search = {}
+    for depth in depths:
+        if progress is not None:
+            progress("search depth %d" % depth)
+        search["depth %d" % depth] = bench_search(boards, depth, memory)
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "positions": len(boards),
+        "calls": calls,
+        "search": search,
+    }
+
+
+def _metrics(results):
+    """Flatten results into {"group/name/metric": value} for the metrics compare knows about."""
+    flat = {}
+    for group in ("calls", "search"):
+        for name, values in results.get(group, {}).items():
+            for metric, value in values.items():
+                if value is not None and any(metric.endswith(end) for end, _ in _DIRECTIONS):
+                    flat["%s/%s/%s" % (group, name, metric)] = value
+    return flat
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Results of run_benchmarks.
+        baseline (dict): Earlier results of run_benchmarks.
+        tolerance (float): Relative change allowed, e.g. 0.15 for 15%.
+
+    Returns:
+        list: (metric, baseline value, new value, relative change) for every metric that
+              got worse by more than the tolerance. Metrics missing on either side are skipped.
+    """
+    new, old = _metrics(results), _metrics(baseline)
+    regressions = []
+    for metric in sorted(new.keys() & old.keys()):
+        if not old[metric]:
+            continue
+        change = (new[metric] - old[metric]) / old[metric]
+        higher_is_better = next(better for end, better in _DIRECTIONS if metric.endswith(end))
+        if (change < -tolerance) if higher_is_better else (change > tolerance):
+            regressions.append((metric, old[metric], new[metric], change))
+    return regressions
+
+
+def compare_algorithms(depth):
+    """
+    Count the nodes each setting in game_ai.ALGORITHMS visits over the whole corpus.
+
+    Args:
+        depth (int): Deepest iteration of each search.
+
+    Returns:
+        dict: For each algorithm name, nodes (summed over the corpus) and same_value
+              (positions where it found the same value as plain alpha-beta).
+    """
+    totals = {name: {"nodes": 0, "same_value": 0} for name in game_ai.ALGORITHMS}
+    for _, board in corpus_boards():
+        counts = game_ai.node_counts(board, depth)
+        for name, count in counts.items():
+            totals[name]["nodes"] += count["nodes"]
+            totals[name]["same_value"] += count["value"] == counts["alpha-beta"]["value"]
+    return totals
+
+
+def _print_results(results):
+    """Print the results as a table."""
+    print("Python %s on %s, %d positions" % (results["python"], results["machine"], results["positions"]))
+    for name, values in results["calls"].items():
+        print("  %-26s %12.0f calls/s" % (name, values["calls_per_second"]))
+    for name, values in results["search"].items():
+        line = "  search %-8s %9d nodes  %9.0f nodes/s  p50 %8.1fms  p90 %8.1fms  max %8.1fms" % (
+            name, values["nodes"], values["nodes_per_second"], values["p50_ms"], values["p90_ms"], values["max_ms"])
+        if values["peak_memory_kb"] is not None:
+            line += "  %9.0f leaf evals/s  peak %7.0fKB" % (values["leaf_evals_per_second"], values["peak_memory_kb"])
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation and search hot paths.")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(DIFFICULTY_DEPTHS),
+                        help="search depths to measure (default: 2 4 6)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced pass (no leaf evals/s or memory peak, about twice as fast)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--algorithms", action="store_true",
+                        help="only compare the node counts of the search algorithms in game_ai.ALGORITHMS")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative change allowed before failing (default: %.2f)" % DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.algorithms:
+        for depth in args.depths:
+            totals = compare_algorithms(depth)
+            base = totals["alpha-beta"]["nodes"]
+            for name, total in totals.items():
+                print("depth %d  %-16s %10d nodes  %+6.1f%%  same value on %d/%d positions%s" % (
+                    depth, name, total["nodes"], (total["nodes"] / base - 1) * 100, total["same_value"],
+                    len(corpus_boards()), "  (used by computer_move)" if name == game_ai.ENGINE_ALGORITHM else ""))
+        sys.exit(0)
+
+    results = run_benchmarks(tuple(args.depths), not args.no_memory,
+                             lambda name: print("running %s..." % name, file=sys.stderr))
+    _print_results(results)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS (more than %.0f%% worse than %s):" % (args.tolerance * 100, args.baseline))
+            for metric, old, new, change in regressions:
+                print("  %-45s %14.1f -> %14.1f  (%+.0f%%)" % (metric, old, new, change * 100))
+            sys.exit(1)
+        print("\nNo regressions against %s" % args.baseline)
@@ -0,0 +1,239 @@
+"""
+game_bitboard.py
+
+This file implements a bitboard representation of the 4x4x4 3D Tic Tac Toe board.
+Instead of walking the board[z][x][y] nested lists cell by cell, each player's marks
+are stored in a single 64-bit integer mask where cell (z, x, y) is bit z * 16 + x * 4 + y.
+Bit order matches the z/x/y loop order used everywhere else in the game.
+
+Functions:
+    - cell_index: Converts a (z, x, y) move into a bit index.
+    - cell_to_move: Converts a bit index back into a (z, x, y) move.
+    - from_board: Converts a 3D list board into (player mask, AI mask).
+    - to_board: Converts (player mask, AI mask) back into a 3D list board.
+    - check_win: Checks if a mask contains any of the 76 winning lines.
+    - is_winning_move: Checks only the lines through the cell just played.
+    - threat_cells: Finds the empty cells that would complete a line for a player.
+    - evaluate: Scores a position with the same heuristic as game_logic.evaluate.
+    - heuristic: The heuristic part of evaluate, without the win checks.
+
+The module is for the 4x4x4 board only: cell_index and cell_to_move use shifts and
+masks that hold for SIZE = 4 alone, and the tables below are game_lines' 4x4x4 ones.
+Other board sizes go through game_lines.geometry(n).
+"""
+
+import game_lines
+
+SIZE = 4
+CELLS = SIZE ** 3
+FULL = (1 << CELLS) - 1
+
+WIN_SCORE = game_lines.WIN_SCORE
+
+def cell_index(z, x, y):
+    """
+    Convert a move into its bit index.
+
+    Args:
+        z (int): The level of the cell (0 to 3).
+        x (int): The row of the cell (0 to 3).
+        y (int): The column of the cell (0 to 3).
+
+    Returns:
+        int: The bit index of the cell (0 to 63).
+    """
+    return z * 16 + x * 4 + y
+
+
+def cell_to_move(cell):
+    """
+    Convert a bit index back into a move.
+
+    Args:
+        cell (int): The bit index of the cell (0 to 63).
+
+    Returns:
+        tuple: The move as (z, x, y).
+    """
+    return cell >> 4, (cell >> 2) & 3, cell & 3
+
+
+# --- LINE TABLES ---
+
+# game_lines generates the tables for any board size; these are the 4x4x4 ones, kept
+# as module globals so the functions below avoid attribute lookups.
+_GEOMETRY = game_lines.geometry(SIZE)
+
+LINES = _GEOMETRY.line_masks
+
+# For each cell, the lines that pass through it (7 for corners and center cells, 4 otherwise).
+LINES_THROUGH = _GEOMETRY.lines_through
+# The same lines as lists of (z, x, y) cells, for code that works on the 3D list board.
+LINE_CELLS_THROUGH = _GEOMETRY.line_cells_through
+
+# The lines that game_logic.evaluate scores, grouped the same way it groups them.
+# A row and the column with the same index in a layer are tested with "or", so a
+# pair matching the same pattern only scores once. The two layer diagonals are
+# also tested with "or", and that test sits inside the row loop, so it counts 4 times.
+ROW_COLUMN_PAIRS = _GEOMETRY.row_column_pairs
+LAYER_DIAGONAL_PAIRS = _GEOMETRY.layer_diagonal_pairs
+LAYER_DIAGONAL_WEIGHT = _GEOMETRY.layer_diagonal_weight
+PILLARS = _GEOMETRY.pillars
+CENTER = _GEOMETRY.center
+
+# Score of a line by its sum (player marks minus AI marks): 3 or 2 in a row.
+LINE_SCORES = _GEOMETRY.line_scores
+CENTER_VALUE = game_lines.CENTER_VALUE
+
+# --- FUNCTIONS DEFINITION ---
+
+def from_board(board):
+    """
+    Convert a 3D list board into bitboards.
+
+    Args:
+        board (list): A 4x4x4 list where board[z][x][y] is 1, -1 or 0.
+
+    Returns:
+        tuple: (player mask, AI mask) with a bit set for each cell held by 1 and -1.
+    """
+    xs = os = 0
+    bit = 1
+    for layer in board:
+        for row in layer:
+            for cell in row:
+                if cell == 1:
+                    xs |= bit
+                elif cell == -1:
+                    os |= bit
+                bit <<= 1
+    return xs, os
+
+
+def to_board(xs, os):
+    """
+    Convert bitboards back into a 3D list board.
+
+    Args:
+        xs (int): Mask of the cells held by the player (1).
+        os (int): Mask of the cells held by the AI (-1).
+
+    Returns:
+        list: A 4x4x4 list where board[z][x][y] is 1, -1 or 0.
+    """
+    board = [[[0 for _ in range(SIZE)] for _ in range(SIZE)] for _ in range(SIZE)]
+    for cell in range(CELLS):
+        bit = 1 << cell
+        if xs & bit or os & bit:
+            z, x, y = cell_to_move(cell)
+            board[z][x][y] = 1 if xs & bit else -1
+    return board
+
+
+def check_win(mask):
+    """
+    Check if a player's mask contains a complete winning line.
+
+    Args:
+        mask (int): The cells held by one player.
+
+    Returns:
+        bool: True if the player has won, otherwise False.
+    """
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+def is_winning_move(mask, cell):
+    """
+    Check if the cell just played completed a line. Only the lines through
+    that cell are tested, since any other line was already tested earlier.
+
+    Args:
+        mask (int): The cells held by the player who just moved, including the new cell.
+        cell (int): The bit index of the cell just played.
+
+    Returns:
+        bool: True if the move won the game, otherwise False.
+    """
+    for line in LINES_THROUGH[cell]:
+        if mask & line == line:
+            return True
+    return False
+
+
+def threat_cells(mask, other):
+    """
+    Find the empty cells that would complete a line for a player, i.e. the open threes.
+
+    Args:
+        mask (int): The cells held by the player.
+        other (int): The cells held by the opponent.
+
+    Returns:
+        int: Mask of the cells that win immediately for the player.
+    """
+    cells = 0
+    for line in LINES:
+        if not other & line and (mask & line).bit_count() == 3:
+            cells |= line & ~mask
+    return cells
+
+
+def evaluate(xs, os):
+    """
+    Evaluate the game state. Gives exactly the same score as game_logic.evaluate.
+
+    Args:
+        xs (int): Mask of the cells held by the player (1).
+        os (int): Mask of the cells held by the AI (-1).
+
+    Returns:
+        int: WIN_SCORE if the player has won, -WIN_SCORE if the AI has won,
+             otherwise the heuristic score.
+    """
+    if check_win(xs):
+        return WIN_SCORE
+    if check_win(os):
+        return -WIN_SCORE
+    return heuristic(xs, os)
+
+
+def heuristic(xs, os):
+    """
+    Score a position that is known not to be won, i.e. evaluate without the win checks.
+
+    Args:
+        xs (int): Mask of the cells held by the player (1).
+        os (int): Mask of the cells held by the AI (-1).
+
+    Returns:
+        int: The heuristic score.
+    """
+    score = 0
+    scores = LINE_SCORES
+
+    for row, column in ROW_COLUMN_PAIRS:
+        row_sum = (xs & row).bit_count() - (os & row).bit_count()
+        column_sum = (xs & column).bit_count() - (os & column).bit_count()
+        score += scores.get(row_sum, 0)
+        if column_sum != row_sum:
+            score += scores.get(column_sum, 0)
+
+    for diagonal, anti_diagonal in LAYER_DIAGONAL_PAIRS:
+        diagonal_sum = (xs & diagonal).bit_count() - (os & diagonal).bit_count()
+        anti_sum = (xs & anti_diagonal).bit_count() - (os & anti_diagonal).bit_count()
+        pair_score = scores.get(diagonal_sum, 0)
+        if anti_sum != diagonal_sum:
+            pair_score += scores.get(anti_sum, 0)
+        score += LAYER_DIAGONAL_WEIGHT * pair_score
+
+    for pillar in PILLARS:
+        score += scores.get((xs & pillar).bit_count() - (os & pillar).bit_count(), 0)
+
+    # Center control
+    score += CENTER_VALUE * ((os & CENTER).bit_count() - (xs & CENTER).bit_count())
+
+    return score
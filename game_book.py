@@ -0,0 +1,199 @@
+"""
+game_book.py
+
+This file implements the opening book: the computer's first moves, searched deeply
+once, offline, and stored in a file instead of searched again in every game.
+
+Positions are stored in canonical form under game_symmetry.EVALUATION_SYMMETRIES, the
+symmetries that leave the heuristic unchanged, so mirrored openings share one entry
+and their book moves are exactly the moves the search would play. The computer always
+moves second, so the book holds the positions after each of the player's first moves,
+with the computer's book replies in between.
+
+File format (little-endian):
+    header:  magic b"TTTB", format version (uint16), entry count (uint32)
+    entries: sorted by key, each the 64-bit Zobrist key of the canonical position (uint64),
+             the move in the canonical position (uint8), the depth it was searched to
+             (uint8) and its score (int16)
+Later plies have many more positions, so they can be searched less deeply.
+The file is memory-mapped and searched in place, so loading it costs nothing and a
+lookup reads about log2(entries) keys.
+
+Example:
+    python game_book.py --depths 6 5 --out opening_book.bin
+
+Classes:
+    - OpeningBook: A memory-mapped book file.
+
+Functions:
+    - book_positions: Lists the positions after each move of the player.
+    - build_book: Searches the positions and writes a book file.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+
+import game_ai
+import game_bitboard
+import game_symmetry
+import game_tt
+
+MAGIC = b"TTTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+ENTRY = struct.Struct("<QBBh")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+def _canonical(xs, os_):
+    """Canonical masks of a position and the transform that maps the position onto them."""
+    cxs, cos, index = game_symmetry.canonicalize(xs, os_, game_symmetry.EVALUATION_SYMMETRIES)
+    return cxs, cos, game_symmetry.EVALUATION_SYMMETRIES[index]
+
+
+class OpeningBook:
+    """
+    A memory-mapped book file.
+
+    Attributes:
+        count (int): Number of positions in the book.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Open a book file.
+
+        Args:
+            path (str): The book file.
+
+        Raises:
+            OSError: If the file cannot be opened.
+            ValueError: If the file is not a book of this version.
+        """
+        with open(path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION or len(self._data) != HEADER.size + self.count * ENTRY.size:
+            self._data.close()
+            raise ValueError("%s is not a version %d opening book" % (path, VERSION))
+
+    def _find(self, key):
+        """Binary search for a key. Returns (move, depth, score) or None."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, move, depth, score = ENTRY.unpack_from(self._data, HEADER.size + middle * ENTRY.size)
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return move, depth, score
+        return None
+
+    def lookup(self, xs, os_, player=-1):
+        """
+        Look up the book move of a position.
+
+        Args:
+            xs (int): Mask of the cells held by the player (1).
+            os_ (int): Mask of the cells held by the AI (-1).
+            player (int): The side to move.
+
+        Returns:
+            tuple: (move as a bit index, search depth, score), or None if the position is not in the book.
+        """
+        cxs, cos, perm = _canonical(xs, os_)
+        found = self._find(game_tt.hash_position(cxs, cos, player))
+        if found is None:
+            return None
+        canonical_move, depth, score = found
+        move = perm.index(canonical_move)  # Undo the transform
+        if (xs | os_) >> move & 1:
+            return None  # Key collision with a position that is not in the book
+        return move, depth, score
+
+    def close(self):
+        """Unmap the file."""
+        self._data.close()
+
+
+def book_positions(frontier):
+    """
+    List the positions after every move of the player from a set of positions,
+    one per symmetry class. Moves that win on the spot are left out.
+
+    Args:
+        frontier (set): (player mask, AI mask) pairs with the player to move.
+
+    Returns:
+        list: Canonical (player mask, AI mask) pairs with the computer to move, sorted.
+    """
+    positions = set()
+    for xs, os_ in frontier:
+        empty = ~(xs | os_) & game_bitboard.FULL
+        for cell in range(game_bitboard.CELLS):
+            if empty >> cell & 1 and not game_bitboard.is_winning_move(xs | 1 << cell, cell):
+                cxs, cos, _ = _canonical(xs | 1 << cell, os_)
+                positions.add((cxs, cos))
+    return sorted(positions)
+
+
+def _search_position(task):
+    """Search one book position. Runs in a worker process."""
+    xs, os_, depth = task
+    search = game_ai.Search(game_bitboard.to_board(xs, os_), game_tt.TranspositionTable())
+    value, cell = search.run(-1, depth, float('-inf'), float('inf'))
+    return xs, os_, cell, value
+
+
+def build_book(path, depths, workers=None, progress=None):
+    """
+    Search every position the book has to cover and write the book file.
+    The positions of one ply are searched in parallel, since the next ply needs their moves.
+
+    Args:
+        path (str): The book file to write.
+        depths (tuple): Search depth for each computer move the book covers.
+        workers (int): Number of worker processes. Defaults to the number of CPU cores.
+        progress (callable): Optional function called with the number of positions searched so far.
+
+    Returns:
+        int: Number of entries written.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # Only needed to build a book
+
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frontier = {(0, 0)}
+        for depth in depths:
+            tasks = [(xs, os_, depth) for xs, os_ in book_positions(frontier)]
+            frontier = set()
+            for xs, os_, cell, value in pool.map(_search_position, tasks):
+                if cell is None:
+                    continue
+                entries[game_tt.hash_position(xs, os_, -1)] = (cell, depth, max(-32768, min(32767, int(value))))
+                if not game_bitboard.is_winning_move(os_ | 1 << cell, cell):
+                    frontier.add((xs, os_ | 1 << cell))
+                if progress is not None:
+                    progress(len(entries))
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+        for key in sorted(entries):
+            file.write(ENTRY.pack(key, *entries[key]))
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the opening book.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[6, 5],
+                        help="search depth for each computer move covered (default: 6 5)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="book file to write (default: opening_book.bin)")
+    args = parser.parse_args()
+
+    count = build_book(args.out, tuple(args.depths), args.workers,
+                       lambda done: print("\r%d positions searched" % done, end="", flush=True))
+    print("\n%d entries written to %s" % (count, args.out))
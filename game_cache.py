@@ -0,0 +1,210 @@
+"""
+game_cache.py
+
+This file implements a position cache that outlives a single game. The transposition
+table (see game_tt.py) is cleared when a game ends; this cache keeps the result of each
+root search, so a position reached again, in any game, is answered without searching.
+
+Positions are stored in canonical form under game_symmetry.EVALUATION_SYMMETRIES, so
+mirrored positions share an entry, and each result remembers the depth it was searched
+to: a lookup only hits if the stored search was at least as deep as the one asked for.
+Each entry also keeps the canonical masks, so a 64-bit key collision is a miss rather
+than a move from another position.
+
+There are two tiers:
+    - memory: an LRU dict of at most capacity positions, per process,
+    - disk (optional): an sqlite database in WAL mode that survives restarts and is
+      shared by every process that opens the same file. A stored result is only
+      replaced by a search at least as deep.
+
+Classes:
+    - PositionCache: The two-tier cache with hit/miss counters.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import game_symmetry
+import game_tt
+
+_SIGN_BIT = 1 << 63
+
+class PositionCache:
+    """
+    Two-tier cache of root search results, keyed by canonical position.
+
+    Entries are tuples (depth, value, move, xs, os) of the canonical position; lookups
+    return the move in the caller's orientation.
+
+    Attributes:
+        capacity (int): Positions kept in memory before the least recently used is dropped.
+        path (str): The sqlite database of the disk tier, or None for memory only.
+        memory_hits (int): Lookups answered from memory.
+        disk_hits (int): Lookups answered from the disk tier.
+        misses (int): Lookups with no result deep enough, or only one for another position.
+        stores (int): Results stored.
+        evictions (int): Positions dropped from memory.
+    """
+
+    def __init__(self, capacity=100000, path=None):
+        """
+        Create a cache. The database file is created on first use.
+
+        Args:
+            capacity (int): Positions to keep in memory.
+            path (str): The sqlite database file for the disk tier, or None for memory only.
+        """
+        self.capacity = capacity
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self.reset_stats()
+
+    def _key(self, xs, os, player):
+        """Canonical key and masks of a position, and the transform that maps it onto the canonical one."""
+        cxs, cos, index = game_symmetry.canonicalize(xs, os, game_symmetry.EVALUATION_SYMMETRIES)
+        return game_tt.hash_position(cxs, cos, player), cxs, cos, game_symmetry.EVALUATION_SYMMETRIES[index]
+
+    def _connection(self):
+        """Open the database for this process (connections must not cross a fork)."""
+        if self._db is None or self._db_pid != os.getpid():
+            import sqlite3  # Imported here to keep importing the engine cheap
+
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(positions)")]
+            if columns and "xs" not in columns:
+                # Written before entries kept their masks: it is only a cache, start it again
+                self._db.execute("DROP TABLE positions")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS positions ("
+                "key INTEGER PRIMARY KEY, depth INTEGER NOT NULL, value INTEGER NOT NULL, move INTEGER NOT NULL, "
+                "xs INTEGER NOT NULL, os INTEGER NOT NULL)"
+            )
+            self._db_pid = os.getpid()
+        return self._db
+
+    def lookup(self, xs, os, player, depth):
+        """
+        Look up the result of a search at least as deep as asked for.
+
+        Args:
+            xs (int): Mask of the cells held by the player (1).
+            os (int): Mask of the cells held by the AI (-1).
+            player (int): The side to move.
+            depth (int): The depth the result must have been searched to, at least.
+
+        Returns:
+            tuple: (depth, value, move as a bit index), or None.
+        """
+        key, cxs, cos, perm = self._key(xs, os, player)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] >= depth and self._matches(entry, cxs, cos):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            elif self.path is not None:
+                # Another process may have stored a deeper result
+                row = self._connection().execute(
+                    "SELECT depth, value, move, xs, os FROM positions WHERE key = ?", (key - _SIGN_BIT,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                entry = row[:3] + (row[3] + _SIGN_BIT, row[4] + _SIGN_BIT)
+                if entry[0] < depth or not self._matches(entry, cxs, cos):
+                    self.misses += 1
+                    return None
+                self._remember(key, entry)
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                return None
+        return entry[0], entry[1], perm.index(entry[2])
+
+    @staticmethod
+    def _matches(entry, cxs, cos):
+        """Check that an entry is for the canonical position asked for, and that its move is an empty cell."""
+        return entry[3] == cxs and entry[4] == cos and not (cxs | cos) >> entry[2] & 1
+
+    def store(self, xs, os, player, depth, value, move):
+        """
+        Store a search result, unless a deeper one is already stored.
+
+        Args:
+            xs (int): Mask of the cells held by the player (1).
+            os (int): Mask of the cells held by the AI (-1).
+            player (int): The side to move.
+            depth (int): The depth the position was searched to.
+            value (int): The value found.
+            move (int): The best move found as a bit index.
+        """
+        key, cxs, cos, perm = self._key(xs, os, player)
+        entry = (depth, int(value), perm[move], cxs, cos)
+        with self._lock:
+            old = self._memory.get(key)
+            if old is not None and old[0] > depth and old[3:] == entry[3:]:
+                return
+            self._remember(key, entry)
+            self.stores += 1
+            if self.path is not None:
+                # The disk tier keeps the deepest result any process has stored
+                self._connection().execute(
+                    "INSERT INTO positions (key, depth, value, move, xs, os) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, value = excluded.value, "
+                    "move = excluded.move, xs = excluded.xs, os = excluded.os "
+                    "WHERE excluded.depth >= positions.depth OR excluded.xs != positions.xs OR excluded.os != positions.os",
+                    (key - _SIGN_BIT,) + entry[:3] + (cxs - _SIGN_BIT, cos - _SIGN_BIT),
+                )
+
+    def _remember(self, key, entry):
+        """Put an entry in the memory tier, dropping the least recently used one if full."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Empty the memory tier and reset the counters. The disk tier is kept."""
+        with self._lock:
+            self._memory.clear()
+            self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the counters without touching the entries."""
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Report the cache counters.
+
+        Returns:
+            dict: memory_hits, disk_hits, misses, stores, evictions, hit_rate and
+                  size (number of positions in memory).
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._memory),
+        }
+
+    def close(self):
+        """Close the database connection of this process, if any."""
+        with self._lock:
+            if self._db is not None and self._db_pid == os.getpid():
+                self._db.close()
+            self._db = None
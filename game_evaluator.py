@@ -0,0 +1,266 @@
+"""
+game_evaluator.py
+
+This file implements an incremental version of the game_logic.evaluate heuristic.
+Instead of rebuilding the score at every leaf, the Evaluator keeps a count of X
+(player, 1) and O (AI, -1) marks for each of the 76 lines and a running score.
+Making or unmaking a move only updates the lines through that cell.
+
+Classes:
+    - Evaluator: Per-line occupancy counters with a running heuristic score.
+    - AllLinesEvaluator: Same counters, scoring all 76 lines alike and no center bonus.
+
+Functions:
+    - check_parity: Plays random games and compares the Evaluator with game_logic.evaluate.
+"""
+
+import random
+
+import game_bitboard
+import game_logic
+
+def _build_units():
+    """
+    Group the scored lines into units the same way game_logic.evaluate does:
+    row/column pairs (weight 1), layer diagonal pairs (weight 4) and pillars (weight 1).
+    A pair whose two lines match the same pattern only scores once.
+    """
+    index = {line: i for i, line in enumerate(game_bitboard.LINES)}
+    units = []
+    for row, column in game_bitboard.ROW_COLUMN_PAIRS:
+        units.append((1, index[row], index[column]))
+    for diagonal, anti_diagonal in game_bitboard.LAYER_DIAGONAL_PAIRS:
+        units.append((game_bitboard.LAYER_DIAGONAL_WEIGHT, index[diagonal], index[anti_diagonal]))
+    for pillar in game_bitboard.PILLARS:
+        units.append((1, index[pillar], None))
+    return tuple(units)
+
+
+UNITS = _build_units()
+
+# For each cell, the indices of the lines and of the scoring units through it.
+CELL_LINES = tuple(
+    tuple(i for i, line in enumerate(game_bitboard.LINES) if line >> cell & 1)
+    for cell in range(game_bitboard.CELLS)
+)
+CELL_UNITS = tuple(
+    tuple(unit for unit in UNITS if unit[1] in lines or unit[2] in lines)
+    for lines in CELL_LINES
+)
+# Score change when the player (1) takes a cell; the AI (-1) gets the opposite.
+CELL_CENTER = tuple(
+    -game_bitboard.CENTER_VALUE if game_bitboard.CENTER >> cell & 1 else 0
+    for cell in range(game_bitboard.CELLS)
+)
+
+# Every line as its own unit of weight 1, for AllLinesEvaluator.
+ALL_LINE_CELL_UNITS = tuple(tuple((1, line, None) for line in lines) for lines in CELL_LINES)
+NO_CENTER = (0,) * game_bitboard.CELLS
+
+
+class Evaluator:
+    """
+    Per-line occupancy counters with a running heuristic score.
+
+    Attributes:
+        x_counts (list): Number of player (1) marks on each of the 76 lines.
+        o_counts (list): Number of AI (-1) marks on each of the 76 lines.
+        x_wins (int): Number of lines completed by the player.
+        o_wins (int): Number of lines completed by the AI.
+        total (int): The heuristic score of the current position, ignoring wins.
+    """
+
+    # Scoring units and center bonus through each cell; subclasses swap these to change the heuristic.
+    cell_units = CELL_UNITS
+    cell_center = CELL_CENTER
+
+    def __init__(self, xs=0, os=0):
+        """
+        Build the counters for a position.
+
+        Args:
+            xs (int): Mask of the cells held by the player (1).
+            os (int): Mask of the cells held by the AI (-1).
+        """
+        self.x_counts = [0] * len(game_bitboard.LINES)
+        self.o_counts = [0] * len(game_bitboard.LINES)
+        self.x_wins = 0
+        self.o_wins = 0
+        self.total = 0
+        for cell in range(game_bitboard.CELLS):
+            if xs >> cell & 1:
+                self.make(cell, 1)
+            elif os >> cell & 1:
+                self.make(cell, -1)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build the counters for a 3D list board.
+
+        Args:
+            board (list): A 4x4x4 list where board[z][x][y] is 1, -1 or 0.
+
+        Returns:
+            Evaluator: The evaluator for that position.
+        """
+        return cls(*game_bitboard.from_board(board))
+
+    def _units_score(self, units):
+        """Score of a group of units from the current line sums."""
+        x_counts = self.x_counts
+        o_counts = self.o_counts
+        scores = game_bitboard.LINE_SCORES
+        total = 0
+        for weight, a, b in units:
+            a_sum = x_counts[a] - o_counts[a]
+            value = scores.get(a_sum, 0)
+            if b is not None:
+                b_sum = x_counts[b] - o_counts[b]
+                if b_sum != a_sum:
+                    value += scores.get(b_sum, 0)
+            total += weight * value
+        return total
+
+    def make(self, cell, player):
+        """
+        Place a mark and update the lines and units through the cell.
+
+        Args:
+            cell (int): The bit index of the cell (0 to 63).
+            player (int): The player making the move (1 or -1).
+
+        Returns:
+            bool: True if the move completed a line.
+        """
+        units = self.cell_units[cell]
+        total = self.total - self._units_score(units)
+
+        won = False
+        counts = self.x_counts if player == 1 else self.o_counts
+        for line in CELL_LINES[cell]:
+            counts[line] += 1
+            if counts[line] == 4:
+                won = True
+                if player == 1:
+                    self.x_wins += 1
+                else:
+                    self.o_wins += 1
+
+        self.total = total + self._units_score(units) + self.cell_center[cell] * player
+        return won
+
+    def unmake(self, cell, player):
+        """
+        Remove a mark placed by make and restore the lines and units through the cell.
+
+        Args:
+            cell (int): The bit index of the cell (0 to 63).
+            player (int): The player who made the move (1 or -1).
+        """
+        units = self.cell_units[cell]
+        total = self.total - self._units_score(units)
+
+        counts = self.x_counts if player == 1 else self.o_counts
+        for line in CELL_LINES[cell]:
+            if counts[line] == 4:
+                if player == 1:
+                    self.x_wins -= 1
+                else:
+                    self.o_wins -= 1
+            counts[line] -= 1
+
+        self.total = total + self._units_score(units) - self.cell_center[cell] * player
+
+    def score(self):
+        """
+        Read the score off the counters. Same result as game_logic.evaluate.
+
+        Returns:
+            int: WIN_SCORE if the player has won, -WIN_SCORE if the AI has won,
+                 otherwise the running heuristic score.
+        """
+        if self.x_wins:
+            return game_bitboard.WIN_SCORE
+        if self.o_wins:
+            return -game_bitboard.WIN_SCORE
+        return self.total
+
+
+class AllLinesEvaluator(Evaluator):
+    """
+    Scores each of the 76 lines by its own sum, with no row/column pairing and no center bonus.
+    Unlike the game_logic.evaluate heuristic it treats every line alike, so it is invariant
+    under all 192 board symmetries. Used to compare heuristics in self-play.
+    """
+
+    cell_units = ALL_LINE_CELL_UNITS
+    cell_center = NO_CENTER
+
+
+# Evaluators by name, for engine settings given on the command line
+EVALUATORS = {
+    "heuristic": Evaluator,
+    "all-lines": AllLinesEvaluator,
+}
+
+
+def check_parity(games=200, seed=0, reference_evaluate=None, reference_check_win=None):
+    """
+    Play random games through make/unmake and compare every position with game_logic.evaluate,
+    or with an independent reference implementation (see tests/reference_logic.py).
+
+    Args:
+        games (int): Number of random games to play.
+        seed (int): Seed for the random move generator.
+        reference_evaluate (callable): evaluate(board, depth) to compare the scores with.
+                                       Defaults to game_logic.evaluate.
+        reference_check_win (callable): check_win(player, board) to compare the wins with.
+                                        Defaults to game_logic.check_win.
+
+    Returns:
+        int: The number of positions compared.
+
+    Raises:
+        AssertionError: If any score or win differs from the reference.
+    """
+    reference_evaluate = reference_evaluate or game_logic.evaluate
+    reference_check_win = reference_check_win or game_logic.check_win
+    rng = random.Random(seed)
+    compared = 0
+    for _ in range(games):
+        evaluator = Evaluator()
+        board = game_logic.initialize_board()
+        cells = rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS)
+        played = []
+        player = 1
+        for cell in cells:
+            won = evaluator.make(cell, player)
+            z, x, y = game_bitboard.cell_to_move(cell)
+            board[z][x][y] = player
+            played.append((cell, player))
+
+            expected = reference_evaluate(board, 0)
+            assert evaluator.score() == expected, (board, evaluator.score(), expected)
+            assert won == game_logic.check_win_at(board, (z, x, y))
+            # The game stops at the first win, so only the player who just moved can have won
+            assert won == reference_check_win(player, board)
+            compared += 1
+            if won:
+                break
+            player = -player
+
+        # Unwind the game and check every position again on the way back.
+        for cell, player in reversed(played):
+            evaluator.unmake(cell, player)
+            z, x, y = game_bitboard.cell_to_move(cell)
+            board[z][x][y] = 0
+            expected = reference_evaluate(board, 0)
+            assert evaluator.score() == expected, (board, evaluator.score(), expected)
+            compared += 1
+        assert evaluator.score() == 0 and not any(evaluator.x_counts) and not any(evaluator.o_counts)
+    return compared
+
+
+if __name__ == "__main__":
+    print("Evaluator matches game_logic.evaluate on %d positions" % check_parity())
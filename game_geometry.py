@@ -0,0 +1,180 @@
+"""
+game_geometry.py
+
+This file holds the screen geometry of the board: where each of the 64 cells is drawn
+and which cell a point of the window falls in. It is computed once, at import, so
+neither drawing a piece nor handling a click repeats the trapezoid interpolation.
+
+Each level is drawn as a trapezoid, narrow at the top and wide at the bottom. Row
+boundaries are horizontal lines spaced BASE_CELL_HEIGHT apart; column boundaries are
+straight lines from the top edge to the bottom edge, so they slant outwards. A cell is
+the quadrilateral between two row boundaries and two column boundaries.
+
+Click lookup goes through CELL_MAP, a WIDTH x HEIGHT label map holding the cell under
+every pixel (or NO_CELL). A point belongs to a cell when it lies on or right of/below
+the cell's left/top boundary and strictly left of/above its right/bottom boundary, so
+every point inside the grid belongs to exactly one cell, slanted edges included.
+
+Cells are numbered like game_bitboard: cell (level, row, col) is level * 16 + row * 4 + col.
+This module does not need pygame.
+
+Functions:
+    - corner: The screen point where a row boundary meets a column boundary.
+    - cell_polygon: The 4 corners of a cell.
+    - cell_center: The center of a cell.
+    - hit_test: The cell under a screen point.
+    - check_geometry: Checks CELL_MAP against an exact point-in-cell test.
+"""
+
+import math
+
+import game_bitboard
+
+# Constants for board dimensions
+LEVELS = 4
+WIDTH, HEIGHT = 750, 750
+GRID_SIZE = 4
+PADDING = WIDTH // 16
+BASE_CELL_HEIGHT = HEIGHT // GRID_SIZE // 6
+TOP_WIDTH = WIDTH // 4
+BOTTOM_WIDTH = 1.5 * TOP_WIDTH
+LEVEL_HEIGHT = GRID_SIZE * BASE_CELL_HEIGHT
+LEVEL_SPACING = LEVEL_HEIGHT + PADDING
+
+NO_CELL = 255  # CELL_MAP value of a point outside the grid
+
+# Layout configurations for the 3D board's top-left, top-right, etc.
+top_lefts = [(WIDTH // 1.33 - TOP_WIDTH // 2, PADDING + level * LEVEL_SPACING) for level in range(LEVELS)]
+top_rights = [(WIDTH // 1.33 + TOP_WIDTH // 2, PADDING + level * LEVEL_SPACING) for level in range(LEVELS)]
+bottom_lefts = [(WIDTH // 1.33 - BOTTOM_WIDTH // 2, PADDING + level * LEVEL_SPACING + LEVEL_HEIGHT) for level in range(LEVELS)]
+bottom_rights = [(WIDTH // 1.33 + BOTTOM_WIDTH // 2, PADDING + level * LEVEL_SPACING + LEVEL_HEIGHT) for level in range(LEVELS)]
+
+def corner(level, row, col):
+    """
+    Find the screen point where a row boundary meets a column boundary of a level.
+
+    Args:
+        level (int): The level (0 to 3).
+        row (float): The row boundary (0 is the top edge, GRID_SIZE the bottom edge).
+        col (float): The column boundary (0 is the left edge, GRID_SIZE the right edge).
+
+    Returns:
+        tuple: The (x, y) screen point.
+    """
+    ratio = row / GRID_SIZE
+    left_x = top_lefts[level][0] + ratio * (bottom_lefts[level][0] - top_lefts[level][0])
+    right_x = top_rights[level][0] + ratio * (bottom_rights[level][0] - top_rights[level][0])
+    return left_x + col / GRID_SIZE * (right_x - left_x), top_lefts[level][1] + row * BASE_CELL_HEIGHT
+
+
+def cell_polygon(level, row, col):
+    """
+    List the corners of a cell.
+
+    Args:
+        level (int): The level of the cell (0 to 3).
+        row (int): The row of the cell (0 to 3).
+        col (int): The column of the cell (0 to 3).
+
+    Returns:
+        list: The top-left, top-right, bottom-right and bottom-left (x, y) corners.
+    """
+    return [corner(level, row, col), corner(level, row, col + 1),
+            corner(level, row + 1, col + 1), corner(level, row + 1, col)]
+
+
+def cell_center(level, row, col):
+    """
+    Find the center of a cell: where the lines through the middle of its sides cross.
+
+    Args:
+        level (int): The level of the cell (0 to 3).
+        row (int): The row of the cell (0 to 3).
+        col (int): The column of the cell (0 to 3).
+
+    Returns:
+        tuple: The (x, y) center, rounded to whole pixels.
+    """
+    x, y = corner(level, row + 0.5, col + 0.5)
+    return int(round(x)), int(round(y))
+
+
+# Corners and centers of every cell, indexed by bit index
+CELL_POLYGONS = [cell_polygon(*game_bitboard.cell_to_move(cell)) for cell in range(game_bitboard.CELLS)]
+CELL_CENTERS = [cell_center(*game_bitboard.cell_to_move(cell)) for cell in range(game_bitboard.CELLS)]
+
+def _build_cell_map():
+    """Rasterize every cell into a WIDTH x HEIGHT label map, one byte per pixel."""
+    cell_map = bytearray([NO_CELL]) * (WIDTH * HEIGHT)
+    for level in range(LEVELS):
+        top = top_lefts[level][1]
+        for y in range(math.ceil(top), min(math.ceil(top + LEVEL_HEIGHT), HEIGHT)):
+            row = int((y - top) // BASE_CELL_HEIGHT)
+            # Column boundaries are straight lines, so their x at this y is exact
+            row_position = (y - top) / BASE_CELL_HEIGHT
+            bounds = [max(0, min(WIDTH, math.ceil(corner(level, row_position, col)[0]))) for col in range(GRID_SIZE + 1)]
+            for col in range(GRID_SIZE):
+                start, end = y * WIDTH + bounds[col], y * WIDTH + bounds[col + 1]
+                cell_map[start:end] = bytes([game_bitboard.cell_index(level, row, col)]) * (end - start)
+    return bytes(cell_map)
+
+
+# The cell under every pixel, at index y * WIDTH + x
+CELL_MAP = _build_cell_map()
+
+def hit_test(pos):
+    """
+    Find the cell under a screen point.
+
+    Args:
+        pos (tuple): The x and y screen coordinates, e.g. of a click.
+
+    Returns:
+        int: The bit index of the cell, or None if the point is outside every cell.
+    """
+    x, y = int(pos[0]), int(pos[1])
+    if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+        return None
+    cell = CELL_MAP[y * WIDTH + x]
+    return None if cell == NO_CELL else cell
+
+
+def _contains(cell, x, y):
+    """Point-in-cell test on the cell's polygon, with the same edge rule as CELL_MAP."""
+    (top_left_x, top), (top_right_x, _), (bottom_right_x, bottom), (bottom_left_x, _) = CELL_POLYGONS[cell]
+    if not top <= y < bottom:
+        return False
+    ratio = (y - top) / (bottom - top)
+    return (top_left_x + ratio * (bottom_left_x - top_left_x) <= x
+            < top_right_x + ratio * (bottom_right_x - top_right_x))
+
+
+def check_geometry():
+    """
+    Check CELL_MAP against the exact point-in-cell test on every pixel of every cell,
+    and that every cell's center maps back to the cell. Run with python game_geometry.py.
+
+    Returns:
+        int: Number of pixels inside the grid.
+
+    Raises:
+        AssertionError: On the first pixel or center that does not match.
+    """
+    inside = 0
+    for cell, polygon in enumerate(CELL_POLYGONS):
+        xs = [x for x, _ in polygon]
+        ys = [y for _, y in polygon]
+        for y in range(math.floor(min(ys)), math.ceil(max(ys)) + 1):
+            for x in range(math.floor(min(xs)), math.ceil(max(xs)) + 1):
+                if _contains(cell, x, y):
+                    assert hit_test((x, y)) == cell, "pixel (%d, %d) maps to %s, not %d" % (x, y, hit_test((x, y)), cell)
+                    inside += 1
+    # Every pixel of the map was found inside its cell, so no pixel is in two cells or in the wrong one
+    assert inside == len(CELL_MAP) - CELL_MAP.count(NO_CELL), "the map has pixels outside their cell"
+    for cell, center in enumerate(CELL_CENTERS):
+        assert hit_test(center) == cell, "center of cell %d maps to %s" % (cell, hit_test(center))
+    return inside
+
+
+if __name__ == "__main__":
+    print("%d pixels in %d cells OK" % (check_geometry(), game_bitboard.CELLS))
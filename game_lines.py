@@ -0,0 +1,359 @@
+"""
+game_lines.py
+
+This file generates the winning-line tables of an n x n x n board, for any n. The
+4x4x4 game (game_bitboard, game_logic and everything built on them) takes its tables
+from here. game_logic's win checks and evaluation work from these tables for boards of
+any size, e.g. 3x3x3 or 5x5x5; the search (game_ai) and everything around it are 4x4x4 only.
+
+A line runs through the whole board in one of 13 directions: 3 along an axis, 6 along
+the diagonal of an axis plane and 4 along a space diagonal. Along each direction,
+every coordinate that does not change can take any of its n values, so there are
+((n + 2) ** 3 - n ** 3) / 2 lines: 49 for n = 3, 76 for n = 4 and 109 for n = 5.
+
+Cells are numbered z * n * n + x * n + y, which for n = 4 is game_bitboard's bit index.
+Lines are kept both as tuples of cell indices and as bitmasks over those indices.
+
+The heuristic is the original loop-based evaluation (kept in tests/reference_logic.py)
+written for any n: lines one and two stones short of complete score 100 and 50; a row
+and the column with the same index in a layer count once between them, as do the two
+diagonals of a layer, which weigh n times; pillars count once each; the middle cells
+are worth CENTER_VALUE to the AI.
+
+Classes:
+    - BoardGeometry: The line tables of one board size and the functions built on them.
+
+Functions:
+    - generate_lines: Lists every winning line of an n x n x n board.
+    - line_count: The number of winning lines of an n x n x n board.
+    - geometry: The BoardGeometry of a size, built once and then shared.
+    - check_geometry: Checks the tables of a range of sizes.
+"""
+
+WIN_SCORE = 10000
+CENTER_VALUE = 20
+
+# Directions with their first non-zero step positive, so each line is found once:
+# axes first, then plane diagonals, then space diagonals
+DIRECTIONS = tuple(sorted(
+    ((dz, dx, dy) for dz in (-1, 0, 1) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+     if (dz, dx, dy) > (0, 0, 0)),
+    key=lambda direction: (sum(map(abs, direction)), [-step for step in direction])
+))
+
+def generate_lines(size):
+    """
+    List every winning line of a size x size x size board.
+
+    Args:
+        size (int): The board size n.
+
+    Returns:
+        tuple: The lines, each a tuple of the size cell indices it runs through, in order.
+    """
+    lines = []
+    for dz, dx, dy in DIRECTIONS:
+        # A moving coordinate starts at one end of its axis; a fixed one can be anything
+        starts = [range(size) if step == 0 else (0 if step > 0 else size - 1,) for step in (dz, dx, dy)]
+        for z in starts[0]:
+            for x in starts[1]:
+                for y in starts[2]:
+                    lines.append(tuple(
+                        (z + k * dz) * size * size + (x + k * dx) * size + (y + k * dy) for k in range(size)
+                    ))
+    return tuple(lines)
+
+
+def line_count(size):
+    """
+    Count the winning lines of a size x size x size board.
+
+    Args:
+        size (int): The board size n.
+
+    Returns:
+        int: ((n + 2) ** 3 - n ** 3) / 2.
+    """
+    return ((size + 2) ** 3 - size ** 3) // 2
+
+
+def _mask(cells):
+    """Build a mask from an iterable of cell indices."""
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+
+class BoardGeometry:
+    """
+    The line tables of one board size, and the win checks and heuristic built on them.
+
+    Attributes:
+        size (int): The board size n.
+        cells (int): Number of cells, n ** 3.
+        full (int): Mask of every cell.
+        lines (tuple): Every winning line as a tuple of cell indices.
+        line_masks (tuple): The same lines as masks.
+        lines_through (tuple): For each cell, the masks of the lines through it.
+        line_cells_through (tuple): The same lines as tuples of (z, x, y) moves.
+        row_column_pairs (tuple): (row, column) masks with the same index in the same layer.
+        layer_diagonal_pairs (tuple): (diagonal, anti-diagonal) masks of each layer.
+        layer_diagonal_weight (int): How many times a layer diagonal pair counts (n).
+        pillars (tuple): Masks of the lines across the layers along z.
+        center (int): Mask of the middle cells (2x2x2 for an even n, the center cell for an odd n).
+        line_scores (dict): Score of a line by its sum (player stones minus AI stones).
+    """
+
+    def __init__(self, size):
+        """
+        Build the tables of a board size.
+
+        Args:
+            size (int): The board size n, at least 2.
+
+        Raises:
+            ValueError: If the size is smaller than 2.
+        """
+        if size < 2:
+            raise ValueError("a board needs at least 2 cells per side, got %d" % size)
+        self.size = size
+        self.cells = size ** 3
+        self.full = (1 << self.cells) - 1
+        self.lines = generate_lines(size)
+        self.line_masks = tuple(_mask(line) for line in self.lines)
+        self.lines_through = tuple(
+            tuple(line for line in self.line_masks if line >> cell & 1) for cell in range(self.cells)
+        )
+        self.line_cells_through = tuple(
+            tuple(tuple(self.cell_to_move(c) for c in line) for line in self.lines if cell in line)
+            for cell in range(self.cells)
+        )
+
+        last = size - 1
+        self.row_column_pairs = tuple(
+            (_mask(self.cell_index(z, i, j) for j in range(size)), _mask(self.cell_index(z, j, i) for j in range(size)))
+            for z in range(size) for i in range(size)
+        )
+        self.layer_diagonal_pairs = tuple(
+            (_mask(self.cell_index(z, i, i) for i in range(size)), _mask(self.cell_index(z, i, last - i) for i in range(size)))
+            for z in range(size)
+        )
+        self.layer_diagonal_weight = size
+        self.pillars = tuple(_mask(self.cell_index(k, x, y) for k in range(size)) for x in range(size) for y in range(size))
+        middle = (size // 2 - 1, size // 2) if size % 2 == 0 else (size // 2,)
+        self.center = _mask(self.cell_index(z, x, y) for z in middle for x in middle for y in middle)
+        self.line_scores = {last: 100, -last: -100}
+        if size - 2 >= 2:
+            self.line_scores.update({size - 2: 50, 2 - size: -50})
+
+    def cell_index(self, z, x, y):
+        """
+        Convert a move into its cell index.
+
+        Args:
+            z (int): The level of the cell.
+            x (int): The row of the cell.
+            y (int): The column of the cell.
+
+        Returns:
+            int: The cell index, z * n * n + x * n + y.
+        """
+        return (z * self.size + x) * self.size + y
+
+    def cell_to_move(self, cell):
+        """
+        Convert a cell index back into a move.
+
+        Args:
+            cell (int): The cell index.
+
+        Returns:
+            tuple: The move as (z, x, y).
+        """
+        z, rest = divmod(cell, self.size * self.size)
+        return (z,) + divmod(rest, self.size)
+
+    def player_mask(self, board, player):
+        """
+        Collect the cells of one player from a 3D list board of this size.
+
+        Args:
+            board (list): An n x n x n list where board[z][x][y] is a player's mark or 0.
+            player: The mark to collect.
+
+        Returns:
+            int: Mask of the cells holding the mark.
+        """
+        mask = 0
+        bit = 1
+        for layer in board:
+            for row in layer:
+                for cell in row:
+                    if cell == player:
+                        mask |= bit
+                    bit <<= 1
+        return mask
+
+    def from_board(self, board):
+        """
+        Convert a 3D list board of this size into bitboards.
+
+        Args:
+            board (list): An n x n x n list where board[z][x][y] is 1, -1 or 0.
+
+        Returns:
+            tuple: (player mask, AI mask) with a bit set for each cell held by 1 and -1.
+        """
+        xs = os = 0
+        bit = 1
+        for layer in board:
+            for row in layer:
+                for cell in row:
+                    if cell == 1:
+                        xs |= bit
+                    elif cell == -1:
+                        os |= bit
+                    bit <<= 1
+        return xs, os
+
+    def check_win(self, mask):
+        """
+        Check if a player's mask contains a complete winning line.
+
+        Args:
+            mask (int): The cells held by one player.
+
+        Returns:
+            bool: True if the player has won, otherwise False.
+        """
+        for line in self.line_masks:
+            if mask & line == line:
+                return True
+        return False
+
+    def is_winning_move(self, mask, cell):
+        """
+        Check if the cell just played completed a line.
+
+        Args:
+            mask (int): The cells held by the player who just moved, including the new cell.
+            cell (int): The cell just played.
+
+        Returns:
+            bool: True if the move won the game, otherwise False.
+        """
+        for line in self.lines_through[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def heuristic(self, xs, os):
+        """
+        Score a position that is known not to be won.
+
+        Args:
+            xs (int): Mask of the cells held by the player (1).
+            os (int): Mask of the cells held by the AI (-1).
+
+        Returns:
+            int: The heuristic score.
+        """
+        score = 0
+        scores = self.line_scores
+
+        for row, column in self.row_column_pairs:
+            row_sum = (xs & row).bit_count() - (os & row).bit_count()
+            column_sum = (xs & column).bit_count() - (os & column).bit_count()
+            score += scores.get(row_sum, 0)
+            if column_sum != row_sum:
+                score += scores.get(column_sum, 0)
+
+        for diagonal, anti_diagonal in self.layer_diagonal_pairs:
+            diagonal_sum = (xs & diagonal).bit_count() - (os & diagonal).bit_count()
+            anti_sum = (xs & anti_diagonal).bit_count() - (os & anti_diagonal).bit_count()
+            pair_score = scores.get(diagonal_sum, 0)
+            if anti_sum != diagonal_sum:
+                pair_score += scores.get(anti_sum, 0)
+            score += self.layer_diagonal_weight * pair_score
+
+        for pillar in self.pillars:
+            score += scores.get((xs & pillar).bit_count() - (os & pillar).bit_count(), 0)
+
+        # Center control
+        score += CENTER_VALUE * ((os & self.center).bit_count() - (xs & self.center).bit_count())
+
+        return score
+
+    def evaluate(self, xs, os):
+        """
+        Evaluate the game state.
+
+        Args:
+            xs (int): Mask of the cells held by the player (1).
+            os (int): Mask of the cells held by the AI (-1).
+
+        Returns:
+            int: WIN_SCORE if the player has won, -WIN_SCORE if the AI has won,
+                 otherwise the heuristic score.
+        """
+        if self.check_win(xs):
+            return WIN_SCORE
+        if self.check_win(os):
+            return -WIN_SCORE
+        return self.heuristic(xs, os)
+
+
+_geometries = {}
+
+def geometry(size):
+    """
+    Get the BoardGeometry of a size, building it the first time it is asked for.
+
+    Args:
+        size (int): The board size n.
+
+    Returns:
+        BoardGeometry: The shared tables of that size.
+    """
+    if size not in _geometries:
+        _geometries[size] = BoardGeometry(size)
+    return _geometries[size]
+
+
+def check_geometry(sizes=range(2, 8)):
+    """
+    Check the line tables: the number of lines, that every line has n distinct cells in
+    a straight line across the board, and that no line appears twice.
+    Run with python game_lines.py.
+
+    Args:
+        sizes (iterable): The board sizes to check.
+
+    Returns:
+        dict: Number of lines per size.
+
+    Raises:
+        AssertionError: On the first table that is wrong.
+    """
+    counts = {}
+    for size in sizes:
+        board = geometry(size)
+        assert len(board.lines) == line_count(size), "%d lines for n = %d" % (len(board.lines), size)
+        assert len(set(board.line_masks)) == len(board.lines), "a line appears twice for n = %d" % size
+        for line in board.lines:
+            moves = [board.cell_to_move(cell) for cell in line]
+            steps = {tuple(b - a for a, b in zip(moves[k], moves[k + 1])) for k in range(size - 1)}
+            assert len(set(line)) == size and len(steps) == 1, "line %s is not straight" % (line,)
+            step = steps.pop()
+            assert all(
+                (s == 0 and len({move[axis] for move in moves}) == 1) or {move[axis] for move in moves} == set(range(size))
+                for axis, s in enumerate(step)
+            ), "line %s does not cross the board" % (line,)
+        counts[size] = len(board.lines)
+    return counts
+
+
+if __name__ == "__main__":
+    for size, count in check_geometry().items():
+        print("%dx%dx%d: %d lines OK" % (size, size, size, count))
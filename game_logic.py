@@ -2,82 +2,68 @@
 game_logic.py
 
 This file contains the core logic functions for the 3D Tic Tac Toe game:
-    1. Function to check for a winning condition.
-    2. Function to evaluate the game state (for AI).
+    1. Function to create an empty board.
+    2. Function to check for a winning condition.
+    3. Function to check if the last move played won the game.
+    4. Function to evaluate the game state (for AI).
+
+Like the rest of the engine (game_bitboard, game_ai, game_play, ...), it does not import
+pygame or numpy, so it can be used headless; only game_ui and main need a display.
 """
 
+import game_lines
+
+def initialize_board(size=4):
+    """
+    Create an empty board.
+
+    Args:
+    - size (int): The board size n, 4 for the standard game (3 and 5 also make good games).
+
+    Returns:
+    - 3D list: An n x n x n list where board[z][x][y] is 0 for every cell.
+    """
+    return [[[0 for _ in range(size)] for _ in range(size)] for _ in range(size)]
+
+
 def check_win(player, board):
     """
-    Check if the specified player has won in the 4x4x4 3D tic-tac-toe board.
+    Check if the specified player has won. Every winning line of the board's size is
+    tested, from the line table of game_lines.
 
     Parameters:
     - player (int/str): The player's mark (usually an integer or string indicating the player).
-    - board (3D list): A 4x4x4 list representing the game board. E.g., board[z][x][y] 
+    - board (3D list): An n x n x n list representing the game board. E.g., board[z][x][y]
                        gives the mark at layer z, row x, and column y.
 
     Returns:
     - bool: True if the player has won, otherwise False.
     """
+    geometry = game_lines.geometry(len(board))
+    return geometry.check_win(geometry.player_mask(board, player))
 
-    # 2D Check:
-    for z in range(4):
-        # Check rows and columns for each layer (z)
-        for i in range(4):
-            if all(board[z][i][j] == player for j in range(4)) or \
-               all(board[z][j][i] == player for j in range(4)):
-                return True
-
-        # Check two 2D diagonals for each layer (z)
-        if all(board[z][i][i] == player for i in range(4)) or \
-           all(board[z][i][3 - i] == player for i in range(4)):
-            return True
 
-    # 3D Check:
-    # Check vertical stack across the layers
-    for x in range(4):
-        for y in range(4):
-            if all(board[k][x][y] == player for k in range(4)):
-                return True
-
-    # Check 3D main diagonals
-    # Top-left of top layer to bottom-right of bottom layer
-    if all(board[i][i][i] == player for i in range(4)):
-        return True
-
-    # Top-right of top layer to bottom-left of bottom layer
-    if all(board[i][3-i][i] == player for i in range(4)):
-        return True
-
-    # Bottom-left of top layer to top-right of bottom layer
-    if all(board[i][i][3-i] == player for i in range(4)):
-        return True
-
-    # Bottom-right of top layer to top-left of bottom layer
-    if all(board[i][3-i][3-i] == player for i in range(4)):
-        return True
-
-    # Check 3D diagonals across rows and columns
-    # Diagonal top to bottom layer through each column
-    for y in range(4):
-        if all(board[i][3-i][y] == player for i in range(4)):
-            return True
-        
-    # Diagonal bottom to top layer through each column
-    for y in range(4):
-        if all(board[i][i][y] == player for i in range(4)):
-            return True
+def check_win_at(board, move):
+    """
+    Check if the move just played completed a line for the player who made it.
+    Only the lines through that cell are tested (at most 7 on a 4x4x4 board), instead of all 76.
 
-    # Diagonal top to bottom layer through each row
-    for x in range(4):
-        if all(board[i][x][3-i] == player for i in range(4)):
-            return True
+    Parameters:
+    - board (3D list): An n x n x n list representing the game board.
+    - move (tuple): The cell just played as (z, x, y).
 
-    # Diagonal bottom to top layer through each row
-    for x in range(4):
-        if all(board[i][x][i] == player for i in range(4)):
+    Returns:
+    - bool: True if the move won the game, otherwise False.
+    """
+    z, x, y = move
+    player = board[z][x][y]
+    if player == 0:
+        return False
+
+    geometry = game_lines.geometry(len(board))
+    for line in geometry.line_cells_through[geometry.cell_index(z, x, y)]:
+        if all(board[i][j][k] == player for i, j, k in line):
             return True
-
-    # If none of the above conditions were met, the player hasn't won
     return False
 
 
@@ -102,92 +88,20 @@ def is_board_full(board):
 def evaluate(board, depth):
     """
     Evaluate the game state.
-    
+
+    Lines one and two marks short of complete score 100 and 50 (negative for the AI).
+    A row and the column with the same index in a layer score once between them, as do
+    the two diagonals of a layer, which count n times; pillars score once each. Each
+    middle cell is worth 20 to the AI. See game_lines.BoardGeometry.heuristic.
+
     Args:
-        board: The current state of the game board.
+        board: The current state of the game board, n x n x n.
         depth: Current depth in the search tree.
 
     Returns:
-        int: 
-            Scaled score based on the depth.
+        int:
+            10000 if the player has won, -10000 if the AI has won, otherwise the heuristic score.
     """
-
-    # Check for immediate win/loss FIRST
-    if check_win(1, board):  # Player wins
-        return 10000
-    elif check_win(-1, board):  # Opponent (AI) wins
-        return -10000
-
-    score = 0
-
-    # Check patterns function
-    def check_pattern(target_sum, player):
-        nonlocal score
-        multiplier = 50 if target_sum == 2 else 100
-        multiplier = multiplier if player == 1 else -multiplier 
-        local_score = 0
-        
-        def add_to_score():
-            nonlocal local_score
-            local_score += multiplier
-
-        # 2D Check:
-        for z in range(4):
-            for i in range(4):
-                if sum(board[z][i]) == target_sum * player or \
-                sum([board[z][j][i] for j in range(4)]) == target_sum * player:
-                    add_to_score()
-
-                if sum([board[z][i][i] for i in range(4)]) == target_sum * player or \
-                sum([board[z][i][3-i] for i in range(4)]) == target_sum * player:
-                    add_to_score()
-
-        # 3D Check:
-        for x in range(4):
-            for y in range(4):
-                if sum([board[k][x][y] for k in range(4)]) == target_sum * player:
-                    add_to_score()
-
-        for pattern in [[(i, i, i) for i in range(4)],
-                        [(i, 3-i, i) for i in range(4)],
-                        [(i, i, 3-i) for i in range(4)],
-                        [(i, 3-i, 3-i) for i in range(4)],
-                        [(i, 3-i, y) for i in range(4) for y in range(4)],
-                        [(i, i, y) for i in range(4) for y in range(4)],
-                        [(i, x, 3-i) for i in range(4) for x in range(4)],
-                        [(i, x, i) for i in range(4) for x in range(4)]]:
-            if all(board[i][j][k] == player for i, j, k in pattern):
-                add_to_score()
-
-        # Accumulate the local score
-        score += local_score
-
-    # Check for almost wins (3 in a row)
-    for player in [1, -1]:
-        check_pattern(3, player)
-
-    print("Score after checking 3 in a row: " + str(score))
-
-    # Check for two in a row
-    for player in [1, -1]:
-        check_pattern(2, player)
-
-    print("Score after checking 2 in a row: " + str(score))
-
-    # Center control
-    center_value = 20  # Adjust this value as per importance
-    for z in [1, 2]:
-        for x in [1, 2]:
-            for y in [1, 2]:
-                if board[z][x][y] == 1:  # Player
-                    score -= center_value
-                elif board[z][x][y] == -1:  # AI
-                    score += center_value
-    print("Score after center control: " + str(score))
-
-    # Scale the score based on depth
-    if depth != 0:
-        score = score
-
-    print("final " + str(score))
-    return score
\ No newline at end of file
+    geometry = game_lines.geometry(len(board))
+    xs, os = geometry.from_board(board)
+    return geometry.evaluate(xs, os)
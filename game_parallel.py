@@ -0,0 +1,228 @@
+"""
+game_parallel.py
+
+This file implements a multi-core search mode. The pure Python alpha-beta search only
+uses one core, so the root moves are split across worker processes, Young Brothers
+Wait style:
+    1. The root moves are ordered and mirrored duplicates are dropped, as in game_ai.Search.
+    2. The first (eldest) move is searched in this process, which gives a bound.
+    3. The other moves are searched in parallel with the best bound so far as their
+       window, one task per move so fast and slow moves balance out across the workers.
+       Only as many tasks as there are workers are queued at a time, so a move whose
+       search starts later gets the bound tightened by the moves finished before it.
+Each process keeps its own transposition table between the tasks of one search and
+clears it when the next search starts, with any number of workers; a single worker
+searches the root in one process, with its table cleared the same way.
+
+The mode is for measuring multi-core scaling (benchmark_scaling); game_play.computer_move
+does not use it, since a pool of processes per game costs more than the speedup gains at
+the game's time budgets.
+
+Classes:
+    - ParallelSearch: A pool of worker processes that searches root moves in parallel.
+
+Functions:
+    - benchmark_scaling: Times the same search with 1, 2, 4, 8 and 16 workers.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import game_ai
+import game_bitboard
+import game_symmetry
+import game_tt
+
+# Transposition table of the current process, kept between the tasks of one search,
+# and the search it belongs to
+_worker_tt = None
+_worker_search_id = None
+
+# Numbers the searches started from this process, so workers know when a new one starts
+_search_ids = itertools.count(1)
+
+def _search_tt(search_id):
+    """The transposition table of this process, cleared if it was used by another search."""
+    global _worker_tt, _worker_search_id
+    if _worker_tt is None:
+        _worker_tt = game_tt.TranspositionTable()
+    if search_id != _worker_search_id:
+        _worker_tt.clear()
+        _worker_search_id = search_id
+    return _worker_tt
+
+
+def _search_move(board, player, cell, depth, alpha, beta, search_id):
+    """
+    Search one root move. Runs in a worker process (or inline for the eldest brother).
+
+    Args:
+        board (list): The root position.
+        player (int): The side to move at the root.
+        cell (int): The root move to search.
+        depth (int): Depth of the root search; the move is searched depth - 1 deeper.
+        alpha (float): Alpha value for the root.
+        beta (float): Beta value for the root.
+        search_id (int): The root search the move belongs to.
+
+    Returns:
+        tuple: (cell, value of the position after the move, nodes searched).
+               Win scores are counted from the root, like a search of the root would.
+    """
+    z, x, y = game_bitboard.cell_to_move(cell)
+    board[z][x][y] = player
+    search = game_ai.Search(board, _search_tt(search_id))
+    value, _ = search.run(-player, depth - 1, _shift_win(alpha, -1), _shift_win(beta, -1))
+    return cell, _shift_win(value, 1), search.nodes
+
+
+class ParallelSearch:
+    """
+    A pool of worker processes that searches root moves in parallel.
+
+    Attributes:
+        workers (int): Number of worker processes. 1 means a plain single-process search.
+        nodes (int): Nodes searched by the last call to search, over all processes.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Start the worker processes.
+
+        Args:
+            workers (int): Number of worker processes. Defaults to the number of CPU cores.
+        """
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self.nodes = 0
+
+    def search(self, player, board, depth):
+        """
+        Find the best move with the root moves split across the workers.
+
+        Args:
+            player (int): 1 for the MAX player, -1 for the MIN player.
+            board (list): The current state of the game board.
+            depth (int): Depth to search for the alpha-beta pruning.
+
+        Returns:
+            tuple: Best value calculated by the algorithm and the best move as (z, x, y).
+        """
+        search_id = next(_search_ids)
+        root = game_ai.Search(board, _search_tt(search_id))
+        if self._pool is None or depth < 2:
+            value, cell = root.run(player, depth, float('-inf'), float('inf'))
+            self.nodes = root.nodes
+            return value, game_bitboard.cell_to_move(cell) if cell is not None else None
+
+        xs, os_ = root.xs, root.os
+        if game_bitboard.check_win(xs) or game_bitboard.check_win(os_):
+            self.nodes = 1
+            return game_bitboard.evaluate(xs, os_), None
+        moves = root.orderer.order(player, xs, os_, 0)
+        moves = game_symmetry.unique_moves(moves, game_symmetry.stabilizer(xs, os_, root.symmetry_group))
+        if not moves:
+            self.nodes = 1
+            return game_bitboard.evaluate(xs, os_), None
+
+        # Eldest brother first, to get a bound for the others
+        best_cell, best_value, self.nodes = _search_move(_copy(board), player, moves[0], depth,
+                                                         float('-inf'), float('inf'), search_id)
+
+        # Younger brothers in parallel. Each is submitted with the best value so far as its
+        # bound, and a value no better than that bound is only a bound itself, so ties keep
+        # the earlier move in search order.
+        results = {moves[0]: best_value}
+        waiting = list(reversed(moves[1:]))
+        running = set()
+        while waiting or running:
+            while waiting and len(running) < self.workers:
+                alpha, beta = (best_value, float('inf')) if player == 1 else (float('-inf'), best_value)
+                running.add(self._pool.submit(_search_move, board, player, waiting.pop(), depth, alpha, beta,
+                                              search_id))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell, value, nodes = future.result()
+                results[cell] = value
+                self.nodes += nodes
+                if (value > best_value) if player == 1 else (value < best_value):
+                    best_value = value
+        best_cell = next(cell for cell in moves if results[cell] == best_value)
+        return best_value, game_bitboard.cell_to_move(best_cell)
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def _copy(board):
+    """Copy a 3D list board."""
+    return [[row[:] for row in layer] for layer in board]
+
+
+def _shift_win(value, plies):
+    """Move a win score the given number of plies further from the root (heuristic scores are kept)."""
+    if not game_ai.is_win_score(value) or abs(value) == float('inf'):
+        return value
+    return value - plies if value > 0 else value + plies
+
+
+def benchmark_scaling(board, depth, worker_counts=(1, 2, 4, 8, 16), player=-1):
+    """
+    Time the same search with different numbers of workers.
+    Pool start-up is not counted. Every run starts with empty transposition tables, and
+    uses one per process whatever the number of workers.
+
+    Args:
+        board (list): The position to search.
+        depth (int): Depth of the search.
+        worker_counts (tuple): Numbers of workers to try. The first one is the baseline.
+        player (int): The side to move.
+
+    Returns:
+        list: One dict per worker count with workers, seconds, nodes, move and speedup.
+    """
+    results = []
+    for workers in worker_counts:
+        searcher = ParallelSearch(workers)
+        try:
+            if searcher._pool is not None:
+                # Start every worker process before timing
+                list(searcher._pool.map(abs, range(workers)))
+            start = time.perf_counter()
+            value, move = searcher.search(player, _copy(board), depth)
+            seconds = time.perf_counter() - start
+        finally:
+            searcher.close()
+        results.append({
+            "workers": workers,
+            "seconds": seconds,
+            "nodes": searcher.nodes,
+            "value": value,
+            "move": move,
+            "speedup": results[0]["seconds"] / seconds if results else 1.0,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the speedup of the parallel root search.")
+    parser.add_argument("--depth", type=int, default=4, help="search depth (default: 4)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="worker counts to try (default: 1 2 4 8 16)")
+    args = parser.parse_args()
+
+    # A midgame position with few symmetries, so every root move has to be searched
+    position = game_bitboard.to_board(
+        sum(1 << cell for cell in (0, 21, 5, 60, 38)),
+        sum(1 << cell for cell in (62, 22, 12, 45)),
+    )
+    print("%d cores available" % (os.cpu_count() or 1))
+    for row in benchmark_scaling(position, args.depth, tuple(args.workers)):
+        print("%2d workers: %7.3fs  %8d nodes  speedup %.2fx  move %s" % (
+            row["workers"], row["seconds"], row["nodes"], row["speedup"], row["move"]))
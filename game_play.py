@@ -7,7 +7,43 @@ of the player and the computer opponent using a loop until a win condition
 is met or the game ends in a tie.
 """
 
+import time
+
 import game_ai
+import game_bitboard
+import game_book
+import game_cache
+import game_evaluator
+import game_pns
+import game_threats
+import game_tt
+
+# Wall-clock budget in milliseconds for each difficulty (its depth is the deepest iteration).
+# The AI searches as deep as it can within the budget, so move latency stays predictable.
+TIME_BUDGETS = {
+    2: 500,   # Easy
+    4: 2000,  # Difficult
+    6: 5000,  # Insane
+}
+
+# With this many empty cells or fewer, the endgame solver (see game_pns.py) tries to find
+# an exact result first, with half the time budget. It falls back to the search if it runs
+# out of time or the position is lost.
+SOLVER_EMPTY_CELLS = 20
+
+# Opening book (see game_book.py), opened on first use; False if there is no usable book file.
+# A book move is only played at difficulties up to the depth it was searched to.
+BOOK_PATH = game_book.DEFAULT_PATH
+_book = None
+
+# Root search results kept across games (see game_cache.py), memory only by default.
+# For a cache that survives restarts and is shared between processes, replace it, e.g.
+# game_play.position_cache = game_cache.PositionCache(path="positions.db").
+position_cache = game_cache.PositionCache()
+
+# Transposition table kept between moves, so each search reuses the work of the previous ones.
+# Its hit/miss counters are available through transposition_table.stats().
+transposition_table = game_tt.TranspositionTable()
 
 def is_valid_move(board, move):
     """
@@ -40,17 +76,124 @@ def make_move(board, move, player):
     board[level][row][col] = player
     return board
 
-def computer_move(board, difficulty):
+def computer_move(board, difficulty, time_budget_ms=None, stop_event=None, trace=None, tt=None, player=-1,
+                  evaluator_class=game_evaluator.Evaluator, algorithm=None, book=True, threats=True, solver=True,
+                  cache=True):
     """
     Determine the computer's move based on the current board state and difficulty.
-    This implementation uses the Minimax algorithm with alpha-beta pruning.
+    This implementation uses the Minimax algorithm with alpha-beta pruning,
+    deepened one ply at a time until the difficulty's time budget runs out.
+    Positions in the opening book are answered from the book without searching.
+    Then a threat-space search runs (see game_threats.py): a forced win is played
+    without searching, and if the player has one, the move is one that stops it.
+    With SOLVER_EMPTY_CELLS empty cells or fewer, a won or drawn position is solved
+    exactly (see game_pns.py) and the move that keeps the result is played.
+    Search results are kept in position_cache, so a position seen before is not searched again.
+    The keyword arguments after tt switch these stages off one by one, e.g. for
+    game_tournament.py, which also plays the player's side with them.
     
     Args:
         board (list): The 3D game board.
-        difficulty (int): The depth for the alpha-beta pruning.
+        difficulty (int): The maximum depth for the alpha-beta pruning.
+        time_budget_ms (float): Time budget in milliseconds for the whole move, threat search
+                                included. Defaults to TIME_BUDGETS[difficulty].
+        stop_event (threading.Event): Optional event that cancels the search when set.
+        trace (SearchTrace): Optional trace to collect search statistics in (see game_trace.py).
+        tt (TranspositionTable): The table to search with. Defaults to transposition_table.
+        player (int): The side to move, -1 (the computer) or 1.
+        evaluator_class (type): The evaluator to score leaves with (see game_evaluator.EVALUATORS).
+        algorithm (str): A name from game_ai.ALGORITHMS. Defaults to game_ai.ENGINE_ALGORITHM.
+        book (bool): Answer from the opening book when it has the position.
+        threats (bool): Run the threat-space search first.
+        solver (bool): Try to solve positions with SOLVER_EMPTY_CELLS empty cells or fewer.
+        cache (bool): Look up and store the result in position_cache. Its results do not
+                      record the evaluator they were found with.
 
     Returns:
         tuple: The chosen move for the computer as (level, row, col).
     """
-    _, move = game_ai.alpha_beta(-1, difficulty, float('-inf'), float('inf'), board)
+    # Every stage below runs on the same clock
+    start = time.perf_counter()
+    if time_budget_ms is None:
+        time_budget_ms = TIME_BUDGETS.get(difficulty)
+    deadline = start + time_budget_ms / 1000 if time_budget_ms is not None else None
+
+    xs, os = game_bitboard.from_board(board)
+    own, other = (xs, os) if player == 1 else (os, xs)
+    opened = opening_book() if book else None
+    if opened is not None:
+        entry = opened.lookup(xs, os, player)
+        if entry is not None and difficulty <= entry[1]:
+            return game_bitboard.cell_to_move(entry[0])
+
+    game_over = game_bitboard.check_win(xs) or game_bitboard.check_win(os)
+    safe = None
+    if threats and not game_over:
+        line = game_threats.find_win(own, other, deadline=deadline, stop_event=stop_event)
+        if line is not None:
+            return game_bitboard.cell_to_move(line[0])
+        safe = game_threats.defenses(own, other, deadline=deadline, stop_event=stop_event)
+        if safe is not None and len(safe) == 1:
+            return game_bitboard.cell_to_move(safe[0])
+
+    # Few empty cells left: try to solve the position exactly, in half of the time left
+    empty_cells = game_bitboard.CELLS - (xs | os).bit_count()
+    if solver and not game_over and 0 < empty_cells <= SOLVER_EMPTY_CELLS:
+        remaining_ms = _remaining_ms(deadline)
+        solved = game_pns.solve(player, board, time_budget_ms=remaining_ms / 2 if remaining_ms is not None else None,
+                                stop_event=stop_event)
+        if solved is not None and solved[0] != game_pns.LOSS:
+            return solved[1]
+
+    # A search at least as deep may have been done already, in this game or an earlier one
+    cached = position_cache.lookup(xs, os, player, min(difficulty, empty_cells)) if cache and not game_over else None
+    if cached is not None:
+        value, move = cached[1], game_bitboard.cell_to_move(cached[2])
+    else:
+        pvs, aspiration_window = game_ai.ALGORITHMS[algorithm or game_ai.ENGINE_ALGORITHM]
+        value, move, completed = game_ai.iterative_deepening(player, board, _remaining_ms(deadline), difficulty,
+                                                             tt if tt is not None else transposition_table,
+                                                             stop_event, trace, evaluator_class=evaluator_class,
+                                                             pvs=pvs, aspiration_window=aspiration_window)
+        if cache and move is not None and completed > 0:
+            position_cache.store(xs, os, player, completed, value, game_bitboard.cell_index(*move))
+
+    # The search cannot see far enough to stop the opponent's forced win: pick the best stopping move instead,
+    # unless the search found a forced win for the side to move, which comes first
+    own_wins = move is not None and game_ai.is_win_score(value) and value * player > 0
+    if safe and move is not None and not own_wins and game_bitboard.cell_index(*move) not in safe:
+        cell = max(safe, key=lambda cell: player * game_bitboard.evaluate(*_after(xs, os, player, cell)))
+        move = game_bitboard.cell_to_move(cell)
     return move
+
+def _after(xs, os, player, cell):
+    """The masks after the player takes a cell."""
+    return (xs | 1 << cell, os) if player == 1 else (xs, os | 1 << cell)
+
+def _remaining_ms(deadline):
+    """Milliseconds left until a time.perf_counter() deadline (at least 0), or None without one."""
+    if deadline is None:
+        return None
+    return max(0, (deadline - time.perf_counter()) * 1000)
+
+def opening_book():
+    """
+    Open the opening book at BOOK_PATH the first time it is needed.
+
+    Returns:
+        OpeningBook: The book, or None if there is no book file or it cannot be read.
+    """
+    global _book
+    if _book is None:
+        try:
+            _book = game_book.OpeningBook(BOOK_PATH)
+        except (OSError, ValueError):
+            _book = False
+    return _book or None
+
+def reset_search():
+    """
+    Forget the search results of the previous game, e.g. when the board is reset
+    or a different difficulty is chosen.
+    """
+    transposition_table.clear()
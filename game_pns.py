@@ -0,0 +1,244 @@
+"""
+game_pns.py
+
+This file implements an exact endgame solver based on depth-first proof-number search
+(df-pn). Where game_ai.Search stops at a fixed depth and returns a heuristic score,
+this search only stops at won, lost or drawn positions, so its answer is exact. It grows
+the tree towards the moves that look easiest to prove or disprove, which needs far
+fewer nodes than a full-width search to the end of the game.
+
+Proof-number search answers yes/no questions, so a position is solved in two steps:
+    1. Can the side to move force a win?
+    2. If not, can it at least force a draw?
+
+Each node keeps two numbers, from the point of view of the side to move there:
+    - phi: an estimate of how many leaves must be proven to show it reaches its goal,
+    - delta: the same for showing it does not.
+A node's phi is the smallest delta of its children and its delta is the sum of their
+phis. Open threes cut the tree down: a side with a winning cell has won, a side facing
+two open threes has lost, and a side facing one has to block it.
+
+The (phi, delta) pairs live in a table of at most max_entries positions. When it fills
+up, unsolved entries are dropped, since they can be searched again, and solved ones kept.
+
+Classes:
+    - ProofNumberSearch: The df-pn search and its table.
+    - SolverLimit: Raised when a search runs out of nodes or time.
+
+Functions:
+    - solve: Solves a 3D list board for one side.
+"""
+
+import time
+
+import game_bitboard
+import game_ordering
+
+INF = 10 ** 9  # "Infinite" proof number: the node is solved the other way
+MAX_NODES = 500000  # Default node budget per solve
+MAX_ENTRIES = 1 << 20  # Default table size, in positions
+TIME_CHECK_INTERVAL = 1024  # Nodes between two looks at the clock
+
+# Results of solve, for the side to move
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# Goals of the attacker in one proof
+_GOAL_WIN = "win"
+_GOAL_NOT_LOSE = "not lose"
+
+class SolverLimit(Exception):
+    """Raised inside a search when it has used up its nodes or its time."""
+
+
+class ProofNumberSearch:
+    """
+    Depth-first proof-number search on bitboards.
+
+    Attributes:
+        max_nodes (int): Nodes a call to solve may visit, or None for no limit.
+        max_entries (int): Positions the table may hold before unsolved ones are dropped.
+        deadline (float): time.perf_counter() value after which the search stops, or None.
+        stop_event (threading.Event): Optional event; setting it stops the search.
+        nodes (int): Nodes visited so far.
+        table (dict): (phi, delta) per position, keyed by (mover's mask, other mask).
+    """
+
+    def __init__(self, max_nodes=MAX_NODES, max_entries=MAX_ENTRIES, deadline=None, stop_event=None):
+        """
+        Set up a solver.
+
+        Args:
+            max_nodes (int): Nodes a call to solve may visit, or None for no limit.
+            max_entries (int): Positions the table may hold.
+            deadline (float): time.perf_counter() value after which the search stops.
+            stop_event (threading.Event): Optional event that stops the search when set.
+        """
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.deadline = deadline
+        self.stop_event = stop_event
+        self.nodes = 0
+        self.table = {}
+        self._goal = None
+
+    def solve(self, own, other):
+        """
+        Solve a position that nobody has won yet.
+
+        Args:
+            own (int): Mask of the cells held by the side to move.
+            other (int): Mask of the cells held by the other side.
+
+        Returns:
+            tuple: (WIN, DRAW or LOSS for the side to move, the move that reaches it as a
+                   bit index). The move is None for a LOSS or on a full board.
+
+        Raises:
+            SolverLimit: If the node budget, the deadline or the stop event cut the search short.
+        """
+        self.nodes = 0
+        empty = ~(own | other) & game_bitboard.FULL
+        wins = game_bitboard.threat_cells(own, other) & empty
+        if wins:
+            return WIN, (wins & -wins).bit_length() - 1
+        if self._prove(own, other, _GOAL_WIN):
+            return WIN, self._proving_move(own, other)
+        if self._prove(own, other, _GOAL_NOT_LOSE):
+            return DRAW, self._proving_move(own, other)
+        return LOSS, None
+
+    def _prove(self, own, other, goal):
+        """Run df-pn from the root until it is solved. True if the goal is proven."""
+        if goal != self._goal:
+            self.table.clear()  # The numbers belong to one goal
+            self._goal = goal
+        self._mid(own, other, True, INF - 1, INF - 1)
+        return self.table[(own, other)][0] == 0
+
+    def _proving_move(self, own, other):
+        """The root move whose child was disproven for the opponent, or None."""
+        children = self._children(own, other)
+        for cell in children or ():
+            if self.table.get((other, own | 1 << cell), (1, 1))[1] == 0:
+                return cell
+        return None
+
+    def _children(self, own, other):
+        """
+        List the moves worth searching from a position.
+
+        Returns:
+            list: The moves, or None if the position is decided: the mover has a winning
+                  cell, faces two open threes, or the board is full.
+        """
+        empty = ~(own | other) & game_bitboard.FULL
+        if not empty or game_bitboard.threat_cells(own, other) & empty:
+            return None
+        blocks = game_bitboard.threat_cells(other, own) & empty
+        if blocks:
+            if blocks & (blocks - 1):
+                return None
+            return [blocks.bit_length() - 1]
+        return [cell for cell in game_ordering.STATIC_ORDER if empty >> cell & 1]
+
+    def _terminal(self, own, other, attacker):
+        """(phi, delta) of a decided position, for the mover's goal."""
+        empty = ~(own | other) & game_bitboard.FULL
+        if empty and game_bitboard.threat_cells(own, other) & empty:
+            return 0, INF  # The mover wins, which meets either side's goal
+        if empty:
+            return INF, 0  # Two open threes against the mover: it loses
+        # Full board: a draw is good enough for an attacker playing not to lose,
+        # and for a defender when the attacker plays to win
+        draw_proves = (self._goal == _GOAL_NOT_LOSE) == attacker
+        return (0, INF) if draw_proves else (INF, 0)
+
+    def _mid(self, own, other, attacker, phi_threshold, delta_threshold):
+        """
+        Search a node until its phi or delta reaches its threshold.
+
+        Args:
+            own (int): Mask of the mover's cells.
+            other (int): Mask of the other side's cells.
+            attacker (bool): Whether the mover is the side the proof is about.
+            phi_threshold (int): Stop once phi reaches this.
+            delta_threshold (int): Stop once delta reaches this.
+        """
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        table = self.table
+        key = (own, other)
+        children = self._children(own, other)
+        if children is None:
+            table[key] = self._terminal(own, other, attacker)
+            return
+        child_keys = [(other, own | 1 << cell) for cell in children]
+
+        while True:
+            # phi is the smallest child delta, delta the sum of the child phis
+            delta = 0
+            best, best_delta, second_delta = None, INF, INF
+            for child_key in child_keys:
+                child_phi, child_delta = table.get(child_key, (1, 1))
+                delta += child_phi
+                if child_delta < best_delta:
+                    best, second_delta, best_delta = child_key, best_delta, child_delta
+                elif child_delta < second_delta:
+                    second_delta = child_delta
+            phi = best_delta
+            delta = min(delta, INF)
+            if phi >= phi_threshold or delta >= delta_threshold:
+                table[key] = (phi, delta)
+                if len(table) > self.max_entries:
+                    self._shrink()
+                return
+
+            best_phi = table.get(best, (1, 1))[0]
+            self._mid(best[0], best[1], not attacker,
+                      min(delta_threshold - delta + best_phi, INF - 1),
+                      min(phi_threshold, second_delta + 1))
+
+    def _check_limits(self):
+        """Raise SolverLimit if the nodes or the time have run out."""
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SolverLimit()
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SolverLimit()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SolverLimit()
+
+    def _shrink(self):
+        """Drop the unsolved entries, or everything if solved ones alone fill half the table."""
+        solved = {key: value for key, value in self.table.items() if 0 in value}
+        self.table = solved if len(solved) <= self.max_entries // 2 else {}
+
+
+def solve(player, board, max_nodes=MAX_NODES, time_budget_ms=None, stop_event=None):
+    """
+    Solve a position exactly for one side.
+
+    Args:
+        player (int): The side to move, 1 or -1.
+        board (list): The current state of the game board. Nobody may have won yet.
+        max_nodes (int): Nodes to visit before giving up, or None for no limit.
+        time_budget_ms (float): Time to spend before giving up, in milliseconds, or None.
+        stop_event (threading.Event): Optional event that stops the search when set.
+
+    Returns:
+        tuple: (WIN, DRAW or LOSS for the player, move as (z, x, y) or None, nodes visited),
+               or None if the search gave up before solving the position.
+    """
+    xs, os = game_bitboard.from_board(board)
+    own, other = (xs, os) if player == 1 else (os, xs)
+    deadline = time.perf_counter() + time_budget_ms / 1000 if time_budget_ms is not None else None
+    solver = ProofNumberSearch(max_nodes, deadline=deadline, stop_event=stop_event)
+    try:
+        result, cell = solver.solve(own, other)
+    except SolverLimit:
+        return None
+    move = game_bitboard.cell_to_move(cell) if cell is not None else None
+    return result, move, solver.nodes
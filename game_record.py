@@ -0,0 +1,147 @@
+"""
+game_record.py
+
+This file defines a compact format for recording games, so played games can be kept
+and analysed afterwards (see game_analysis.py).
+
+A record file is a header followed by records, appended one after the other:
+    header: magic b"TTTG", format version (uint16)
+    record: difficulty (uint8, 0 if unknown), result (int8), number of moves (uint8),
+            then one byte per move: the cell played (0 to 63, see game_bitboard),
+            the player's (X, 1) first
+A game of n moves takes 3 + n bytes. Results are X_WON (1), O_WON (-1), DRAW (0) and
+UNFINISHED (2), for a game abandoned before its end.
+
+The writer only ever appends, and writes each record with a single write, so a file can
+be shared by several processes. If a writer dies halfway through a record, the reader
+stops at the cut-off record.
+
+Classes:
+    - GameRecordWriter: Appends games to a record file.
+
+Functions:
+    - read_games: Reads the games of a record file one at a time.
+"""
+
+import os
+import struct
+
+import game_bitboard
+
+MAGIC = b"TTTG"
+VERSION = 1
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<BbB")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.rec")
+READ_BUFFER = 1 << 20  # Bytes read from the file at a time
+
+# Results, from X's (the player's) point of view
+X_WON = 1
+O_WON = -1
+DRAW = 0
+UNFINISHED = 2
+RESULTS = (X_WON, O_WON, DRAW, UNFINISHED)
+
+def _check_header(data, path):
+    """Raise ValueError unless data is the header of a record file of this version."""
+    if len(data) < HEADER.size or HEADER.unpack_from(data) != (MAGIC, VERSION):
+        raise ValueError("%s is not a version %d game record file" % (path, VERSION))
+
+
+class GameRecordWriter:
+    """
+    Appends games to a record file, creating it if needed.
+
+    Attributes:
+        path (str): The record file.
+        games (int): Games written by this writer.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Open a record file for appending.
+
+        Args:
+            path (str): The record file.
+
+        Raises:
+            OSError: If the file cannot be opened.
+            ValueError: If the file exists but is not a record file of this version.
+        """
+        self.path = path
+        self.games = 0
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION))
+            self._file.flush()
+        else:
+            with open(path, "rb") as file:
+                header = file.read(HEADER.size)
+            try:
+                _check_header(header, path)
+            except ValueError:
+                self._file.close()
+                raise
+
+    def write(self, moves, difficulty=0, result=UNFINISHED):
+        """
+        Append one game.
+
+        Args:
+            moves (list): The cells played, X first.
+            difficulty (int): The computer's difficulty (0 to 255), or 0 if unknown.
+            result (int): X_WON, O_WON, DRAW or UNFINISHED.
+
+        Raises:
+            ValueError: If the game cannot be recorded in this format.
+        """
+        if len(moves) > game_bitboard.CELLS or not all(0 <= cell < game_bitboard.CELLS for cell in moves):
+            raise ValueError("moves must be at most %d cells from 0 to %d" % (game_bitboard.CELLS, game_bitboard.CELLS - 1))
+        if result not in RESULTS:
+            raise ValueError("unknown result %r" % result)
+        self._file.write(RECORD.pack(difficulty, result, len(moves)) + bytes(moves))
+        self._file.flush()
+        self.games += 1
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self):
+        """Use the writer in a with statement, which closes it."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the file at the end of the with statement."""
+        self.close()
+
+
+def read_games(path):
+    """
+    Read the games of a record file one at a time, so files of any size can be read
+    in constant memory.
+
+    Args:
+        path (str): The record file.
+
+    Yields:
+        tuple: (difficulty, result, moves) for each game, where moves is a bytes object
+               of cells, X first.
+
+    Raises:
+        ValueError: If the file is not a record file of this version or a record is corrupt.
+    """
+    with open(path, "rb", buffering=READ_BUFFER) as file:
+        _check_header(file.read(HEADER.size), path)
+        while True:
+            offset = file.tell()
+            head = file.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return  # End of file, or a record cut short
+            difficulty, result, count = RECORD.unpack(head)
+            if result not in RESULTS or count > game_bitboard.CELLS:
+                raise ValueError("%s: corrupt record at byte %d" % (path, offset))
+            moves = file.read(count)
+            if len(moves) < count:
+                return
+            yield difficulty, result, moves
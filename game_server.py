@@ -0,0 +1,457 @@
+"""
+game_server.py
+
+This file serves the computer's moves over a local socket, so many players can share
+the engine without a pygame window. Clients send a position and get back the move
+game_play.computer_move picks for it.
+
+Protocol: one JSON object per line, in both directions. A request has:
+    - session (str): Optional. Requests of the same game should share a session, so its
+      search state is kept between moves.
+    - moves (list): The cells played so far (0 to 63, see game_bitboard), the player's first;
+      or board (list): the 4x4x4 3D list board. It must be the computer's (-1) turn.
+    - difficulty (int): The deepest iteration of the search (default 4).
+    - time_ms (float): Time budget, at most the server's max_time_ms. Defaults to the
+      difficulty's budget in game_play.TIME_BUDGETS.
+    - op (str): "move" (default), or "end" to drop the session's state once a game is over.
+    - id: Optional, echoed in the reply.
+The reply is {"id", "move": [level, row, col], "cell": bit index, "ms": search time} or
+{"id", "error": message}. The error "busy" means the server is at capacity: retry later.
+
+Searches run on a fixed pool of worker processes. Each session is pinned to one worker,
+which keeps the session's transposition table between its moves. The table holds the
+best move of every position searched, the previous principal variation included, so
+the next search of the game starts from it.
+
+Backpressure:
+    - A connection has one request in flight at a time: the next line is read once the
+      reply is written, so a client that sends faster than it is served is held back by
+      TCP flow control.
+    - At most max_pending searches are queued or running. Beyond that, requests are
+      answered "busy" at once instead of piling up.
+    - Each search gets at most max_time_ms. A reply that has not come back TIMEOUT_GRACE_MS
+      later is answered "timeout".
+
+The load test plays random games against a server with a number of concurrent clients,
+each in its own session, and reports latency percentiles and moves per second.
+
+Example:
+    python game_server.py serve --workers 4 --port 8765
+    python game_server.py load --port 8765 --concurrency 1 4 16 --moves 200
+
+Classes:
+    - MoveServer: The asyncio server and its worker pool.
+
+Functions:
+    - parse_position: Reads the board out of a request.
+    - load_test: Plays games against a server and measures it.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import game_bitboard
+import game_play
+import game_tt
+
+DEFAULT_PORT = 8765
+DEFAULT_DIFFICULTY = 4
+MAX_DIFFICULTY = 8
+MAX_TIME_MS = 5000          # Longest search a request may ask for
+TIMEOUT_GRACE_MS = 1000     # Time on top of a search's budget before it is answered "timeout"
+PENDING_PER_WORKER = 4      # Default max_pending is this times the number of workers
+SESSIONS_PER_WORKER = 64    # Session tables a worker keeps before dropping the least recently used
+SESSION_TT_SIZE = 1 << 16   # Entries of a session's transposition table
+
+# Search state of the current worker process: session -> TranspositionTable, least recently used first
+_worker_sessions = None
+
+def _worker_move(session, board, difficulty, time_ms):
+    """
+    Search the computer's move for a session. Runs in a worker process.
+
+    Returns:
+        tuple: (move as (level, row, col) or None, search time in milliseconds).
+    """
+    global _worker_sessions
+    if _worker_sessions is None:
+        _worker_sessions = OrderedDict()
+    if session is not None:
+        tt = _worker_sessions.pop(session, None)
+        if tt is None:
+            tt = game_tt.TranspositionTable(SESSION_TT_SIZE)
+            if len(_worker_sessions) >= SESSIONS_PER_WORKER:
+                _worker_sessions.popitem(last=False)
+        _worker_sessions[session] = tt
+    else:
+        tt = game_tt.TranspositionTable(SESSION_TT_SIZE)
+
+    start = time.perf_counter()
+    move = game_play.computer_move(board, difficulty, time_ms, tt=tt)
+    return move, (time.perf_counter() - start) * 1000
+
+
+def _worker_end(session):
+    """Drop a session's search state. Runs in a worker process."""
+    if _worker_sessions is not None:
+        _worker_sessions.pop(session, None)
+
+
+def _is_board(board):
+    """Check that a decoded JSON value is a 4x4x4 list of -1, 0 and 1."""
+    size = game_bitboard.SIZE
+
+    def is_list(value):
+        return isinstance(value, list) and len(value) == size
+
+    return is_list(board) and all(
+        is_list(layer) and all(
+            is_list(row) and all(type(cell) is int and cell in (-1, 0, 1) for cell in row)
+            for row in layer)
+        for layer in board)
+
+
+def parse_position(request):
+    """
+    Read the position out of a request.
+
+    Args:
+        request (dict): The request, with either moves or board.
+
+    Returns:
+        list: The 3D list board, with the computer (-1) to move.
+
+    Raises:
+        ValueError: If the position is malformed, not the computer's turn, or already won.
+    """
+    if "moves" in request:
+        moves = request["moves"]
+        if not isinstance(moves, list) or not all(type(cell) is int and 0 <= cell < game_bitboard.CELLS
+                                                  for cell in moves):
+            raise ValueError("moves must be a list of cells from 0 to %d" % (game_bitboard.CELLS - 1))
+        if len(set(moves)) != len(moves):
+            raise ValueError("moves repeat a cell")
+        xs = sum(1 << cell for cell in moves[0::2])
+        os = sum(1 << cell for cell in moves[1::2])
+    elif "board" in request:
+        board = request["board"]
+        if not _is_board(board):
+            raise ValueError("board must be a 4x4x4 list of -1, 0 and 1")
+        xs, os = game_bitboard.from_board(board)
+    else:
+        raise ValueError("a move request needs moves or board")
+
+    if xs.bit_count() != os.bit_count() + 1:
+        raise ValueError("it is not the computer's turn")
+    if game_bitboard.check_win(xs) or game_bitboard.check_win(os):
+        raise ValueError("the game is already won")
+    return game_bitboard.to_board(xs, os)
+
+
+class MoveServer:
+    """
+    Serves computer moves to JSON-lines clients from a pool of worker processes.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        max_pending (int): Searches that may be queued or running at once.
+        max_time_ms (float): Longest search a request may ask for.
+        pending (int): Searches queued or running.
+        served (int): Moves returned.
+        rejected (int): Requests answered "busy".
+    """
+
+    def __init__(self, workers=None, max_pending=None, max_time_ms=MAX_TIME_MS):
+        """
+        Start the worker processes.
+
+        Args:
+            workers (int): Number of worker processes. Defaults to the number of CPU cores.
+            max_pending (int): Searches queued or running before requests are turned away.
+                               Defaults to PENDING_PER_WORKER per worker.
+            max_time_ms (float): Longest search a request may ask for.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or PENDING_PER_WORKER * self.workers
+        self.max_time_ms = max_time_ms
+        # One single-process executor per worker, so a session always lands on the process holding its table.
+        # Workers are started from a fork server where available: a plain fork would copy the open client
+        # sockets into the worker, and a connection would stay open after the server closed it.
+        context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None)
+        self._executors = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(self.workers)]
+        self._load = [0] * self.workers
+        self._assignments = OrderedDict()  # session -> worker index, least recently used first
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """
+        Start listening.
+
+        Args:
+            host (str): Address to listen on.
+            port (int): Port to listen on, or 0 for any free port.
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        # Start the workers now, so the first requests do not wait for them
+        await asyncio.gather(*(asyncio.wrap_future(executor.submit(int)) for executor in self._executors))
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self):
+        """Stop the worker processes."""
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _worker_for(self, session):
+        """Index of the worker of a session. New sessions go to the least loaded worker."""
+        index = self._assignments.pop(session, None) if session is not None else None
+        if index is None:
+            index = min(range(self.workers), key=self._load.__getitem__)
+        if session is not None:
+            self._assignments[session] = index
+            if len(self._assignments) > SESSIONS_PER_WORKER * self.workers:
+                self._assignments.popitem(last=False)
+        return index
+
+    async def _handle(self, reader, writer):
+        """Serve the requests of one connection, one at a time."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request must be a JSON object")
+                    reply = await self._serve(request)
+                except ValueError as error:
+                    reply = {"error": str(error)}
+                reply["id"] = request.get("id") if isinstance(request, dict) else None
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass  # The client went away, or sent a line longer than the stream limit
+        finally:
+            writer.close()
+
+    async def _serve(self, request):
+        """
+        Answer one request.
+
+        Returns:
+            dict: The reply, without its id.
+
+        Raises:
+            ValueError: If the request is malformed.
+        """
+        session = request.get("session")
+        session = str(session) if session is not None else None
+        op = request.get("op", "move")
+        if op == "end":
+            index = self._assignments.pop(session, None)
+            if index is not None:
+                self._executors[index].submit(_worker_end, session)
+            return {"ended": index is not None}
+        if op != "move":
+            raise ValueError("unknown op %r" % op)
+
+        board = parse_position(request)
+        difficulty = request.get("difficulty", DEFAULT_DIFFICULTY)
+        if type(difficulty) is not int or not 1 <= difficulty <= MAX_DIFFICULTY:
+            raise ValueError("difficulty must be an integer from 1 to %d" % MAX_DIFFICULTY)
+        time_ms = request.get("time_ms", game_play.TIME_BUDGETS.get(difficulty, self.max_time_ms))
+        if type(time_ms) not in (int, float) or not 0 < time_ms < float('inf'):
+            raise ValueError("time_ms must be a positive number")
+        time_ms = min(time_ms, self.max_time_ms)
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return {"error": "busy"}
+        index = self._worker_for(session)
+        self.pending += 1
+        self._load[index] += 1
+        job = asyncio.wrap_future(self._executors[index].submit(_worker_move, session, board, difficulty, time_ms))
+        job.add_done_callback(lambda _: self._finished(index))
+        try:
+            # Shielded: on timeout the search keeps its worker until its own budget runs out
+            move, search_ms = await asyncio.wait_for(asyncio.shield(job), (time_ms + TIMEOUT_GRACE_MS) / 1000)
+        except asyncio.TimeoutError:
+            return {"error": "timeout"}
+        self.served += 1
+        if move is None:
+            return {"move": None, "cell": None, "ms": round(search_ms, 2)}
+        return {"move": list(move), "cell": game_bitboard.cell_index(*move), "ms": round(search_ms, 2)}
+
+    def _finished(self, index):
+        """Count a search as done once its worker has returned it."""
+        self.pending -= 1
+        self._load[index] -= 1
+
+
+def _percentile(values, fraction):
+    """The nearest-rank percentile of a list of numbers (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+async def _load_client(host, port, number, difficulty, time_ms, remaining, latencies, errors, rng):
+    """One load-test client: plays random games in its own session until no moves remain."""
+    reader, writer = await asyncio.open_connection(host, port)
+    game_number = 0
+    try:
+        while remaining[0] > 0:
+            session = "load-%d-%d" % (number, game_number)
+            game_number += 1
+            moves, xs, os = [], 0, 0
+            while remaining[0] > 0:
+                # The player's move: a random empty cell
+                empty = [cell for cell in range(game_bitboard.CELLS) if not (xs | os) >> cell & 1]
+                cell = rng.choice(empty)
+                moves.append(cell)
+                xs |= 1 << cell
+                if game_bitboard.is_winning_move(xs, cell) or len(moves) == game_bitboard.CELLS:
+                    break
+
+                remaining[0] -= 1
+                request = {"session": session, "moves": moves, "difficulty": difficulty, "time_ms": time_ms}
+                while True:
+                    start = time.perf_counter()
+                    writer.write((json.dumps(request) + "\n").encode())
+                    await writer.drain()
+                    reply = json.loads(await reader.readline())
+                    if reply.get("error") != "busy":
+                        break
+                    errors["busy"] = errors.get("busy", 0) + 1
+                    await asyncio.sleep(0.01)  # Back off and ask again
+                if "error" in reply:
+                    errors[reply["error"]] = errors.get(reply["error"], 0) + 1
+                    break
+                latencies.append((time.perf_counter() - start) * 1000)
+                cell = reply["cell"]
+                moves.append(cell)
+                os |= 1 << cell
+                if game_bitboard.is_winning_move(os, cell):
+                    break
+
+            writer.write((json.dumps({"session": session, "op": "end"}) + "\n").encode())
+            await writer.drain()
+            await reader.readline()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def load_test(host, port, concurrency, moves, difficulty=2, time_ms=200, seed=0):
+    """
+    Play random games against a server with several concurrent clients and measure it.
+    The player's moves are random; each client plays one game after another.
+
+    Args:
+        host (str): Address of the server.
+        port (int): Port of the server.
+        concurrency (int): Number of clients playing at once, each on its own connection.
+        moves (int): Number of computer moves to request in total.
+        difficulty (int): Difficulty of every request.
+        time_ms (float): Time budget of every request.
+        seed (int): Random seed of the player's moves.
+
+    Returns:
+        dict: concurrency, moves (answered), seconds, moves_per_second, p50_ms, p99_ms
+              (request latency as seen by the clients) and errors (count per error).
+    """
+    remaining = [moves]
+    latencies = []
+    errors = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _load_client(host, port, number, difficulty, time_ms, remaining, latencies, errors,
+                     random.Random(seed * 1000003 + number))
+        for number in range(concurrency)
+    ))
+    seconds = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "moves": len(latencies),
+        "seconds": round(seconds, 3),
+        "moves_per_second": round(len(latencies) / seconds, 1) if seconds > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50), 1),
+        "p99_ms": round(_percentile(latencies, 0.99), 1),
+        "errors": errors,
+    }
+
+
+async def _serve_forever(args):
+    """Run the server until interrupted."""
+    server = MoveServer(args.workers, args.max_pending, args.max_time_ms)
+    try:
+        listener = await server.start(args.host, args.port)
+        print("Serving moves on %s:%d with %d workers" % (args.host, args.port, server.workers), flush=True)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+async def _run_load(args):
+    """Run the load test at each concurrency, against a server started here if asked to."""
+    server = None
+    port = args.port
+    if args.spawn:
+        server = MoveServer(args.workers, args.max_pending, args.max_time_ms)
+        listener = await server.start(args.host, 0)
+        port = listener.sockets[0].getsockname()[1]
+    try:
+        print("%11s %7s %9s %9s %9s  %s" % ("concurrency", "moves", "moves/s", "p50 ms", "p99 ms", "errors"))
+        for concurrency in args.concurrency:
+            result = await load_test(args.host, port, concurrency, args.moves, args.difficulty, args.time_ms, args.seed)
+            print("%11d %7d %9.1f %9.1f %9.1f  %s" % (
+                result["concurrency"], result["moves"], result["moves_per_second"],
+                result["p50_ms"], result["p99_ms"], result["errors"] or "-"), flush=True)
+    finally:
+        if server is not None:
+            listener.close()
+            server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the computer's moves over a local socket, or load-test a server.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("serve", "run the move server"), ("load", "load-test a move server")):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--host", default="127.0.0.1", help="address (default: 127.0.0.1)")
+        subparser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port (default: %d)" % DEFAULT_PORT)
+        subparser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+        subparser.add_argument("--max-pending", type=int, default=None,
+                               help="searches queued or running before requests are turned away "
+                                    "(default: %d per worker)" % PENDING_PER_WORKER)
+        subparser.add_argument("--max-time-ms", type=float, default=MAX_TIME_MS,
+                               help="longest search a request may ask for (default: %d)" % MAX_TIME_MS)
+    load = subparsers.choices["load"]
+    load.add_argument("--spawn", action="store_true", help="start a server in this process instead of connecting")
+    load.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                      help="clients playing at once, one run per value (default: 1 4 16)")
+    load.add_argument("--moves", type=int, default=200, help="computer moves per run (default: 200)")
+    load.add_argument("--difficulty", type=int, default=2, help="difficulty of the requests (default: 2)")
+    load.add_argument("--time-ms", type=float, default=200, help="time budget of the requests (default: 200)")
+    load.add_argument("--seed", type=int, default=0, help="seed for the player's random moves (default: 0)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve_forever(args) if args.command == "serve" else _run_load(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,206 @@
+"""
+game_symmetry.py
+
+This file implements the symmetries of the 4x4x4 board and position canonicalization.
+
+The 76 winning lines are preserved by 192 cell permutations: the 48 rotations and
+reflections of the cube combined with 4 maps applied to all three coordinates at once:
+    - identity                (0, 1, 2, 3)
+    - inner/outer swap        (1, 0, 3, 2), which exchanges corners and center cells
+    - middle swap             (0, 2, 1, 3)
+    - both swaps              (1, 3, 0, 2)
+Each transform is stored as a tuple perm where perm[cell] is the image of the cell.
+
+The game_logic.evaluate heuristic does not score every line and gives a bonus to the
+center cells, so only some of these transforms leave its score unchanged. Those are
+listed in EVALUATION_SYMMETRIES and are the ones the search may use for pruning.
+
+Functions:
+    - transform_cell: Applies a transform to a cell.
+    - transform_mask: Applies a transform to a mask.
+    - check_transforms: Verifies the transform tables.
+    - canonicalize: Maps a position to its canonical form plus the transform used.
+    - canonical_board: canonicalize for a 3D list board.
+    - stabilizer: Lists the transforms that leave a position unchanged.
+    - unique_moves: Drops moves that are symmetric to an earlier move.
+"""
+
+import itertools
+
+import game_bitboard
+
+# Maps applied to every coordinate at once. Per-axis reversal is added separately.
+_UNIFORM_MAPS = ((0, 1, 2, 3), (1, 0, 3, 2), (0, 2, 1, 3), (1, 3, 0, 2))
+
+def _build_transforms():
+    """Enumerate the 192 line-preserving permutations, identity first."""
+    coords = [game_bitboard.cell_to_move(cell) for cell in range(game_bitboard.CELLS)]
+    transforms = []
+    for axes in itertools.permutations(range(3)):
+        for flips in itertools.product((False, True), repeat=3):
+            for uniform in _UNIFORM_MAPS:
+                # Coordinate map of each output axis: uniform map, then the axis reversal
+                maps = [tuple(3 - v if flip else v for v in uniform) for flip in flips]
+                a, b, c = axes
+                transforms.append(tuple(
+                    maps[0][cell[a]] * 16 + maps[1][cell[b]] * 4 + maps[2][cell[c]]
+                    for cell in coords
+                ))
+    return tuple(transforms)
+
+
+def check_transforms():
+    """
+    Check that TRANSFORMS holds 192 distinct permutations that each map the 76 lines
+    onto themselves, and that INVERSES is right. Run with python game_symmetry.py.
+
+    Raises:
+        AssertionError: If any check fails.
+    """
+    lines = set(game_bitboard.LINES)
+    assert len(set(TRANSFORMS)) == 192
+    for index, perm in enumerate(TRANSFORMS):
+        assert sorted(perm) == list(range(game_bitboard.CELLS))
+        assert {transform_mask(line, perm) for line in lines} == lines
+        inverse = TRANSFORMS[INVERSES[index]]
+        assert all(inverse[perm[cell]] == cell for cell in range(game_bitboard.CELLS))
+
+
+def transform_cell(cell, perm):
+    """
+    Apply a transform to a cell.
+
+    Args:
+        cell (int): The bit index of the cell (0 to 63).
+        perm (tuple): The transform, one of TRANSFORMS.
+
+    Returns:
+        int: The bit index of the image cell.
+    """
+    return perm[cell]
+
+
+def transform_mask(mask, perm):
+    """
+    Apply a transform to every cell of a mask.
+
+    Args:
+        mask (int): The cells to move.
+        perm (tuple): The transform, one of TRANSFORMS.
+
+    Returns:
+        int: The mask of the image cells.
+    """
+    image = 0
+    while mask:
+        bit = mask & -mask
+        image |= 1 << perm[bit.bit_length() - 1]
+        mask ^= bit
+    return image
+
+
+def _preserves_evaluation(perm):
+    """Check a transform maps the scored line groups and the center onto themselves."""
+    if transform_mask(game_bitboard.CENTER, perm) != game_bitboard.CENTER:
+        return False
+    if {transform_mask(pillar, perm) for pillar in game_bitboard.PILLARS} != set(game_bitboard.PILLARS):
+        return False
+    for pairs in (game_bitboard.ROW_COLUMN_PAIRS, game_bitboard.LAYER_DIAGONAL_PAIRS):
+        groups = {frozenset(pair) for pair in pairs}
+        if {frozenset(transform_mask(line, perm) for line in pair) for pair in groups} != groups:
+            return False
+    return True
+
+
+TRANSFORMS = _build_transforms()
+IDENTITY = TRANSFORMS[0]
+_INDEX = {perm: index for index, perm in enumerate(TRANSFORMS)}
+INVERSES = tuple(
+    _INDEX[tuple(perm.index(cell) for cell in range(game_bitboard.CELLS))]
+    for perm in TRANSFORMS
+)
+EVALUATION_SYMMETRIES = tuple(perm for perm in TRANSFORMS if _preserves_evaluation(perm))
+
+def canonicalize(xs, os, transforms=TRANSFORMS):
+    """
+    Map a position to its canonical form: the smallest (player mask, AI mask) among its images.
+
+    Args:
+        xs (int): Mask of the cells held by the player (1).
+        os (int): Mask of the cells held by the AI (-1).
+        transforms (tuple): The group to canonicalize under. Defaults to all 192 symmetries.
+
+    Returns:
+        tuple: (canonical player mask, canonical AI mask, index of the transform used).
+               The index refers to the transforms argument; apply the same transform to
+               a move to map it into the canonical position.
+    """
+    best = None
+    best_index = 0
+    for index, perm in enumerate(transforms):
+        image = (transform_mask(xs, perm), transform_mask(os, perm))
+        if best is None or image < best:
+            best = image
+            best_index = index
+    return best[0], best[1], best_index
+
+
+def canonical_board(board, transforms=TRANSFORMS):
+    """
+    Map a 3D list board to its canonical form.
+
+    Args:
+        board (list): A 4x4x4 list where board[z][x][y] is 1, -1 or 0.
+        transforms (tuple): The group to canonicalize under. Defaults to all 192 symmetries.
+
+    Returns:
+        tuple: (canonical 3D list board, index of the transform used).
+    """
+    xs, os, index = canonicalize(*game_bitboard.from_board(board), transforms)
+    return game_bitboard.to_board(xs, os), index
+
+
+def stabilizer(xs, os, transforms=TRANSFORMS):
+    """
+    List the transforms that leave a position unchanged.
+
+    Args:
+        xs (int): Mask of the cells held by the player (1).
+        os (int): Mask of the cells held by the AI (-1).
+        transforms (tuple): The group to search. Defaults to all 192 symmetries.
+
+    Returns:
+        tuple: The transforms mapping the position onto itself (always includes the identity).
+    """
+    return tuple(
+        perm for perm in transforms
+        if transform_mask(xs, perm) == xs and transform_mask(os, perm) == os
+    )
+
+
+def unique_moves(moves, symmetries):
+    """
+    Drop every move that a symmetry of the position maps onto an earlier move.
+    Such moves lead to mirrored positions with the same value.
+
+    Args:
+        moves (list): Candidate cells, in the order they should be searched.
+        symmetries (tuple): Transforms that leave the current position unchanged.
+
+    Returns:
+        list: The moves with one representative per symmetry class, order preserved.
+    """
+    seen = set()
+    unique = []
+    for cell in moves:
+        if cell in seen:
+            continue
+        unique.append(cell)
+        for perm in symmetries:
+            seen.add(perm[cell])
+    return unique
+
+
+if __name__ == "__main__":
+    check_transforms()
+    print("%d symmetries, %d keep the evaluation" % (len(TRANSFORMS), len(EVALUATION_SYMMETRIES)))
@@ -0,0 +1,219 @@
+"""
+game_threats.py
+
+This file implements a threat-space search: a search for forced wins that only looks at
+moves making an open three (a line with three of the attacker's stones and an empty cell).
+Each such threat leaves the defender one move, the block, so a whole forcing sequence is
+a single line of play and can be followed far beyond the depth of the alpha-beta search:
+    - A move that makes two threats at different cells at once (a double threat) wins,
+      since only one of them can be blocked.
+    - A move that makes one threat forces the block, and the search goes on from there.
+    - If the defender's block makes a three of its own, the attacker has to block it next.
+A sequence found this way is a real forced win. A win that needs a quiet move somewhere
+is not found, so "no sequence" does not mean the position is safe.
+
+The search is used as a pre-pass by game_play.computer_move: a forced win is played at
+once, and when the opponent has one, the computer's move is checked against it. It runs
+on the move's clock, so it takes a deadline and a stop event like the alpha-beta search.
+
+Functions:
+    - threat_moves: Lists the cells that make an open three.
+    - find_win: Looks for a forced win by threats for the side to move.
+    - defenses: Lists the moves that stop the opponent's forced win by threats.
+"""
+
+import time
+
+import game_bitboard
+
+MAX_ATTACKS = 32      # Attacker moves in one sequence (the board runs out long before)
+MAX_NODES = 20000     # Positions visited per find_win call before giving up
+TIME_CHECK_INTERVAL = 256  # Positions between two looks at the clock
+
+class _Budget(Exception):
+    """Raised when a find_win call has visited its max_nodes positions."""
+
+
+class _Timeout(Exception):
+    """Raised when the deadline has passed or the stop event is set."""
+
+
+class _Limits:
+    """
+    The node budget, deadline and stop event of one find_win call.
+
+    Attributes:
+        nodes (int): Positions visited so far.
+        max_nodes (int): Positions to visit before giving up.
+        deadline (float): time.perf_counter() value after which the search stops, or None.
+        stop_event (threading.Event): Event that stops the search when set, or None.
+    """
+
+    def __init__(self, max_nodes, deadline=None, stop_event=None):
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.stop_event = stop_event
+
+    def visit(self):
+        """Count a position, raising _Budget or _Timeout when a limit is reached."""
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _Budget()
+        # Look at the clock on the first position and every TIME_CHECK_INTERVAL after it
+        if self.nodes % TIME_CHECK_INTERVAL == 1:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise _Timeout()
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise _Timeout()
+
+
+def threat_moves(own, other):
+    """
+    List the empty cells that make at least one open three for a player.
+
+    Args:
+        own (int): Mask of the cells held by the player.
+        other (int): Mask of the cells held by the opponent.
+
+    Returns:
+        list: The cells, in increasing order.
+    """
+    cells = 0
+    for line in game_bitboard.LINES:
+        if not other & line and (own & line).bit_count() == 2:
+            cells |= line & ~own
+    moves = []
+    while cells:
+        bit = cells & -cells
+        moves.append(bit.bit_length() - 1)
+        cells ^= bit
+    return moves
+
+
+def _new_threats(own, other, cell):
+    """Mask of the cells completing a line that playing the cell turns into an open three."""
+    threats = 0
+    own_after = own | 1 << cell
+    for line in game_bitboard.LINES_THROUGH[cell]:
+        if not other & line and (own_after & line).bit_count() == 3:
+            threats |= line & ~own_after
+    return threats
+
+
+def find_win(own, other, max_attacks=MAX_ATTACKS, max_nodes=MAX_NODES, deadline=None, stop_event=None):
+    """
+    Look for a forced win by threats for the side to move.
+
+    Args:
+        own (int): Mask of the cells held by the side to move (the attacker).
+        other (int): Mask of the cells held by the defender.
+        max_attacks (int): Longest sequence to try, in attacker moves.
+        max_nodes (int): Positions to visit before giving up.
+        deadline (float): time.perf_counter() value after which to give up, or None.
+        stop_event (threading.Event): Optional event; setting it makes the search give up.
+
+    Returns:
+        list: The winning line as cells, attacker and defender moves alternating and
+              ending with the winning move, or None if no forced win by threats was found.
+    """
+    try:
+        return _find_win(own, other, max_attacks, _Limits(max_nodes, deadline, stop_event))
+    except _Timeout:
+        return None
+
+
+def _find_win(own, other, max_attacks, limits):
+    """find_win that raises _Timeout instead of returning None when it runs out of time."""
+    try:
+        return _attack(own, other, max_attacks, {}, limits)
+    except _Budget:
+        return None
+
+
+def _attack(own, other, attacks, failed, limits):
+    """
+    find_win recursion.
+
+    Args:
+        own (int): Mask of the attacker's cells; the attacker is to move.
+        other (int): Mask of the defender's cells.
+        attacks (int): Attacker moves left.
+        failed (dict): Positions already shown to fail, with the attacks they had left.
+        limits (_Limits): Node budget and deadline of the find_win call.
+
+    Returns:
+        list: The winning line from here, or None.
+    """
+    limits.visit()
+
+    empty = ~(own | other) & game_bitboard.FULL
+    wins = game_bitboard.threat_cells(own, other) & empty
+    if wins:
+        return [(wins & -wins).bit_length() - 1]
+    if attacks == 0 or failed.get((own, other), -1) >= attacks:
+        return None
+
+    # An open three of the defender has to be blocked first; two cannot be
+    blocks = game_bitboard.threat_cells(other, own) & empty
+    if blocks & (blocks - 1):
+        return None
+    candidates = [blocks.bit_length() - 1] if blocks else threat_moves(own, other)
+
+    # Double threats win on the spot, so try them before following single threats.
+    # The defender has no open three after the attacker's move, so its block cannot win.
+    forced = []
+    for cell in candidates:
+        threats = _new_threats(own, other, cell) & empty
+        if threats & (threats - 1):
+            block = (threats & -threats).bit_length() - 1
+            return [cell, block, (threats ^ 1 << block).bit_length() - 1]
+        if threats:
+            forced.append((cell, threats.bit_length() - 1))
+
+    for cell, block in forced:
+        line = _attack(own | 1 << cell, other | 1 << block, attacks - 1, failed, limits)
+        if line is not None:
+            return [cell, block] + line
+
+    failed[(own, other)] = attacks
+    return None
+
+
+def defenses(own, other, max_attacks=MAX_ATTACKS, max_nodes=MAX_NODES, deadline=None, stop_event=None):
+    """
+    Check whether the opponent would have a forced win by threats if it had the move,
+    and if so, which moves stop it.
+
+    Args:
+        own (int): Mask of the cells held by the side to move.
+        other (int): Mask of the cells held by the opponent.
+        max_attacks (int): Longest opponent sequence to try, in its moves.
+        max_nodes (int): Positions to visit per find_win call.
+        deadline (float): time.perf_counter() value after which to give up, or None.
+        stop_event (threading.Event): Optional event; setting it makes the search give up.
+
+    Returns:
+        list: None if the opponent has no forced win by threats. Otherwise the empty cells
+              after which the opponent no longer has one (found within the budget), cells
+              of its winning line first. An empty list means every move loses to threats.
+              If time runs out, the stopping moves found so far, or None if there are none.
+    """
+    safe = []
+    try:
+        line = _find_win(other, own, max_attacks, _Limits(max_nodes, deadline, stop_event))
+        if line is None:
+            return None
+
+        empty = ~(own | other) & game_bitboard.FULL
+        candidates = list(dict.fromkeys(line))
+        candidates += [cell for cell in range(game_bitboard.CELLS) if empty >> cell & 1 and cell not in candidates]
+        for cell in candidates:
+            own_after = own | 1 << cell
+            if game_bitboard.is_winning_move(own_after, cell) or _find_win(
+                    other, own_after, max_attacks, _Limits(max_nodes, deadline, stop_event)) is None:
+                safe.append(cell)
+    except _Timeout:
+        # Cells not looked at yet may be safe too, so an empty list would claim too much
+        return safe or None
+    return safe
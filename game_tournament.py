@@ -0,0 +1,334 @@
+"""
+game_tournament.py
+
+This file plays the AI against itself without the UI, to compare difficulty settings
+and heuristics. Two engines play a match of N games spread over a pool of worker
+processes:
+    - Each opening is played twice, once with each engine moving first (as X, player 1).
+    - Openings are random moves or lines read from a book file.
+    - Each finished game is appended to a JSONL file as soon as it comes back, and
+      optionally to a game record file (see game_record.py) for later analysis.
+    - At the end the score is reported as wins/draws/losses with an Elo estimate.
+
+An engine is given as a comma separated spec, for example "depth=4,time_ms=200,evaluator=heuristic".
+Moves are chosen by game_play.computer_move, and every stage it runs is a setting whose
+default is what computer_move does in the game:
+    - depth: Deepest iteration of the search (default 2).
+    - time_ms: Time budget per move in milliseconds (default: none, fixed depth).
+    - evaluator: A name from game_evaluator.EVALUATORS (default "heuristic").
+    - algorithm: A name from game_ai.ALGORITHMS (default game_ai.ENGINE_ALGORITHM).
+    - book: 1 to answer from the opening book, 0 not to (default 1). The book only has
+      positions with O to move.
+    - threats: 1 to run the threat-space search before searching, 0 not to (default 1).
+    - solver: 1 to solve endgames exactly (see game_pns.py), 0 not to (default 1).
+The position cache is never used, so no game reuses the results of another.
+
+Example:
+    python game_tournament.py --games 1000 --engine-a depth=3 --engine-b depth=2 --out results.jsonl
+
+Functions:
+    - parse_engine: Parses an engine spec.
+    - random_openings: Generates random opening lines.
+    - load_openings: Reads opening lines from a book file.
+    - play_game: Plays one game between two engines.
+    - elo_difference: Estimates the Elo difference from a match score.
+    - run_match: Plays a match over a pool of worker processes.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import game_ai
+import game_bitboard
+import game_evaluator
+import game_play
+import game_record
+import game_tt
+
+DEFAULT_ENGINE = {"depth": 2, "time_ms": None, "evaluator": "heuristic", "algorithm": game_ai.ENGINE_ALGORITHM,
+                  "book": True, "threats": True, "solver": True}
+
+# Transposition tables of the current worker process, one per side, cleared between games
+_worker_tts = None
+
+def parse_engine(spec):
+    """
+    Parse an engine spec such as "depth=4,time_ms=200,evaluator=heuristic".
+
+    Args:
+        spec (str): Comma separated key=value settings. Missing keys take their defaults.
+
+    Returns:
+        dict: The settings, with the keys of DEFAULT_ENGINE.
+
+    Raises:
+        ValueError: If a key, evaluator or algorithm name is unknown, a number is malformed
+                    or a switch is not 0 or 1.
+    """
+    engine = dict(DEFAULT_ENGINE)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key == "depth":
+            engine["depth"] = int(value)
+        elif key == "time_ms":
+            engine["time_ms"] = float(value)
+        elif key == "evaluator":
+            if value not in game_evaluator.EVALUATORS:
+                raise ValueError("unknown evaluator %r, expected one of %s" % (value, ", ".join(game_evaluator.EVALUATORS)))
+            engine["evaluator"] = value
+        elif key == "algorithm":
+            if value not in game_ai.ALGORITHMS:
+                raise ValueError("unknown algorithm %r, expected one of %s" % (value, ", ".join(game_ai.ALGORITHMS)))
+            engine["algorithm"] = value
+        elif key in ("book", "threats", "solver"):
+            if value not in ("0", "1"):
+                raise ValueError("%s must be 0 or 1" % key)
+            engine[key] = value == "1"
+        else:
+            raise ValueError("unknown engine setting %r" % key)
+    return engine
+
+
+def random_openings(count, plies, seed):
+    """
+    Generate random opening lines that do not already contain a win.
+
+    Args:
+        count (int): Number of openings.
+        plies (int): Moves per opening, alternating between X and O.
+        seed (int): Random seed, so a match can be replayed.
+
+    Returns:
+        list: Openings as tuples of cell indices (0 to 63).
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        cells = rng.sample(range(game_bitboard.CELLS), plies)
+        xs = sum(1 << cell for cell in cells[0::2])
+        os_ = sum(1 << cell for cell in cells[1::2])
+        if not game_bitboard.check_win(xs) and not game_bitboard.check_win(os_):
+            openings.append(tuple(cells))
+    return openings
+
+
+def load_openings(path):
+    """
+    Read opening lines from a book file: one opening per line, cell indices (0 to 63)
+    separated by spaces, X moving first. Blank lines and lines starting with # are skipped.
+
+    Args:
+        path (str): The book file.
+
+    Returns:
+        list: Openings as tuples of cell indices.
+    """
+    openings = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                openings.append(tuple(int(cell) for cell in line.split()))
+    return openings
+
+
+def play_game(engine_x, engine_o, opening=()):
+    """
+    Play one game. X (player 1) moves first and is the MAX side of the search.
+
+    Args:
+        engine_x (dict): Settings of the engine playing X, from parse_engine.
+        engine_o (dict): Settings of the engine playing O.
+        opening (tuple): Cells to play before the engines take over, X first.
+
+    Returns:
+        dict: moves (list of cells), winner (1, -1 or 0 for a draw) and plies.
+    """
+    global _worker_tts
+    if _worker_tts is None:
+        _worker_tts = {1: game_tt.TranspositionTable(), -1: game_tt.TranspositionTable()}
+    for tt in _worker_tts.values():
+        tt.clear()
+
+    engines = {1: engine_x, -1: engine_o}
+    masks = {1: 0, -1: 0}
+    moves = []
+    player, winner = 1, 0
+    while len(moves) < game_bitboard.CELLS:
+        if len(moves) < len(opening):
+            cell = opening[len(moves)]
+        else:
+            engine = engines[player]
+            board = game_bitboard.to_board(masks[1], masks[-1])
+            # computer_move reads a budget of None as the depth's budget in the game
+            time_ms = engine["time_ms"] if engine["time_ms"] is not None else float('inf')
+            move = game_play.computer_move(
+                board, engine["depth"], time_ms, tt=_worker_tts[player], player=player,
+                evaluator_class=game_evaluator.EVALUATORS[engine["evaluator"]], algorithm=engine["algorithm"],
+                book=engine["book"], threats=engine["threats"], solver=engine["solver"], cache=False,
+            )
+            cell = game_bitboard.cell_index(*move)
+        moves.append(cell)
+        won = game_bitboard.is_winning_move(masks[player] | 1 << cell, cell)
+        masks[player] |= 1 << cell
+        if won:
+            winner = player
+            break
+        player = -player
+    return {"moves": moves, "winner": winner, "plies": len(moves)}
+
+
+def _play_task(task):
+    """
+    Play one game of a match. Runs in a worker process.
+
+    Args:
+        task (tuple): (game number, engine A, engine B, opening).
+                      Engine A plays X in even games and O in odd ones.
+
+    Returns:
+        dict: The game record written to the JSONL file.
+    """
+    number, engine_a, engine_b, opening = task
+    a_is_x = number % 2 == 0
+    start = time.perf_counter()
+    game = play_game(engine_a, engine_b, opening) if a_is_x else play_game(engine_b, engine_a, opening)
+    a_player = 1 if a_is_x else -1
+    return {
+        "game": number,
+        "x": "a" if a_is_x else "b",
+        "opening": list(opening),
+        "moves": game["moves"],
+        "plies": game["plies"],
+        "result": "draw" if game["winner"] == 0 else ("a" if game["winner"] == a_player else "b"),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def elo_difference(wins, draws, losses):
+    """
+    Estimate the Elo difference of engine A over engine B from a match score.
+
+    Args:
+        wins (int): Games won by A.
+        draws (int): Drawn games.
+        losses (int): Games lost by A.
+
+    Returns:
+        tuple: (Elo difference, 95% error margin). Either is infinite when A won or lost
+               every game, and both are 0.0 for an empty match.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, 0.0
+    score = (wins + draws / 2) / games
+    if score in (0.0, 1.0):
+        return math.copysign(math.inf, score - 0.5), math.inf
+
+    def elo(s):
+        return -400 * math.log10(1 / s - 1)
+
+    # Normal approximation of the score's standard error
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    low, high = max(score - margin, 1e-9), min(score + margin, 1 - 1e-9)
+    return elo(score), (elo(high) - elo(low)) / 2
+
+
+def run_match(engine_a, engine_b, games, openings, workers=None, out=None, progress=None, record=None):
+    """
+    Play a match over a pool of worker processes. Games are handed out in chunks and
+    written as they finish, so memory stays flat however many games are played.
+
+    Args:
+        engine_a (dict): Settings of engine A, from parse_engine.
+        engine_b (dict): Settings of engine B.
+        games (int): Number of games. Game 2k and 2k+1 share opening k with colors swapped.
+        openings (list): Opening lines, reused in a cycle if there are fewer than games / 2.
+        workers (int): Number of worker processes. Defaults to the number of CPU cores.
+        out (file): Optional open text file to write one JSON line per game to.
+        progress (callable): Optional function called with the number of games finished.
+        record (GameRecordWriter): Optional writer to append every game to. The difficulty
+                                   recorded is the depth of the engine playing O.
+
+    Returns:
+        dict: wins, draws and losses from engine A's point of view.
+    """
+    workers = workers or os.cpu_count() or 1
+    openings = openings or [()]
+    tasks = (
+        (number, engine_a, engine_b, openings[number // 2 % len(openings)])
+        for number in range(games)
+    )
+    score = {"wins": 0, "draws": 0, "losses": 0}
+    chunksize = max(1, min(64, games // (workers * 8)))
+
+    with multiprocessing.Pool(workers) as pool:
+        for finished, game in enumerate(pool.imap_unordered(_play_task, tasks, chunksize), 1):
+            score[{"a": "wins", "draw": "draws", "b": "losses"}[game["result"]]] += 1
+            if out is not None:
+                out.write(json.dumps(game) + "\n")
+            if record is not None:
+                o_engine = engine_b if game["x"] == "a" else engine_a
+                if game["result"] == "draw":
+                    result = game_record.DRAW
+                else:
+                    result = game_record.X_WON if game["result"] == game["x"] else game_record.O_WON
+                record.write(game["moves"], o_engine["depth"], result)
+            if progress is not None:
+                progress(finished)
+    return score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play the AI against itself and report the score.")
+    parser.add_argument("--games", type=int, default=100, help="number of games (default: 100)")
+    parser.add_argument("--engine-a", default="depth=2", help='engine A spec (default: "depth=2")')
+    parser.add_argument("--engine-b", default="depth=2", help='engine B spec (default: "depth=2")')
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--openings", default="random",
+                        help='"random" or a book file with one opening per line (default: random)')
+    parser.add_argument("--opening-plies", type=int, default=2, help="moves per random opening (default: 2)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random openings (default: 0)")
+    parser.add_argument("--out", default=None, help="JSONL file to write one record per game to")
+    parser.add_argument("--record", default=None, help="game record file to append every game to (see game_record.py)")
+    args = parser.parse_args()
+
+    try:
+        engine_a, engine_b = parse_engine(args.engine_a), parse_engine(args.engine_b)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.openings == "random":
+        book = random_openings((args.games + 1) // 2, args.opening_plies, args.seed)
+    else:
+        book = load_openings(args.openings)
+
+    def report(finished):
+        if finished % 100 == 0 or finished == args.games:
+            print("\r%d/%d games" % (finished, args.games), end="", flush=True)
+
+    start = time.perf_counter()
+    record_writer = game_record.GameRecordWriter(args.record) if args.record is not None else None
+    try:
+        if args.out is not None:
+            with open(args.out, "w") as out_file:
+                result = run_match(engine_a, engine_b, args.games, book, args.workers, out_file, report, record_writer)
+        else:
+            result = run_match(engine_a, engine_b, args.games, book, args.workers, None, report, record_writer)
+    finally:
+        if record_writer is not None:
+            record_writer.close()
+    seconds = time.perf_counter() - start
+
+    elo, margin = elo_difference(result["wins"], result["draws"], result["losses"])
+    print()
+    print("A %s vs B %s" % (args.engine_a, args.engine_b))
+    print("A: %d wins, %d draws, %d losses in %.1fs (%.1f games/s)" % (
+        result["wins"], result["draws"], result["losses"], seconds, args.games / seconds))
+    print("Elo difference A - B: %+.0f +/- %.0f" % (elo, margin))
@@ -0,0 +1,173 @@
+"""
+game_trace.py
+
+This file implements opt-in instrumentation for the alpha-beta search. Tracing is off
+unless a SearchTrace is passed to the search; a search without one runs the plain
+game_ai.Search code, so there is nothing to pay when tracing is disabled.
+
+Collected data:
+    - nodes, cutoffs and leaf evaluations, in total and per ply,
+    - transposition table hits and misses,
+    - one record per iterative deepening iteration (depth, time, nodes, value, move),
+    - optionally, the time spent below each ply (costs a clock read per node).
+
+Classes:
+    - SearchTrace: Holds the counters and writes them out as JSON or CSV.
+    - CutoffCounter: Wraps a move orderer to count cutoffs per ply.
+"""
+
+class SearchTrace:
+    """
+    Counters collected while tracing a search.
+
+    Attributes:
+        timings (bool): Whether to measure the time spent below each ply.
+        nodes (list): Nodes visited at each ply.
+        cutoffs (list): Beta cutoffs at each ply.
+        leaf_evals (list): Leaf positions scored at each ply.
+        ply_seconds (list): Time spent in the subtrees rooted at each ply (only with timings).
+        tt_hits (int): Transposition table probes that found the position.
+        tt_misses (int): Transposition table probes that found nothing.
+        iterations (list): One dict per finished iterative deepening iteration.
+    """
+
+    def __init__(self, timings=False):
+        """
+        Create an empty trace.
+
+        Args:
+            timings (bool): Also measure the time spent below each ply.
+        """
+        self.timings = timings
+        self.nodes = []
+        self.cutoffs = []
+        self.leaf_evals = []
+        self.ply_seconds = []
+        self.tt_hits = 0
+        self.tt_misses = 0
+        self.iterations = []
+
+    def grow(self, ply):
+        """Make sure the per-ply lists reach the given ply."""
+        while len(self.nodes) <= ply:
+            self.nodes.append(0)
+            self.cutoffs.append(0)
+            self.leaf_evals.append(0)
+            self.ply_seconds.append(0.0)
+
+    def record_iteration(self, depth, seconds, nodes, value, move):
+        """
+        Record a finished iterative deepening iteration.
+
+        Args:
+            depth (int): Depth of the iteration.
+            seconds (float): Time the iteration took.
+            nodes (int): Nodes visited by the iteration.
+            value (int): Value found.
+            move (tuple): Best move found as (z, x, y), or None.
+        """
+        self.iterations.append({
+            "depth": depth,
+            "seconds": seconds,
+            "nodes": nodes,
+            "value": value,
+            "move": list(move) if move is not None else None,
+        })
+
+    def totals(self):
+        """
+        Sum the counters over all plies.
+
+        Returns:
+            dict: nodes, cutoffs, leaf_evals, tt_hits and tt_misses.
+        """
+        return {
+            "nodes": sum(self.nodes),
+            "cutoffs": sum(self.cutoffs),
+            "leaf_evals": sum(self.leaf_evals),
+            "tt_hits": self.tt_hits,
+            "tt_misses": self.tt_misses,
+        }
+
+    def to_dict(self):
+        """
+        Collect everything in the trace.
+
+        Returns:
+            dict: The totals, a per-ply list and the iterations.
+        """
+        return {
+            "totals": self.totals(),
+            "plies": self.ply_rows(),
+            "iterations": self.iterations,
+        }
+
+    def ply_rows(self):
+        """
+        List the per-ply counters.
+
+        Returns:
+            list: One dict per ply with ply, nodes, cutoffs, leaf_evals and seconds
+                  (seconds is None unless timings were enabled).
+        """
+        return [
+            {
+                "ply": ply,
+                "nodes": self.nodes[ply],
+                "cutoffs": self.cutoffs[ply],
+                "leaf_evals": self.leaf_evals[ply],
+                "seconds": self.ply_seconds[ply] if self.timings else None,
+            }
+            for ply in range(len(self.nodes))
+        ]
+
+    def dump(self, path):
+        """
+        Write the trace to a file. A .csv path gets the per-ply table, anything else JSON.
+
+        Args:
+            path (str): The file to write.
+        """
+        if path.endswith(".csv"):
+            self.dump_csv(path)
+        else:
+            self.dump_json(path)
+
+    def dump_json(self, path):
+        """Write the whole trace as JSON."""
+        import json  # Imported here to keep importing the engine cheap
+
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def dump_csv(self, path):
+        """Write the per-ply counters as CSV, one row per ply."""
+        import csv  # Imported here to keep importing the engine cheap
+
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=["ply", "nodes", "cutoffs", "leaf_evals", "seconds"])
+            writer.writeheader()
+            writer.writerows(self.ply_rows())
+
+
+class CutoffCounter:
+    """Wraps a move orderer (see game_ordering.py) to count the cutoffs it is told about."""
+
+    def __init__(self, orderer, trace):
+        """
+        Args:
+            orderer (MoveOrderer): The orderer to forward to.
+            trace (SearchTrace): The trace to count cutoffs in.
+        """
+        self.orderer = orderer
+        self.trace = trace
+
+    def order(self, player, xs, os, ply, hint=None):
+        """Forward to the wrapped orderer."""
+        return self.orderer.order(player, xs, os, ply, hint)
+
+    def cutoff(self, player, cell, ply, depth):
+        """Count the cutoff, then forward it to the wrapped orderer."""
+        self.trace.grow(ply)
+        self.trace.cutoffs[ply] += 1
+        self.orderer.cutoff(player, cell, ply, depth)
@@ -0,0 +1,165 @@
+"""
+game_tt.py
+
+This file implements Zobrist hashing and a transposition table for the alpha-beta search.
+The same 4x4x4 position is reached through many move orders; the table remembers the
+result of each searched position so it only has to be searched once.
+
+Each bucket holds two entries:
+    - a depth-preferred entry, only replaced by a search at least as deep,
+    - an always-replace entry, which takes whatever the depth-preferred entry refused.
+
+Functions:
+    - hash_position: Computes the Zobrist key of a position from scratch.
+
+Classes:
+    - TranspositionTable: Fixed-size table with hit/miss counters.
+"""
+
+import random
+
+import game_bitboard
+
+# Bound types stored with each value
+EXACT = 0  # The value is the minimax value of the position
+LOWER = 1  # The real value is at least the stored value (fail high)
+UPPER = 2  # The real value is at most the stored value (fail low)
+
+ZOBRIST_SEED = 6150  # Fixed so keys are the same in every process and every run
+
+def _build_keys():
+    """Draw one random 64-bit key per (cell, player) and one for the side to move."""
+    rng = random.Random(ZOBRIST_SEED)
+    player_keys = tuple(rng.getrandbits(64) for _ in range(game_bitboard.CELLS))
+    ai_keys = tuple(rng.getrandbits(64) for _ in range(game_bitboard.CELLS))
+    return player_keys, ai_keys, rng.getrandbits(64)
+
+
+PLAYER_KEYS, AI_KEYS, SIDE_KEY = _build_keys()
+
+# Key to XOR in when a player takes a cell, indexed by player: KEYS[1] and KEYS[-1].
+KEYS = (None, PLAYER_KEYS, AI_KEYS)
+
+def hash_position(xs, os, player):
+    """
+    Compute the Zobrist key of a position from scratch.
+
+    Args:
+        xs (int): Mask of the cells held by the player (1).
+        os (int): Mask of the cells held by the AI (-1).
+        player (int): The side to move (1 or -1).
+
+    Returns:
+        int: The 64-bit key. During search it is updated incrementally by XOR-ing
+             KEYS[player][cell] and SIDE_KEY for each move.
+    """
+    key = SIDE_KEY if player == -1 else 0
+    for cell in range(game_bitboard.CELLS):
+        if xs >> cell & 1:
+            key ^= PLAYER_KEYS[cell]
+        elif os >> cell & 1:
+            key ^= AI_KEYS[cell]
+    return key
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table with a depth-preferred and an always-replace entry per bucket.
+
+    Entries are tuples (key, value, depth, bound, move).
+
+    Attributes:
+        size (int): Total number of entries (two per bucket).
+        hits (int): Probes that found an entry for the position.
+        misses (int): Probes that found nothing.
+        stores (int): Number of entries written.
+    """
+
+    def __init__(self, size=1 << 18):
+        """
+        Create an empty table.
+
+        Args:
+            size (int): Number of entries. Rounded down to a power of two, at least 2.
+        """
+        buckets = 1
+        while buckets * 4 <= size:
+            buckets *= 2
+        self.size = buckets * 2
+        self._mask = buckets - 1
+        self._deep = [None] * buckets
+        self._recent = [None] * buckets
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key (int): The Zobrist key of the position.
+
+        Returns:
+            tuple: The entry (key, value, depth, bound, move), or None if it is not stored.
+        """
+        index = key & self._mask
+        entry = self._deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self._recent[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth, bound, move):
+        """
+        Store a search result.
+
+        Args:
+            key (int): The Zobrist key of the position.
+            value (int): The value found by the search.
+            depth (int): The depth the position was searched to.
+            bound (int): EXACT, LOWER or UPPER.
+            move (int): The best move found as a bit index, or None.
+        """
+        index = key & self._mask
+        entry = (key, value, depth, bound, move)
+        deep = self._deep[index]
+        if deep is None or deep[0] == key or depth >= deep[2]:
+            self._deep[index] = entry
+        else:
+            self._recent[index] = entry
+        self.stores += 1
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self._deep = [None] * len(self._deep)
+        self._recent = [None] * len(self._recent)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the hit/miss/store counters without touching the entries."""
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def stats(self):
+        """
+        Report the table counters.
+
+        Returns:
+            dict: hits, misses, stores, hit_rate and filled (number of occupied entries).
+        """
+        probes = self.hits + self.misses
+        filled = sum(entry is not None for entry in self._deep) + sum(entry is not None for entry in self._recent)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "filled": filled,
+        }
@@ -23,34 +23,50 @@ Functions:
     - draw_reset_button: Renders the Reset game button.
     - reset_game: Resets the game to its initial state.
     - draw_winner_screen: Displays the winner of the game.
+    - draw_thinking_indicator: Shows that the AI is searching for its move.
+    - status_surface: Picks the pre-rendered status message for the current frame.
+
+Classes:
+    - Renderer: Redraws only what changed since the last frame and updates just those areas.
+
+Rendering:
+    The grid, the title and every text label are rendered once, at import, onto cached
+    surfaces. The draw_* functions blit those instead of drawing line by line and never
+    update the display themselves; main.py draws each frame through a Renderer, which
+    pushes the changed rectangles to the display in a single update.
 """
 
 import pygame
-import numpy as np
+
+import game_bitboard
+import game_geometry
+import game_logic
 
 pygame.init()
 
 # --- CONSTANTS DEFINITION ---
 
-# Constants for board dimensions, styles, and colors
-LEVELS = 4
-WIDTH, HEIGHT = 750, 750
-GRID_SIZE = 4
-PADDING = WIDTH // 16
-BASE_CELL_HEIGHT = HEIGHT // GRID_SIZE // 6
-TOP_WIDTH = WIDTH // 4
-BOTTOM_WIDTH = 1.5 * TOP_WIDTH
+# Constants for board dimensions (see game_geometry), styles, and colors
+LEVELS = game_geometry.LEVELS
+WIDTH, HEIGHT = game_geometry.WIDTH, game_geometry.HEIGHT
+GRID_SIZE = game_geometry.GRID_SIZE
+PADDING = game_geometry.PADDING
+BASE_CELL_HEIGHT = game_geometry.BASE_CELL_HEIGHT
+TOP_WIDTH = game_geometry.TOP_WIDTH
+BOTTOM_WIDTH = game_geometry.BOTTOM_WIDTH
 LINE_WIDTH = 1
 BACKGROUND = (0, 0, 0)
 LINE_COLOR = (0, 255, 0)
 PLAYER_X_COLOR = (255, 0, 0)
 PLAYER_O_COLOR = (0, 0, 255)
+PIECE_RADIUS = 10
+FPS = 30  # Frame cap: the loop sleeps between frames and leaves the CPU to the search
 
 # Layout configurations for the 3D board's top-left, top-right, etc.
-top_lefts = [(WIDTH // 1.33 - TOP_WIDTH // 2, PADDING + level * (4 * BASE_CELL_HEIGHT + PADDING)) for level in range(LEVELS)]
-top_rights = [(WIDTH // 1.33 + TOP_WIDTH // 2, PADDING + level * (4 * BASE_CELL_HEIGHT + PADDING)) for level in range(LEVELS)]
-bottom_lefts = [(WIDTH // 1.33 - BOTTOM_WIDTH // 2, PADDING + level * (4 * BASE_CELL_HEIGHT + PADDING) + 4 * BASE_CELL_HEIGHT) for level in range(LEVELS)]
-bottom_rights = [(WIDTH // 1.33 + BOTTOM_WIDTH // 2, PADDING + level * (4 * BASE_CELL_HEIGHT + PADDING) + 4 * BASE_CELL_HEIGHT) for level in range(LEVELS)]
+top_lefts = game_geometry.top_lefts
+top_rights = game_geometry.top_rights
+bottom_lefts = game_geometry.bottom_lefts
+bottom_rights = game_geometry.bottom_rights
 
 # Initialize Pygame display with specified dimensions
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -61,18 +77,19 @@ pygame.display.set_caption("3D Tic Tac Toe")
 def initialize_board():
     """
     Initializes and returns an empty 3D Tic Tac Toe board.
+    Kept for compatibility; the board itself comes from game_logic.initialize_board.
     
     Returns:
         list: A 3D list representing the game board where 0 denotes an empty cell.
     """
-    return [[[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)] for _ in range(LEVELS)]
+    return game_logic.initialize_board()
 
-def draw_board(board):
+def _draw_grid(surface):
     """
-    Renders the 3D Tic Tac Toe board based on its current state.
+    Draws the 4 trapezoid grids of the board onto a surface.
 
     Args:
-        board (list): The 3D list representing the game board.
+        surface (pygame.Surface): The surface to draw on.
     """
     for level in range(LEVELS):
         top_left = top_lefts[level]
@@ -80,7 +97,7 @@ def draw_board(board):
         bottom_left = bottom_lefts[level]
         bottom_right = bottom_rights[level]
         
-        pygame.draw.polygon(screen, LINE_COLOR, [top_left, top_right, bottom_right, bottom_left], LINE_WIDTH)
+        pygame.draw.polygon(surface, LINE_COLOR, [top_left, top_right, bottom_right, bottom_left], LINE_WIDTH)
         
         # Draw rows
         for y in range(1, GRID_SIZE):
@@ -95,7 +112,7 @@ def draw_board(board):
                 top_right[1] + y * BASE_CELL_HEIGHT
             )
             
-            pygame.draw.line(screen, LINE_COLOR, start, end, LINE_WIDTH)
+            pygame.draw.line(surface, LINE_COLOR, start, end, LINE_WIDTH)
 
         # Draw columns
         for x in range(1, GRID_SIZE):
@@ -110,7 +127,22 @@ def draw_board(board):
                 bottom_left[1]
             )
             
-            pygame.draw.line(screen, LINE_COLOR, left_start, left_end, LINE_WIDTH)
+            pygame.draw.line(surface, LINE_COLOR, left_start, left_end, LINE_WIDTH)
+
+# The grid never changes, so it is drawn once onto a transparent surface
+grid_surface = pygame.Surface((WIDTH, HEIGHT))
+grid_surface.fill(BACKGROUND)
+_draw_grid(grid_surface)
+grid_surface.set_colorkey(BACKGROUND)
+
+def draw_board(board):
+    """
+    Renders the 3D Tic Tac Toe board based on its current state.
+
+    Args:
+        board (list): The 3D list representing the game board.
+    """
+    screen.blit(grid_surface, (0, 0))
     
     # Now draw the existing moves
     for level in range(LEVELS):
@@ -131,33 +163,11 @@ def get_clicked_cell(pos):
         tuple: A 3-tuple (level, row, col) representing the clicked cell's position.
                Returns None if the click is outside any valid cell.
     """
-    x, y = pos
-
-    # Determine level
-    level = y // (4 * BASE_CELL_HEIGHT + PADDING)
-    if level >= LEVELS:
+    # The cell under every pixel is precomputed, slanted cell edges included
+    cell = game_geometry.hit_test(pos)
+    if cell is None:
         return None
-
-    # Adjust y based on the level to get row
-    y -= level * (4 * BASE_CELL_HEIGHT + PADDING)
-
-    # Determine row
-    row = (y - PADDING) // BASE_CELL_HEIGHT
-    if row < 0 or row >= GRID_SIZE:
-        return None
-
-    # Compute x-coordinates for the clicked row using the appropriate level's top_left and top_right
-    ratio = row / GRID_SIZE
-    left_x = top_lefts[level][0] + ratio * (bottom_lefts[level][0] - top_lefts[level][0])
-    right_x = top_rights[level][0] + ratio * (bottom_rights[level][0] - top_rights[level][0])
-    cell_width = (right_x - left_x) / GRID_SIZE
-
-    # Determine column
-    col = (x - left_x) // cell_width
-    if col < 0 or col >= GRID_SIZE:
-        return None
-
-    return level, int(row), int(col)
+    return game_bitboard.cell_to_move(cell)
 
 
 # Constants to represent the different players.
@@ -192,20 +202,17 @@ def draw_circle_in_cell(level, row, col, player):
         row (int): The row number where the move was made.
         col (int): The column number where the move was made.
         player (int): The player making the move (either PLAYER or AI).
-    """
-    # Determine center X using interpolation between the left and right x-coordinates of the clicked row
-    left_x = top_lefts[level][0] + row / GRID_SIZE * (bottom_lefts[level][0] - top_lefts[level][0])
-    right_x = top_rights[level][0] + row / GRID_SIZE * (bottom_rights[level][0] - top_rights[level][0])
-    center_x = left_x + (right_x - left_x) / GRID_SIZE * (col + 0.5)  # col + 0.5 ensures we're in the center of the cell
 
-    # Determine center Y (similar logic to how it's done in get_clicked_cell)
-    center_y = PADDING + level * (4 * BASE_CELL_HEIGHT + PADDING) + row * BASE_CELL_HEIGHT + BASE_CELL_HEIGHT // 2
+    Returns:
+        pygame.Rect: The area of the screen drawn on.
+    """
+    center = game_geometry.CELL_CENTERS[game_bitboard.cell_index(level, row, col)]
 
     # Determine the color based on the player
     color = PLAYER_X_COLOR if player == PLAYER else PLAYER_O_COLOR
 
     # Draw the filled circle
-    pygame.draw.circle(screen, color, (int(center_x), int(center_y)), 10)
+    return pygame.draw.circle(screen, color, center, PIECE_RADIUS)
 
 
 # Title properties
@@ -257,25 +264,41 @@ buttons = {
     }
 }
 
+def _render_label(button):
+    """Renders a button's label once and keeps the surface in the button."""
+    button["label_surface"] = FONT.render(button["label"], True, BUTTON_FONT_COLOR)
+
+def draw_button(button, hover=None):
+    """
+    Renders a button from its cached label. Changes color when hovered.
+
+    Args:
+        button (dict): The button, with its rect and label.
+        hover (bool): Whether to draw it hovered. Defaults to whether the mouse is over it.
+
+    Returns:
+        pygame.Rect: The area of the screen drawn on.
+    """
+    rect = button["rect"]
+    if hover is None:
+        hover = rect.collidepoint(pygame.mouse.get_pos())
+    pygame.draw.rect(screen, BUTTON_COLORS["hover"] if hover else BUTTON_COLORS["default"], rect)
+    label = button["label_surface"]
+    screen.blit(label, (rect.x + (rect.width - label.get_width()) // 2, rect.y + (rect.height - label.get_height()) // 2))
+    return rect
+
 def draw_play_button():
     """
     Renders the Play button on the main screen. Changes color when hovered.
     """
-    rect = play_button["rect"]
-    pygame.draw.rect(screen, BUTTON_COLORS["hover"] if rect.collidepoint(pygame.mouse.get_pos()) else BUTTON_COLORS["default"], rect)
-    label = FONT.render(play_button["label"], True, BUTTON_FONT_COLOR)
-    screen.blit(label, (rect.x + (rect.width - label.get_width()) // 2, rect.y + (rect.height - label.get_height()) // 2))
-    pygame.display.flip()
+    draw_button(play_button)
 
 def draw_buttons():
     """
     Renders the difficulty selection buttons on the screen. Changes color on hover.
     """
-    for button_name, button in buttons.items():
-        pygame.draw.rect(screen, BUTTON_COLORS["hover"] if button["rect"].collidepoint(pygame.mouse.get_pos()) else BUTTON_COLORS["default"], button["rect"])
-        label = FONT.render(button["label"], True, BUTTON_FONT_COLOR)
-        screen.blit(label, (button["rect"].x + (button["rect"].width - label.get_width()) // 2, button["rect"].y + (button["rect"].height - label.get_height()) // 2))
-    pygame.display.flip()
+    for button in buttons.values():
+        draw_button(button)
 
 def get_clicked_difficulty(pos):
     """
@@ -301,10 +324,10 @@ reset_button = {
 
 def draw_reset_button():
     """Draw the Reset button on the screen."""
-    rect = reset_button["rect"]
-    pygame.draw.rect(screen, BUTTON_COLORS["hover"] if rect.collidepoint(pygame.mouse.get_pos()) else BUTTON_COLORS["default"], rect)
-    label = FONT.render(reset_button["label"], True, BUTTON_FONT_COLOR)
-    screen.blit(label, (rect.x + (rect.width - label.get_width()) // 2, rect.y + (rect.height - label.get_height()) // 2))
+    draw_button(reset_button)
+
+for _button in [play_button, reset_button, *buttons.values()]:
+    _render_label(_button)
 
 def reset_game():
     """Reset the game state."""
@@ -316,6 +339,45 @@ def reset_game():
 WINNER_FONT = pygame.font.SysFont("Arial", 30)
 WINNER_FONT_COLOR = (255, 255, 255)  # White color
 
+# Status messages, rendered once: the winner messages and the thinking message with 0 to 3 dots
+WINNER_SURFACES = {
+    PLAYER: WINNER_FONT.render("You win - Congrats!", True, PLAYER_X_COLOR),
+    AI: WINNER_FONT.render("AI won this time - Sorry!", True, PLAYER_O_COLOR),
+    0: WINNER_FONT.render("It's a draw!", True, WINNER_FONT_COLOR),
+}
+
+# Constants for the thinking indicator
+THINKING_FONT = pygame.font.SysFont("Arial", 24)
+THINKING_COLOR = PLAYER_O_COLOR
+THINKING_TEXT = "AI is thinking"
+THINKING_SURFACES = [THINKING_FONT.render(THINKING_TEXT + "." * dots, True, THINKING_COLOR) for dots in range(4)]
+
+def _status_position(surface):
+    """Top-left corner of a status message, centered below the title."""
+    return WIDTH // 4 - surface.get_width() // 2, PADDING * 2
+
+# The area any status message may cover, cleared when the message changes
+_status_rects = [pygame.Rect(_status_position(surface), surface.get_size())
+                 for surface in list(WINNER_SURFACES.values()) + THINKING_SURFACES]
+STATUS_RECT = _status_rects[0].unionall(_status_rects[1:])
+
+def status_surface(winner=None, thinking=False):
+    """
+    Picks the status message to show.
+
+    Args:
+        winner (int): The winner (PLAYER, AI or 0 for a draw) once the game is over, else None.
+        thinking (bool): Whether the AI is searching for its move.
+
+    Returns:
+        pygame.Surface: The pre-rendered message, or None if there is nothing to show.
+    """
+    if winner is not None:
+        return WINNER_SURFACES[winner]
+    if thinking:
+        return THINKING_SURFACES[pygame.time.get_ticks() // 400 % 4]
+    return None
+
 def draw_winner_screen(winner):
     """
     Renders the winner message on the screen.
@@ -323,17 +385,119 @@ def draw_winner_screen(winner):
     Args:
         winner (int): The player who won the game (either PLAYER or AI).
     """
-    if winner == PLAYER:
-        message = "You win - Congrats!"
-        color = PLAYER_X_COLOR
-    elif winner == AI:
-        message = "AI won this time - Sorry!"
-        color = PLAYER_O_COLOR
-    else:
-        message = "It's a draw!"
-        color = WINNER_FONT_COLOR
-
-    winner_surface = WINNER_FONT.render(message, True, color)
-    WINNER_POSITION = (WIDTH // 4 - winner_surface.get_width() // 2, PADDING * 2)
-    screen.blit(winner_surface, WINNER_POSITION)
-    pygame.display.flip()
+    winner_surface = status_surface(winner)
+    screen.blit(winner_surface, _status_position(winner_surface))
+
+def draw_thinking_indicator():
+    """
+    Renders an animated "AI is thinking..." message while the AI searches in the background.
+    """
+    thinking_surface = status_surface(thinking=True)
+    screen.blit(thinking_surface, _status_position(thinking_surface))
+
+
+# Static backgrounds of the two screens, composed once
+menu_background = pygame.Surface((WIDTH, HEIGHT))
+menu_background.fill(BACKGROUND)
+menu_background.blit(title_surface, TITLE_POSITION)
+board_background = menu_background.copy()
+board_background.blit(grid_surface, (0, 0))
+
+# Events after which the window contents may have been lost
+EXPOSE_EVENTS = tuple(getattr(pygame, name) for name in ("VIDEOEXPOSE", "WINDOWEXPOSED") if hasattr(pygame, name))
+
+class Renderer:
+    """
+    Draws the screens frame by frame, redrawing only what changed since the last frame.
+
+    A new screen starts from its pre-rendered background. After that, a frame draws the
+    pieces placed since the last one, the buttons whose hover state changed and the status
+    message if it changed, and present() pushes only those rectangles to the display.
+
+    Attributes:
+        dirty (list): The screen rectangles drawn on since the last present().
+    """
+
+    def __init__(self):
+        """Start with nothing drawn, so the first frame is a full redraw."""
+        self.dirty = []
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget what is on the screen, so the next frame redraws everything."""
+        self._scene = None
+        self._pieces = (0, 0)
+        self._hover = {}
+        self._status = None
+
+    def _begin(self, scene, background, redraw=False):
+        """
+        Start a frame of a screen, drawing its background if the screen changed.
+
+        Returns:
+            bool: True if the whole screen was redrawn.
+        """
+        if scene == self._scene and not redraw:
+            return False
+        self.invalidate()
+        self._scene = scene
+        screen.blit(background, (0, 0))
+        self.dirty = [screen.get_rect()]
+        return True
+
+    def _draw_button(self, button, redraw):
+        """Draw a button if the screen was redrawn or its hover state changed."""
+        hover = button["rect"].collidepoint(pygame.mouse.get_pos())
+        if redraw or self._hover.get(button["label"]) != hover:
+            self._hover[button["label"]] = hover
+            self.dirty.append(draw_button(button, hover))
+
+    def draw_menu(self, menu_buttons):
+        """
+        Draw a frame of a menu screen.
+
+        Args:
+            menu_buttons (list): The buttons of the menu.
+        """
+        redraw = self._begin(tuple(button["label"] for button in menu_buttons), menu_background)
+        for button in menu_buttons:
+            self._draw_button(button, redraw)
+
+    def draw_game(self, board, status=None):
+        """
+        Draw a frame of the game screen.
+
+        Args:
+            board (list): The 3D list representing the game board.
+            status (pygame.Surface): The status message to show (see status_surface), or None.
+        """
+        xs, os = game_bitboard.from_board(board)
+        drawn_xs, drawn_os = self._pieces
+        # Pieces only come off the board when it is reset, which needs a clean grid
+        redraw = self._begin("game", board_background, bool(drawn_xs & ~xs or drawn_os & ~os))
+        if redraw:
+            drawn_xs = drawn_os = 0
+
+        # Draw the pieces placed since the last frame
+        for new, player in ((xs & ~drawn_xs, PLAYER), (os & ~drawn_os, AI)):
+            while new:
+                bit = new & -new
+                level, row, col = game_bitboard.cell_to_move(bit.bit_length() - 1)
+                self.dirty.append(draw_circle_in_cell(level, row, col, player))
+                new ^= bit
+        self._pieces = (xs, os)
+
+        self._draw_button(reset_button, redraw)
+
+        if redraw or status is not self._status:
+            screen.blit(board_background, STATUS_RECT, STATUS_RECT)
+            if status is not None:
+                screen.blit(status, _status_position(status))
+            self._status = status
+            self.dirty.append(STATUS_RECT)
+
+    def present(self):
+        """Push the rectangles drawn on this frame to the display."""
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
@@ -0,0 +1,89 @@
+"""
+game_worker.py
+
+This file runs the AI search in a background thread so the pygame loop in main.py keeps
+repainting and handling events while the computer thinks.
+
+The search checks a stop event every few thousand nodes (see game_ai.Search.should_stop),
+so an in-flight search can be cancelled, e.g. when the board is reset, and waited for
+before the search state it shares with the next game is cleared.
+
+Classes:
+    - AIWorker: Submits computer_move jobs to a single background thread.
+"""
+
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import game_play
+
+class AIWorker:
+    """
+    Runs game_play.computer_move in a background thread, one job at a time.
+
+    Attributes:
+        job (Future): The job in flight or finished but not collected yet, or None.
+    """
+
+    def __init__(self):
+        """Start the background thread."""
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-search")
+        self._stop_event = None
+        self.job = None
+
+    def submit(self, board, difficulty, time_budget_ms=None):
+        """
+        Start searching for the computer's move. Any job still running is cancelled first.
+
+        Args:
+            board (list): The 3D game board. A copy is searched, so the caller may keep using it.
+            difficulty (int): The maximum depth for the alpha-beta pruning.
+            time_budget_ms (float): Time budget in milliseconds, see game_play.computer_move.
+
+        Returns:
+            Future: Resolves to the chosen move as (level, row, col), or None if there is none.
+        """
+        self.cancel()
+        self._stop_event = threading.Event()
+        self.job = self._executor.submit(
+            game_play.computer_move, copy.deepcopy(board), difficulty, time_budget_ms, self._stop_event
+        )
+        return self.job
+
+    @property
+    def thinking(self):
+        """bool: True while a submitted job has not finished."""
+        return self.job is not None and not self.job.done()
+
+    def poll(self):
+        """
+        Collect the result of the current job if it has finished.
+
+        Returns:
+            tuple: (True, move) if the job finished (the job is then forgotten),
+                   (False, None) if there is no job or it is still running.
+        """
+        if self.job is None or not self.job.done():
+            return False, None
+        job, self.job = self.job, None
+        return True, job.result()
+
+    def cancel(self, wait=False):
+        """
+        Stop the job in flight, if any. Its result is discarded.
+
+        Args:
+            wait (bool): Return only once a running job has stopped, so it no longer touches
+                         the shared search state, e.g. before game_play.reset_search clears it.
+        """
+        if self._stop_event is not None:
+            self._stop_event.set()
+        job, self.job = self.job, None
+        if job is not None and not job.cancel() and wait:
+            job.exception()  # Blocks until the search has seen the stop event and returned
+
+    def shutdown(self):
+        """Cancel any job and stop the background thread."""
+        self.cancel()
+        self._executor.shutdown(wait=True)
@@ -5,10 +5,12 @@ Users can choose a difficulty level and play against an AI opponent.
 """
 
 import pygame
-import numpy as np
+import game_bitboard
 import game_play
 import game_logic
+import game_record
 import game_ui 
+import game_worker
 
 def main():
     """
@@ -16,7 +18,7 @@ def main():
     """
     
     # Initialize the 3D board.
-    board = game_ui.initialize_board()
+    board = game_logic.initialize_board()
 
     # Decide the starting player. By default, the player starts first.
     current_player = 1 
@@ -29,35 +31,62 @@ def main():
     show_winner_screen = False
     difficulty = None
 
+    # The AI searches in a background thread so the window keeps responding
+    ai_worker = game_worker.AIWorker()
+
+    # Every game is appended to the game record file (see game_record.py), if it can be opened
+    try:
+        recorder = game_record.GameRecordWriter()
+    except (OSError, ValueError):
+        recorder = None
+    moves = []  # Cells played in the current game
+
+    def record_game(result):
+        """Append the current game to the record file and start a new move list."""
+        if recorder is not None and moves:
+            recorder.write(moves, difficulty or 0, result)
+        moves.clear()
+
+    # Only the parts of the screen that change are redrawn, at most FPS times a second
+    renderer = game_ui.Renderer()
+    clock = pygame.time.Clock()
+
     # Main game loop
     while running:
-        # Clear screen and redraw the background
-        game_ui.screen.fill(game_ui.BACKGROUND)
-        
-        # Draw the game title
-        game_ui.draw_title()
-
         # AI's move logic (moved outside of the event loop)
         if current_player == -1 and not show_play_button and not show_difficulty_screen and not show_winner_screen:
-            move = game_play.computer_move(board, difficulty)
-            if game_play.is_valid_move(board, move):
-                level, row, col = move
-                board = game_play.make_move(board, move, current_player)
-                game_ui.draw_circle_in_cell(level, row, col, current_player)
-                if game_logic.check_win(current_player, board):
-                    # Handle AI win
-                    winner = -1
-                    show_winner_screen = True
-                current_player *= -1
+            if ai_worker.job is None:
+                ai_worker.submit(board, difficulty)
+            else:
+                finished, move = ai_worker.poll()
+                if finished and move is not None and game_play.is_valid_move(board, move):
+                    board = game_play.make_move(board, move, current_player)
+                    moves.append(game_bitboard.cell_index(*move))
+                    if game_logic.check_win_at(board, move):
+                        # Handle AI win
+                        winner = -1
+                        show_winner_screen = True
+                        record_game(game_record.O_WON)
+                    elif game_logic.is_board_full(board):
+                        # The AI filled the last cell without winning: the game is a draw
+                        winner = 0
+                        show_winner_screen = True
+                        record_game(game_record.DRAW)
+                    current_player *= -1
 
         for event in pygame.event.get():
             # Quit the game if the close button is clicked
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type in game_ui.EXPOSE_EVENTS:
+                renderer.invalidate()  # The window contents may be gone: redraw everything
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 # Handle reset button click
                 if game_ui.reset_button["rect"].collidepoint(event.pos):
-                    board = game_ui.initialize_board()
+                    ai_worker.cancel(wait=True)  # Drop the search for the old board before its table is cleared
+                    record_game(game_record.UNFINISHED)  # Nothing is recorded if the game was over
+                    board = game_logic.initialize_board()
+                    game_play.reset_search()
                     show_play_button = True
                     show_difficulty_screen = False
                     show_winner_screen = False
@@ -87,27 +116,35 @@ def main():
                             move = (level, row, col)
                             if game_play.is_valid_move(board, move):
                                 board = game_play.make_move(board, move, current_player)
-                                game_ui.draw_circle_in_cell(level, row, col, current_player)
-                                if game_logic.check_win(current_player, board):
+                                moves.append(game_bitboard.cell_index(*move))
+                                if game_logic.check_win_at(board, move):
                                     # Handle player win
                                     winner = 1
                                     show_winner_screen = True
+                                    record_game(game_record.X_WON)
+                                elif game_logic.is_board_full(board):
+                                    # The last cell was filled without a win: the game is a draw
+                                    winner = 0
+                                    show_winner_screen = True
+                                    record_game(game_record.DRAW)
                                 current_player *= -1
 
         # Drawing logic based on game's state
         if show_play_button:
-            game_ui.draw_play_button()
+            renderer.draw_menu([game_ui.play_button])
         elif show_difficulty_screen:
-            game_ui.draw_buttons()
+            renderer.draw_menu(list(game_ui.buttons.values()))
         else:
-            game_ui.draw_board(board)
-            game_ui.draw_reset_button()
-            game_ui.draw_title()
-            if show_winner_screen:
-                game_ui.draw_winner_screen(winner)
+            renderer.draw_game(board, game_ui.status_surface(winner if show_winner_screen else None,
+                                                             ai_worker.thinking))
 
-        pygame.display.flip()  # Update the display with the new drawings
+        renderer.present()  # Update the display where something was drawn
+        clock.tick(game_ui.FPS)  # Sleep out the rest of the frame
 
+    ai_worker.shutdown()  # Stop any search still running
+    record_game(game_record.UNFINISHED)  # A game left before its end
+    if recorder is not None:
+        recorder.close()
     pygame.quit()  # Clean up and close the game
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+"""
+conftest.py
+
+Lets the tests import the engine's top-level modules (game_logic, game_bitboard, ...)
+and the reference implementation, whichever directory pytest is started from.
+"""
+
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR)
@@ -0,0 +1,43 @@
+"""
+test_batch.py
+
+Tests the NumPy batch evaluator of game_batch against the loop-based reference in
+reference_logic.py. Skipped when NumPy is not installed, like game_batch itself is
+the one engine module that needs it.
+"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import game_batch
+import game_bitboard
+import reference_logic
+
+
+def test_random_boards_match_reference():
+    assert game_batch.check_parity(count=3000, seed=1, reference_evaluate=reference_logic.evaluate) == 3000
+
+
+def test_win_flags_and_chunks_match_reference():
+    rng = random.Random(2)
+    boards = []
+    for _ in range(500):
+        cells = rng.sample(range(game_bitboard.CELLS), rng.randint(0, game_bitboard.CELLS))
+        boards.append(game_bitboard.to_board(sum(1 << cell for cell in cells[0::2]),
+                                             sum(1 << cell for cell in cells[1::2])))
+    array = game_batch.to_array(boards)
+    x_wins, o_wins = game_batch.win_flags(array)
+    # A small chunk size runs the concatenating path
+    scores = game_batch.evaluate_batch(array, chunk_size=64)
+    for n, board in enumerate(boards):
+        assert x_wins[n] == reference_logic.check_win(1, board)
+        assert o_wins[n] == reference_logic.check_win(-1, board)
+        assert scores[n] == reference_logic.evaluate(board, 0)
+
+
+def test_wrong_shape_is_rejected():
+    with pytest.raises(ValueError):
+        game_batch.evaluate_batch(np.zeros((2, 4, 4), dtype=np.int8))
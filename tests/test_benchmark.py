@@ -0,0 +1,39 @@
+"""
+test_benchmark.py
+
+Tests the benchmark suite of game_benchmark on a small run: its results have the shape
+the baseline comparison reads, and compare flags only metrics that got worse.
+"""
+
+import game_benchmark
+
+
+def test_bench_search_counts_nodes():
+    boards = [board for _, board in game_benchmark.corpus_boards()][:2]
+    result = game_benchmark.bench_search(boards, 2)
+    assert result["nodes"] > 0 and result["nodes_per_second"] > 0
+    assert result["p50_ms"] <= result["p90_ms"] <= result["max_ms"]
+    assert result["leaf_evals_per_second"] > 0 and result["peak_memory_kb"] > 0
+    assert game_benchmark.bench_search(boards, 2, memory=False)["peak_memory_kb"] is None
+
+
+def test_results_are_their_own_baseline():
+    results = game_benchmark.run_benchmarks(depths=(1,), memory=False)
+    assert set(results["calls"]) >= {"game_bitboard.check_win", "game_bitboard.evaluate"}
+    assert game_benchmark.compare(results, results) == []
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {
+        "calls": {"evaluate": {"calls_per_second": 1000.0}},
+        "search": {"depth 4": {"nodes_per_second": 5000.0, "p50_ms": 10.0, "max_ms": 20.0}},
+    }
+    results = {
+        "calls": {"evaluate": {"calls_per_second": 800.0}},  # 20% slower: flagged
+        "search": {"depth 4": {"nodes_per_second": 6000.0, "p50_ms": 11.0, "max_ms": 30.0}},
+    }
+    regressions = game_benchmark.compare(results, baseline)
+    assert [metric for metric, *_ in regressions] == ["calls/evaluate/calls_per_second", "search/depth 4/max_ms"]
+    assert regressions[0][1:] == (1000.0, 800.0, -0.2)
+    # A looser tolerance lets both through
+    assert game_benchmark.compare(results, baseline, tolerance=0.6) == []
@@ -0,0 +1,87 @@
+"""
+test_cache.py
+
+Tests the position cache of game_cache: results come back for the position and its
+mirror images, from memory and from the disk tier, and an entry for another position
+under the same key is never returned.
+"""
+
+import sqlite3
+
+import game_bitboard
+import game_cache
+import game_symmetry
+
+XS = 1 << game_bitboard.cell_index(0, 0, 1) | 1 << game_bitboard.cell_index(1, 2, 3)
+OS = 1 << game_bitboard.cell_index(3, 3, 0)
+MOVE = game_bitboard.cell_index(2, 1, 1)
+
+
+def image(perm, xs=XS, os=OS):
+    """The position mapped by a transform."""
+    return game_symmetry.transform_mask(xs, perm), game_symmetry.transform_mask(os, perm)
+
+
+def test_round_trip_and_depth():
+    cache = game_cache.PositionCache()
+    assert cache.lookup(XS, OS, -1, 2) is None
+    cache.store(XS, OS, -1, 4, -30, MOVE)
+    assert cache.lookup(XS, OS, -1, 4) == (4, -30, MOVE)
+    assert cache.lookup(XS, OS, -1, 2) == (4, -30, MOVE)
+    assert cache.lookup(XS, OS, -1, 5) is None
+    assert cache.lookup(XS, OS, 1, 4) is None
+    # A shallower search does not replace a deeper one
+    cache.store(XS, OS, -1, 2, 10, MOVE)
+    assert cache.lookup(XS, OS, -1, 1) == (4, -30, MOVE)
+    assert cache.stats()["memory_hits"] == 3
+
+
+def test_mirror_images_share_an_entry():
+    cache = game_cache.PositionCache()
+    cache.store(XS, OS, -1, 4, -30, MOVE)
+    for perm in game_symmetry.EVALUATION_SYMMETRIES:
+        assert cache.lookup(*image(perm), -1, 4) == (4, -30, perm[MOVE])
+    assert cache.stats()["size"] == 1
+
+
+def test_disk_tier_is_shared(tmp_path):
+    path = str(tmp_path / "positions.db")
+    writer = game_cache.PositionCache(path=path)
+    writer.store(XS, OS, -1, 4, -30, MOVE)
+    perm = game_symmetry.EVALUATION_SYMMETRIES[5]
+    reader = game_cache.PositionCache(path=path)
+    assert reader.lookup(*image(perm), -1, 4) == (4, -30, perm[MOVE])
+    assert reader.stats()["disk_hits"] == 1
+    writer.close()
+    reader.close()
+
+
+def test_entry_of_another_position_is_a_miss():
+    cache = game_cache.PositionCache()
+    cache.store(XS, OS, -1, 4, -30, MOVE)
+    key = next(iter(cache._memory))
+    depth, value, move, cxs, cos = cache._memory[key]
+    # The same key holding another position, as a hash collision would
+    cache._memory[key] = (depth, value, move, cxs ^ 1 << 63, cos)
+    assert cache.lookup(XS, OS, -1, 4) is None
+    # The right position, but a move on an occupied cell
+    occupied = (cxs | cos).bit_length() - 1
+    cache._memory[key] = (depth, value, occupied, cxs, cos)
+    assert cache.lookup(XS, OS, -1, 4) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_without_masks_is_started_again(tmp_path):
+    path = str(tmp_path / "positions.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE positions (key INTEGER PRIMARY KEY, depth INTEGER NOT NULL, "
+               "value INTEGER NOT NULL, move INTEGER NOT NULL)")
+    db.commit()
+    db.close()
+    cache = game_cache.PositionCache(path=path)
+    assert cache.lookup(XS, OS, -1, 1) is None
+    cache.store(XS, OS, -1, 4, -30, MOVE)
+    reader = game_cache.PositionCache(path=path)
+    assert reader.lookup(XS, OS, -1, 4) == (4, -30, MOVE)
+    cache.close()
+    reader.close()
@@ -0,0 +1,51 @@
+"""
+test_deepening.py
+
+Tests the iterative deepening of game_ai: the time budget and the stop event end the
+search, and the result is that of the last depth that finished.
+"""
+
+import threading
+import time
+
+import game_ai
+import game_bitboard
+
+BOARD = game_bitboard.to_board(1 << game_bitboard.cell_index(0, 0, 0) | 1 << game_bitboard.cell_index(1, 2, 1),
+                               1 << game_bitboard.cell_index(3, 3, 3))
+
+
+def test_budget_ends_the_search_at_a_finished_depth():
+    start = time.perf_counter()
+    value, move, completed = game_ai.iterative_deepening(-1, BOARD, 100, 12)
+    elapsed = time.perf_counter() - start
+    assert 1 <= completed < 12
+    assert elapsed < 1.0
+    # The answer is that of a plain search to the last finished depth
+    assert game_ai.alpha_beta(-1, completed, float('-inf'), float('inf'), BOARD)[0] == value
+    z, x, y = move
+    assert BOARD[z][x][y] == 0
+
+
+def test_more_time_searches_deeper():
+    shallow = game_ai.iterative_deepening(-1, BOARD, 20, 12)[2]
+    deep = game_ai.iterative_deepening(-1, BOARD, 1000, 12)[2]
+    assert deep > shallow
+
+
+def test_max_depth_without_a_budget():
+    assert game_ai.iterative_deepening(-1, BOARD, None, 3)[2] == 3
+
+
+def test_stop_event_ends_the_search():
+    stop_event = threading.Event()
+    stop_event.set()
+    # The event is looked at every TIME_CHECK_INTERVAL nodes, and depth 1 always finishes
+    value, move, completed = game_ai.iterative_deepening(-1, BOARD, None, 12, stop_event=stop_event)
+    assert 1 <= completed <= 3 and move is not None
+    assert value == game_ai.alpha_beta(-1, completed, float('-inf'), float('inf'), BOARD)[0]
+
+
+def test_game_over_returns_no_move():
+    xs = sum(1 << game_bitboard.cell_index(0, 0, y) for y in range(4))
+    assert game_ai.iterative_deepening(-1, game_bitboard.to_board(xs, 0), 100, 4)[1] is None
@@ -0,0 +1,96 @@
+"""
+test_evaluator.py
+
+Tests the incremental evaluator of game_evaluator against the loop-based reference
+evaluate in reference_logic.py, on random games played through make/unmake and on
+terminal boards (won lines and full boards).
+"""
+
+import random
+
+import game_bitboard
+import game_evaluator
+import game_lines
+import reference_logic
+
+
+def random_full_board(rng):
+    """A full board with 32 stones of each player in random cells."""
+    cells = rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS)
+    xs = sum(1 << cell for cell in cells[0::2])
+    os = sum(1 << cell for cell in cells[1::2])
+    return game_bitboard.to_board(xs, os)
+
+
+def drawn_full_board(rng):
+    """A full board without a winning line: each stone goes to whichever player it does not complete a line for."""
+    while True:
+        xs = os = 0
+        for cell in rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS):
+            for player in rng.sample((1, -1), 2):
+                mask = (xs if player == 1 else os) | 1 << cell
+                if not game_bitboard.is_winning_move(mask, cell):
+                    if player == 1:
+                        xs = mask
+                    else:
+                        os = mask
+                    break
+            else:
+                break  # Both players would win here: start again
+        if xs | os == game_bitboard.FULL:
+            return game_bitboard.to_board(xs, os)
+
+
+def test_random_games_match_reference():
+    compared = game_evaluator.check_parity(games=60, seed=1, reference_evaluate=reference_logic.evaluate,
+                                           reference_check_win=reference_logic.check_win)
+    assert compared > 60 * 2
+
+
+def test_full_boards_match_reference():
+    rng = random.Random(2)
+    for _ in range(200):
+        board = random_full_board(rng)
+        assert game_evaluator.Evaluator.from_board(board).score() == reference_logic.evaluate(board, 0)
+
+
+def test_drawn_full_boards_match_reference():
+    rng = random.Random(5)
+    for _ in range(100):
+        board = drawn_full_board(rng)
+        expected = reference_logic.evaluate(board, 0)
+        assert abs(expected) != game_bitboard.WIN_SCORE
+        assert game_evaluator.Evaluator.from_board(board).score() == expected
+
+
+def test_won_boards_match_reference():
+    rng = random.Random(3)
+    for line in game_lines.geometry(game_bitboard.SIZE).line_masks:
+        for player in (1, -1):
+            # The winning line, plus random stones of both players elsewhere
+            others = [cell for cell in range(game_bitboard.CELLS) if not line >> cell & 1]
+            extra = rng.sample(others, rng.randint(0, 20))
+            mine = line | sum(1 << cell for cell in extra[0::2])
+            theirs = sum(1 << cell for cell in extra[1::2])
+            xs, os = (mine, theirs) if player == 1 else (theirs, mine)
+            board = game_bitboard.to_board(xs, os)
+            expected = reference_logic.evaluate(board, 0)
+            assert abs(expected) == game_bitboard.WIN_SCORE
+            assert game_evaluator.Evaluator(xs, os).score() == expected
+
+
+def test_make_and_unmake_restore_the_counters():
+    rng = random.Random(4)
+    for _ in range(50):
+        board = random_full_board(rng)
+        xs, os = game_bitboard.from_board(board)
+        evaluator = game_evaluator.Evaluator(xs, os)
+        cell = rng.randrange(game_bitboard.CELLS)
+        player = 1 if xs >> cell & 1 else -1
+        evaluator.unmake(cell, player)
+        z, x, y = game_bitboard.cell_to_move(cell)
+        board[z][x][y] = 0
+        assert evaluator.score() == reference_logic.evaluate(board, 0)
+        evaluator.make(cell, player)
+        board[z][x][y] = player
+        assert evaluator.score() == reference_logic.evaluate(board, 0)
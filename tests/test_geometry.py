@@ -0,0 +1,57 @@
+"""
+test_geometry.py
+
+Tests the screen geometry of game_geometry: the click map against an exact
+point-in-cell test, cell centers, and points outside the grid. Only the last test, that
+the UI takes its clicks and pieces from game_geometry, needs pygame.
+"""
+
+import os
+
+import pytest
+
+import game_bitboard
+import game_geometry
+
+
+def test_click_map_matches_cell_polygons():
+    # check_geometry tests every pixel of every cell; the grid has pixels in every cell
+    inside = game_geometry.check_geometry()
+    assert inside == len(game_geometry.CELL_MAP) - game_geometry.CELL_MAP.count(game_geometry.NO_CELL)
+    assert set(game_geometry.CELL_MAP) == set(range(game_bitboard.CELLS)) | {game_geometry.NO_CELL}
+
+
+def test_centers_map_back_to_their_cells():
+    for cell, center in enumerate(game_geometry.CELL_CENTERS):
+        assert game_geometry.hit_test(center) == cell
+
+
+def test_cell_corners_are_shared():
+    # Neighbouring cells meet exactly: each cell's right edge is the next cell's left edge
+    for level in range(game_geometry.LEVELS):
+        for row in range(game_geometry.GRID_SIZE):
+            for col in range(game_geometry.GRID_SIZE - 1):
+                left = game_geometry.cell_polygon(level, row, col)
+                right = game_geometry.cell_polygon(level, row, col + 1)
+                assert left[1] == right[0] and left[2] == right[3]
+
+
+def test_points_outside_the_grid():
+    assert game_geometry.hit_test((0, 0)) is None
+    assert game_geometry.hit_test((-5, 10)) is None
+    assert game_geometry.hit_test((game_geometry.WIDTH, game_geometry.HEIGHT // 2)) is None
+    # Just above the top edge and just left of the top-left corner of the first level
+    top_left_x, top = game_geometry.top_lefts[0]
+    assert game_geometry.hit_test((top_left_x + 5, top - 1)) is None
+    assert game_geometry.hit_test((top_left_x - 1, top + 1)) is None
+
+
+def test_ui_uses_the_geometry():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # game_ui opens a window at import
+    pytest.importorskip("pygame")
+    import game_ui
+
+    for cell, center in enumerate(game_geometry.CELL_CENTERS):
+        assert game_ui.get_clicked_cell(center) == game_bitboard.cell_to_move(cell)
+        assert game_ui.draw_circle_in_cell(*game_bitboard.cell_to_move(cell), 1).center == center
+    assert game_ui.get_clicked_cell((0, 0)) is None
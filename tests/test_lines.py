@@ -0,0 +1,156 @@
+"""
+test_lines.py
+
+Tests the line tables of game_lines, and the game_logic and game_bitboard functions
+built on them (including the win check through the last move only), against a brute-force enumeration of lines and the loop-based reference
+in reference_logic.py.
+"""
+
+import itertools
+import random
+
+import pytest
+
+import game_bitboard
+import game_lines
+import game_logic
+import reference_logic
+
+
+def brute_force_lines(size):
+    """Every set of size collinear cells, found by walking all 26 directions from every cell."""
+    lines = set()
+    for start in itertools.product(range(size), repeat=3):
+        for step in itertools.product((-1, 0, 1), repeat=3):
+            if step == (0, 0, 0):
+                continue
+            cells = [tuple(c + k * s for c, s in zip(start, step)) for k in range(size)]
+            if all(0 <= c < size for cell in cells for c in cell):
+                lines.add(frozenset((z * size + x) * size + y for z, x, y in cells))
+    return lines
+
+
+def random_board(rng, size=4):
+    """A board of random 1/-1/0 cells, filled to a random level, so every stone count occurs."""
+    fill = rng.random()
+    return [[[rng.choice((1, -1)) if rng.random() < fill else 0 for _ in range(size)]
+             for _ in range(size)] for _ in range(size)]
+
+
+@pytest.mark.parametrize("size", range(2, 7))
+def test_generated_lines_match_brute_force(size):
+    lines = game_lines.generate_lines(size)
+    assert len(lines) == game_lines.line_count(size)
+    assert {frozenset(line) for line in lines} == brute_force_lines(size)
+
+
+def test_line_counts():
+    assert [game_lines.line_count(size) for size in (3, 4, 5)] == [49, 76, 109]
+    assert game_lines.check_geometry(range(2, 7)) == {size: game_lines.line_count(size) for size in range(2, 7)}
+
+
+def test_too_small_board_is_rejected():
+    with pytest.raises(ValueError):
+        game_lines.BoardGeometry(1)
+
+
+def test_every_line_is_a_reference_win():
+    for line in game_lines.geometry(4).lines:
+        board = game_logic.initialize_board()
+        for cell in line:
+            z, x, y = game_bitboard.cell_to_move(cell)
+            board[z][x][y] = 1
+        assert reference_logic.check_win(1, board)
+        assert not reference_logic.check_win(-1, board)
+
+
+def test_check_win_matches_reference():
+    rng = random.Random(1)
+    geometry = game_lines.geometry(4)
+    for _ in range(3000):
+        board = random_board(rng)
+        xs, os = game_bitboard.from_board(board)
+        for player, mask in ((1, xs), (-1, os)):
+            expected = reference_logic.check_win(player, board)
+            assert game_logic.check_win(player, board) == expected
+            assert game_bitboard.check_win(mask) == expected
+            assert geometry.check_win(mask) == expected
+
+
+def test_evaluate_matches_reference():
+    rng = random.Random(2)
+    geometry = game_lines.geometry(4)
+    for _ in range(3000):
+        board = random_board(rng)
+        xs, os = game_bitboard.from_board(board)
+        expected = reference_logic.evaluate(board, 0)
+        assert game_logic.evaluate(board, 0) == expected
+        assert game_bitboard.evaluate(xs, os) == expected
+        assert geometry.evaluate(xs, os) == expected
+
+
+def test_check_win_at_matches_reference():
+    rng = random.Random(3)
+    for _ in range(300):
+        board = game_logic.initialize_board()
+        player = 1
+        for cell in rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS):
+            move = game_bitboard.cell_to_move(cell)
+            board[move[0]][move[1]][move[2]] = player
+            won = game_logic.check_win_at(board, move)
+            assert won == reference_logic.check_win(player, board)
+            if won:
+                break
+            player = -player
+
+
+def test_winning_move_matches_reference():
+    rng = random.Random(4)
+    for _ in range(300):
+        board = game_logic.initialize_board()
+        masks = {1: 0, -1: 0}
+        player = 1
+        for cell in rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS):
+            z, x, y = game_bitboard.cell_to_move(cell)
+            board[z][x][y] = player
+            masks[player] |= 1 << cell
+            won = game_bitboard.is_winning_move(masks[player], cell)
+            assert won == reference_logic.check_win(player, board)
+            if won:
+                break
+            player = -player
+
+
+def test_lines_through_each_cell():
+    for cell in range(game_bitboard.CELLS):
+        lines = game_bitboard.LINES_THROUGH[cell]
+        assert len(lines) in (4, 7)
+        assert all(line >> cell & 1 for line in lines)
+        assert sorted(lines) == sorted(line for line in game_bitboard.LINES if line >> cell & 1)
+
+
+@pytest.mark.parametrize("size", (3, 5))
+def test_other_sizes_check_win(size):
+    lines = brute_force_lines(size)
+    rng = random.Random(size)
+    for _ in range(1000):
+        board = random_board(rng, size)
+        for player in (1, -1):
+            cells = {(z * size + x) * size + y for z in range(size) for x in range(size) for y in range(size)
+                     if board[z][x][y] == player}
+            assert game_logic.check_win(player, board) == any(line <= cells for line in lines)
+
+
+@pytest.mark.parametrize("size", (3, 5))
+def test_other_sizes_evaluate(size):
+    geometry = game_lines.geometry(size)
+    board = game_logic.initialize_board(size)
+    assert game_logic.evaluate(board, 0) == 0
+    # A line one stone short of complete scores 100 for the player
+    for y in range(size - 1):
+        board[0][0][y] = 1
+    assert game_logic.evaluate(board, 0) == 100 + sum(
+        (geometry.center >> cell & 1) * -game_lines.CENTER_VALUE for cell in range(size - 1))
+    board[0][0][size - 1] = 1
+    assert game_logic.evaluate(board, 0) == game_lines.WIN_SCORE
+    assert game_logic.check_win_at(board, (0, 0, size - 1))
@@ -0,0 +1,64 @@
+"""
+test_ordering.py
+
+Tests the move orderers of game_ordering: every empty cell is listed once, urgent moves
+come first, and the order changes how many nodes the search visits but not its value.
+"""
+
+import random
+
+import game_ai
+import game_bitboard
+import game_ordering
+
+
+def random_position(rng, stones):
+    """Random masks with the given number of stones and no win."""
+    while True:
+        cells = rng.sample(range(game_bitboard.CELLS), stones)
+        xs = sum(1 << cell for cell in cells[0::2])
+        os = sum(1 << cell for cell in cells[1::2])
+        if not game_bitboard.check_win(xs) and not game_bitboard.check_win(os):
+            return xs, os
+
+
+def test_every_empty_cell_once():
+    rng = random.Random(1)
+    orderer = game_ordering.MoveOrderer()
+    for _ in range(50):
+        xs, os = random_position(rng, rng.randint(0, 40))
+        empty = [cell for cell in range(game_bitboard.CELLS) if not (xs | os) >> cell & 1]
+        orderer.cutoff(1, rng.choice(empty), 2, 3)
+        for orderer_ in (orderer, game_ordering.NoOrdering()):
+            moves = orderer_.order(1, xs, os, 2, hint=rng.choice(empty))
+            assert sorted(moves) == empty
+
+
+def test_hint_then_wins_then_blocks_then_killers():
+    xs = sum(1 << game_bitboard.cell_index(0, 0, y) for y in range(3))
+    os = sum(1 << game_bitboard.cell_index(1, 1, y) for y in range(3))
+    orderer = game_ordering.MoveOrderer()
+    killer = game_bitboard.cell_index(3, 3, 3)
+    orderer.cutoff(-1, killer, 1, 2)
+    hint = game_bitboard.cell_index(2, 0, 0)
+    moves = orderer.order(-1, xs, os, 1, hint)
+    assert moves[:4] == [hint, game_bitboard.cell_index(1, 1, 3), game_bitboard.cell_index(0, 0, 3), killer]
+
+
+def test_ordering_leaves_the_value_unchanged():
+    rng = random.Random(2)
+    for _ in range(8):
+        board = game_bitboard.to_board(*random_position(rng, rng.randint(4, 30)))
+        for depth in (1, 2, 3):
+            values = {
+                game_ai.Search(board, orderer=orderer).run(-1, depth, float('-inf'), float('inf'))[0]
+                for orderer in (game_ordering.MoveOrderer(), game_ordering.NoOrdering())
+            }
+            assert len(values) == 1
+
+
+def test_ordering_saves_nodes():
+    board = game_bitboard.to_board(sum(1 << cell for cell in (0, 21, 42, 5, 60)),
+                                   sum(1 << cell for cell in (63, 22, 41, 15)))
+    counts = game_ordering.node_counts(board, 3)
+    assert counts["ordered"] < counts["unordered"]
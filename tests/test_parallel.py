@@ -0,0 +1,42 @@
+"""
+test_parallel.py
+
+Tests the root-split search of game_parallel: it finds the value of a plain search,
+and repeated searches start from empty transposition tables.
+"""
+
+import pytest
+
+import game_ai
+import game_bitboard
+import game_parallel
+
+# The midgame position of python game_parallel.py
+BOARD = game_bitboard.to_board(sum(1 << cell for cell in (0, 21, 5, 60, 38)),
+                               sum(1 << cell for cell in (62, 22, 12, 45)))
+
+
+@pytest.fixture(scope="module")
+def searcher():
+    searcher = game_parallel.ParallelSearch(2)
+    yield searcher
+    searcher.close()
+
+
+def test_value_matches_a_plain_search(searcher):
+    for depth in (2, 3):
+        expected, _ = game_ai.Search(BOARD).run(-1, depth, float('-inf'), float('inf'))
+        value, move = searcher.search(-1, BOARD, depth)
+        assert value == expected
+        assert game_parallel._copy(BOARD)[move[0]][move[1]][move[2]] == 0
+
+
+def test_repeated_searches_start_from_empty_tables(searcher):
+    # With workers, the nodes depend on which moves finish first; the value does not
+    assert searcher.search(-1, BOARD, 3) == searcher.search(-1, BOARD, 3)
+    single = game_parallel.ParallelSearch(1)
+    first = single.search(-1, BOARD, 3), single.nodes
+    assert (single.search(-1, BOARD, 3), single.nodes) == first
+    game_ai.Search(BOARD, game_parallel._search_tt(0)).run(-1, 2, float('-inf'), float('inf'))
+    assert game_parallel._search_tt(0).stats()["filled"] > 0
+    assert game_parallel._search_tt(-1).stats()["filled"] == 0
@@ -0,0 +1,89 @@
+"""
+test_play.py
+
+Tests how game_play.computer_move combines the threat-space defence with the search.
+The threat search and the alpha-beta search are replaced by fixed answers, so each test
+pins down one decision. Also tests that the threat search runs on the move's clock.
+"""
+
+import threading
+import time
+
+import pytest
+
+import game_ai
+import game_bitboard
+import game_cache
+import game_play
+import game_threats
+
+# A few stones, X to have played last, far from the endgame solver
+XS = 1 << game_bitboard.cell_index(0, 0, 0) | 1 << game_bitboard.cell_index(1, 1, 1)
+OS = 1 << game_bitboard.cell_index(3, 3, 3)
+SAFE = (game_bitboard.cell_index(0, 0, 1), game_bitboard.cell_index(0, 0, 2))
+SEARCH_CELL = game_bitboard.cell_index(2, 2, 2)
+
+
+@pytest.fixture
+def player_threat(monkeypatch):
+    """The player has a forced win that only SAFE stops; the search always answers SEARCH_CELL."""
+    monkeypatch.setattr(game_play, "opening_book", lambda: None)
+    monkeypatch.setattr(game_play, "position_cache", game_cache.PositionCache())
+    monkeypatch.setattr(game_threats, "find_win", lambda mask, other, **limits: None)
+    monkeypatch.setattr(game_threats, "defenses", lambda mask, other, **limits: SAFE)
+
+    def answer(value):
+        monkeypatch.setattr(game_ai, "iterative_deepening",
+                            lambda *args, **kwargs: (value, game_bitboard.cell_to_move(SEARCH_CELL), 4))
+    return answer
+
+
+def test_heuristic_move_is_replaced_by_a_defence(player_threat):
+    player_threat(-50)
+    move = game_play.computer_move(game_bitboard.to_board(XS, OS), 4)
+    assert game_bitboard.cell_index(*move) in SAFE
+
+
+def test_forced_ai_win_is_kept(player_threat):
+    player_threat(3 - game_bitboard.WIN_SCORE)
+    move = game_play.computer_move(game_bitboard.to_board(XS, OS), 4)
+    assert game_bitboard.cell_index(*move) == SEARCH_CELL
+
+
+def test_forced_player_win_still_defended(player_threat):
+    player_threat(game_bitboard.WIN_SCORE - 3)
+    move = game_play.computer_move(game_bitboard.to_board(XS, OS), 4)
+    assert game_bitboard.cell_index(*move) in SAFE
+
+
+def test_threat_search_time_comes_out_of_the_search_budget(monkeypatch):
+    budgets = []
+
+    def slow_defenses(mask, other, deadline=None, stop_event=None):
+        assert deadline is not None
+        time.sleep(0.2)
+        return None
+
+    def search(player, board, time_budget_ms, *args, **kwargs):
+        budgets.append(time_budget_ms)
+        return 0, game_bitboard.cell_to_move(SEARCH_CELL), 1
+
+    monkeypatch.setattr(game_play, "opening_book", lambda: None)
+    monkeypatch.setattr(game_play, "position_cache", game_cache.PositionCache())
+    monkeypatch.setattr(game_threats, "defenses", slow_defenses)
+    monkeypatch.setattr(game_ai, "iterative_deepening", search)
+    game_play.computer_move(game_bitboard.to_board(XS, OS), 4, time_budget_ms=1000)
+    assert budgets[0] <= 800
+
+
+def test_threat_search_stops_on_deadline_and_stop_event():
+    # The player has a forced win by threats
+    xs = sum(1 << game_bitboard.cell_index(*move) for move in ((0, 0, 0), (0, 0, 1), (0, 1, 0), (1, 1, 1)))
+    os = sum(1 << game_bitboard.cell_index(*move) for move in ((3, 3, 3), (3, 2, 3), (2, 3, 3)))
+    assert game_threats.find_win(xs, os) is not None
+    stop_event = threading.Event()
+    stop_event.set()
+    assert game_threats.find_win(xs, os, stop_event=stop_event) is None
+    assert game_threats.find_win(xs, os, deadline=time.perf_counter()) is None
+    assert game_threats.defenses(os, xs, stop_event=stop_event) is None
+    assert game_threats.defenses(os, xs) is not None
@@ -0,0 +1,97 @@
+"""
+test_pns.py
+
+Tests the df-pn endgame solver of game_pns against an exact minimax over every empty
+cell, on endgames small enough to search to the end.
+"""
+
+import random
+import threading
+
+import pytest
+
+import game_bitboard
+import game_pns
+from test_evaluator import drawn_full_board
+
+
+def exact_result(own, other, memo):
+    """WIN, DRAW or LOSS for the side to move holding own, by minimax to the end of the game."""
+    key = (own, other)
+    if key not in memo:
+        empty = ~(own | other) & game_bitboard.FULL
+        if not empty:
+            memo[key] = game_pns.DRAW
+        else:
+            best = game_pns.LOSS
+            for cell in range(game_bitboard.CELLS):
+                if empty >> cell & 1:
+                    mask = own | 1 << cell
+                    result = game_pns.WIN if game_bitboard.is_winning_move(mask, cell) else -exact_result(other, mask, memo)
+                    best = max(best, result)
+                    if best == game_pns.WIN:
+                        break
+            memo[key] = best
+    return memo[key]
+
+
+def endgames(rng, count):
+    """
+    Positions with 6 to 9 empty cells and no win. Half are random, with the move given to a
+    side without an open three when there is one, so losses occur; half are drawn full
+    boards with stones taken back where that makes no open three, so draws occur.
+    """
+    positions = []
+    while len(positions) < count:
+        empty_cells = rng.randint(6, 9)
+        if len(positions) % 2:
+            xs, os = game_bitboard.from_board(drawn_full_board(rng))
+            for cell in rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS):
+                if (xs | os).bit_count() == game_bitboard.CELLS - empty_cells:
+                    break
+                after = xs & ~(1 << cell), os & ~(1 << cell)
+                if not game_bitboard.threat_cells(*after) and not game_bitboard.threat_cells(after[1], after[0]):
+                    xs, os = after
+            player = rng.choice((1, -1))
+        else:
+            cells = rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS - empty_cells)
+            xs = sum(1 << cell for cell in cells[0::2])
+            os = sum(1 << cell for cell in cells[1::2])
+            player = -1 if game_bitboard.threat_cells(xs, os) and not game_bitboard.threat_cells(os, xs) else 1
+        if not game_bitboard.check_win(xs) and not game_bitboard.check_win(os):
+            positions.append((xs, os, player))
+    return positions
+
+
+def test_results_match_exact_minimax():
+    memo = {}
+    seen = set()
+    for xs, os, player in endgames(random.Random(1), 60):
+        own, other = (xs, os) if player == 1 else (os, xs)
+        expected = exact_result(own, other, memo)
+        result, move, nodes = game_pns.solve(player, game_bitboard.to_board(xs, os), max_nodes=None)
+        assert result == expected
+        seen.add(result)
+        if move is None:
+            assert result == game_pns.LOSS  # Every move loses, so none is singled out
+            continue
+        # The move keeps the result
+        cell = game_bitboard.cell_index(*move)
+        assert not (xs | os) >> cell & 1
+        mask = own | 1 << cell
+        after = game_pns.WIN if game_bitboard.is_winning_move(mask, cell) else -exact_result(other, mask, memo)
+        assert after == expected
+    assert seen == {game_pns.WIN, game_pns.DRAW, game_pns.LOSS}
+
+
+@pytest.mark.parametrize("limits", [{"max_nodes": 1}, {"time_budget_ms": 0}])
+def test_solver_gives_up_at_its_limits(limits):
+    board = game_bitboard.to_board(1 << 0 | 1 << 21, 1 << 42)
+    assert game_pns.solve(-1, board, **limits) is None
+
+
+def test_stop_event_stops_the_solver():
+    stop_event = threading.Event()
+    stop_event.set()
+    assert game_pns.solve(-1, game_bitboard.to_board(1 << 0 | 1 << 21, 1 << 42), max_nodes=None,
+                          stop_event=stop_event) is None
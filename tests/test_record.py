@@ -0,0 +1,89 @@
+"""
+test_record.py
+
+Tests the game record format of game_record and the analysis of recorded games in
+game_analysis, on a short game with one blunder.
+"""
+
+import pytest
+
+import game_ai
+import game_analysis
+import game_bitboard
+import game_record
+
+# X leaves O's open three on the top layer unblocked (ply 6), and O wins
+BLUNDER_GAME = bytes(game_bitboard.cell_index(*move) for move in (
+    (0, 0, 0), (3, 3, 0), (0, 1, 2), (3, 3, 1), (1, 2, 0), (3, 3, 2), (2, 0, 1), (3, 3, 3)))
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games.rec")
+    games = [(4, game_record.O_WON, BLUNDER_GAME), (0, game_record.UNFINISHED, b""),
+             (6, game_record.DRAW, bytes(range(64)))]
+    with game_record.GameRecordWriter(path) as writer:
+        for difficulty, result, moves in games[:2]:
+            writer.write(list(moves), difficulty, result)
+    # A second writer appends to the same file
+    with game_record.GameRecordWriter(path) as writer:
+        writer.write(list(games[2][2]), games[2][0], games[2][1])
+        assert writer.games == 1
+    assert list(game_record.read_games(path)) == games
+
+
+def test_cut_off_record_is_ignored(tmp_path):
+    path = str(tmp_path / "games.rec")
+    with game_record.GameRecordWriter(path) as writer:
+        writer.write(list(BLUNDER_GAME), 2, game_record.O_WON)
+    with open(path, "ab") as file:
+        file.write(game_record.RECORD.pack(2, game_record.X_WON, 10) + b"\x01\x02")
+    assert len(list(game_record.read_games(path))) == 1
+
+
+def test_bad_files_and_games_are_rejected(tmp_path):
+    path = str(tmp_path / "other.bin")
+    with open(path, "wb") as file:
+        file.write(b"not a record file")
+    with pytest.raises(ValueError):
+        list(game_record.read_games(path))
+    with pytest.raises(ValueError):
+        game_record.GameRecordWriter(path)
+
+    path = str(tmp_path / "games.rec")
+    with game_record.GameRecordWriter(path) as writer:
+        with pytest.raises(ValueError):
+            writer.write([64])
+        with pytest.raises(ValueError):
+            writer.write([1, 2], result=5)
+    with open(path, "ab") as file:
+        file.write(game_record.RECORD.pack(2, 7, 0))
+    with pytest.raises(ValueError):
+        list(game_record.read_games(path))
+
+
+def test_blunder_is_found():
+    analysis = game_analysis.analyze_game(BLUNDER_GAME)
+    assert len(analysis["best_values"]) == len(analysis["losses"]) == len(BLUNDER_GAME)
+    assert [blunder["ply"] for blunder in analysis["blunders"]] == [6]
+    blunder = analysis["blunders"][0]
+    assert blunder["cell"] == BLUNDER_GAME[6] and blunder["best"] == BLUNDER_GAME[7]
+    # The move played loses by force, the best one does not
+    assert game_ai.is_win_score(blunder["value"]) and blunder["value"] < 0
+    assert not game_ai.is_win_score(blunder["best_value"]) and blunder["loss"] >= game_analysis.BLUNDER_MARGIN
+    # Before O's winning move, the search sees the win one ply away
+    assert analysis["best_values"][7] == 1 - game_bitboard.WIN_SCORE
+
+
+def test_archive_statistics(tmp_path):
+    path = str(tmp_path / "games.rec")
+    with game_record.GameRecordWriter(path) as writer:
+        writer.write(list(BLUNDER_GAME), 2, game_record.O_WON)
+        writer.write(list(BLUNDER_GAME[:5]), 2, game_record.UNFINISHED)
+    stats = game_analysis.analyze_archive([path], workers=1, batch_size=1)
+    assert stats.games == 2
+    assert stats.results[game_record.O_WON] == stats.results[game_record.UNFINISHED] == 1
+    assert stats.moves == len(BLUNDER_GAME) + 5 and stats.blunders == 1
+    assert stats.ply_blunders[6] == 1
+    # Both games start from the empty board, and only the finished one counts as an O win
+    xs, os, games, x_wins, o_wins, draws, _ = stats.top_openings(1)[0]
+    assert (xs, os, games, x_wins, o_wins, draws) == (0, 0, 2, 0, 1, 0)
@@ -0,0 +1,149 @@
+"""
+test_search.py
+
+Tests the alpha-beta search of game_ai: its values against a plain minimax over the
+loop-based reference in reference_logic.py, draws on a full board, and win scores that
+count the plies to the win.
+"""
+
+import random
+
+import game_ai
+import game_bitboard
+import reference_logic
+from test_evaluator import drawn_full_board
+
+
+def cells_mask(*moves):
+    """Mask of the cells at the given (z, x, y) moves."""
+    return sum(1 << game_bitboard.cell_index(*move) for move in moves)
+
+
+def reference_minimax(board, player, depth, ply=0, memo=None):
+    """Minimax over every empty cell with the reference check_win and evaluate, scoring like game_ai."""
+    memo = {} if memo is None else memo
+    key = (game_bitboard.from_board(board), player, depth)
+    if key in memo:
+        return memo[key]
+    if reference_logic.check_win(1, board):
+        value = game_bitboard.WIN_SCORE - ply
+    elif reference_logic.check_win(-1, board):
+        value = ply - game_bitboard.WIN_SCORE
+    else:
+        empty = [(z, x, y) for z in range(4) for x in range(4) for y in range(4) if board[z][x][y] == 0]
+        if not empty:
+            value = game_ai.DRAW_SCORE
+        elif depth == 0:
+            value = reference_logic.evaluate(board, 0)
+        else:
+            values = []
+            for z, x, y in empty:
+                board[z][x][y] = player
+                values.append(reference_minimax(board, -player, depth - 1, ply + 1, memo))
+                board[z][x][y] = 0
+            value = max(values) if player == 1 else min(values)
+    memo[key] = value
+    return value
+
+
+def endgame_positions(rng, count):
+    """
+    Positions with 8 to 10 empty cells and either side to move: random ones, which are
+    mostly won or lost, and drawn full boards with stones taken back and no open three,
+    which mostly are not.
+    """
+    positions = []
+    while len(positions) < count:
+        if len(positions) % 2:
+            xs, os = game_bitboard.from_board(drawn_full_board(rng))
+            cells = [cell for cell in range(game_bitboard.CELLS) if (xs | os) >> cell & 1]
+            for cell in rng.sample(cells, rng.randint(8, 10)):
+                xs &= ~(1 << cell)
+                os &= ~(1 << cell)
+            if game_bitboard.threat_cells(xs, os) or game_bitboard.threat_cells(os, xs):
+                continue
+        else:
+            cells = rng.sample(range(game_bitboard.CELLS), game_bitboard.CELLS - rng.randint(8, 10))
+            xs = sum(1 << cell for cell in cells[0::2])
+            os = sum(1 << cell for cell in cells[1::2])
+        if not game_bitboard.check_win(xs) and not game_bitboard.check_win(os):
+            positions.append((game_bitboard.to_board(xs, os), 1 if xs.bit_count() == os.bit_count() else -1))
+    return positions
+
+
+def test_values_match_reference_minimax():
+    for board, player in endgame_positions(random.Random(1), 4):
+        for depth in (1, 2, 3):
+            expected = reference_minimax(board, player, depth)
+            value, move = game_ai.alpha_beta(player, depth, float('-inf'), float('inf'), board)
+            assert value == expected
+            z, x, y = move
+            assert board[z][x][y] == 0
+
+
+def test_every_algorithm_finds_the_same_value():
+    for board, player in endgame_positions(random.Random(2), 4):
+        expected = reference_minimax(board, player, 3)
+        for pvs, aspiration_window in game_ai.ALGORITHMS.values():
+            value, _, completed = game_ai.iterative_deepening(player, board, None, 3, pvs=pvs,
+                                                              aspiration_window=aspiration_window)
+            assert value == expected
+            # Only a forced win or loss ends the deepening early
+            assert completed == 3 or game_ai.is_win_score(value)
+
+
+def test_last_move_into_a_drawn_board_scores_zero():
+    rng = random.Random(1)
+    for _ in range(10):
+        xs, os = game_bitboard.from_board(drawn_full_board(rng))
+        # Take back one AI stone: the AI is to move, and its only move fills the board
+        cell = rng.choice([cell for cell in range(game_bitboard.CELLS) if os >> cell & 1])
+        board = game_bitboard.to_board(xs, os & ~(1 << cell))
+        for depth in (1, 2, 5):
+            value, move = game_ai.alpha_beta(-1, depth, float('-inf'), float('inf'), board)
+            assert value == game_ai.DRAW_SCORE == 0
+            assert game_bitboard.cell_index(*move) == cell
+
+
+def test_immediate_win_scores_one_ply():
+    os = cells_mask((0, 0, 0), (0, 0, 1), (0, 0, 2))
+    xs = cells_mask((1, 1, 1), (2, 2, 2), (1, 2, 3))
+    board = game_bitboard.to_board(xs, os)
+    value, move, _ = game_ai.iterative_deepening(-1, board, None, 4)
+    assert value == 1 - game_bitboard.WIN_SCORE
+    assert game_ai.is_win_score(value) and game_ai.win_distance(value) == 1
+    assert move == (0, 0, 3)
+
+
+def test_double_threat_loses_in_two_plies():
+    # The player threatens two lines the AI cannot both block
+    xs = cells_mask((0, 0, 0), (0, 0, 1), (0, 0, 2), (0, 1, 0), (0, 2, 0))
+    os = cells_mask((1, 1, 1), (2, 2, 2), (3, 1, 2), (1, 3, 2))
+    board = game_bitboard.to_board(xs, os)
+    value, _, _ = game_ai.iterative_deepening(-1, board, None, 4)
+    assert value == game_bitboard.WIN_SCORE - 2
+    assert game_ai.win_distance(value) == 2
+
+
+def test_faster_win_is_preferred():
+    # The AI can win at once, or play elsewhere and still win later with a double threat
+    os = cells_mask((0, 0, 0), (0, 0, 1), (0, 0, 2), (0, 1, 0), (0, 2, 0))
+    xs = cells_mask((1, 1, 1), (2, 2, 2), (3, 1, 2), (1, 3, 2), (2, 3, 1))
+    board = game_bitboard.to_board(xs, os)
+    value, move, _ = game_ai.iterative_deepening(-1, board, None, 5)
+    assert game_ai.win_distance(value) == 1
+    assert move in ((0, 0, 3), (0, 3, 0))
+
+
+def test_heuristic_scores_are_not_wins():
+    board = game_bitboard.to_board(cells_mask((0, 0, 0)), 0)
+    value, _, _ = game_ai.iterative_deepening(-1, board, None, 2)
+    assert not game_ai.is_win_score(value)
+
+
+def test_won_root_is_scored_without_a_move():
+    # Only the root is checked for a win on the whole board; below it, only through the last move
+    xs = cells_mask((0, 0, 0), (0, 0, 1), (0, 0, 2), (0, 0, 3))
+    os = cells_mask((1, 1, 1), (2, 2, 2), (3, 3, 3))
+    value, move = game_ai.alpha_beta(-1, 3, float('-inf'), float('inf'), game_bitboard.to_board(xs, os))
+    assert (value, move) == (game_bitboard.WIN_SCORE, None)
@@ -0,0 +1,66 @@
+"""
+test_server.py
+
+Tests that game_server turns away malformed requests before they reach a worker:
+positions in parse_position, and the op, difficulty and time budget in MoveServer.
+"""
+
+import asyncio
+
+import pytest
+
+import game_bitboard
+import game_server
+
+# The player has played one move, the computer is to move
+BOARD = game_bitboard.to_board(1 << 21, 0)
+
+
+@pytest.mark.parametrize("request_", [
+    {},
+    {"moves": "0"},
+    {"moves": [0, 64]},
+    {"moves": [-1]},
+    {"moves": [True]},
+    {"moves": [1.0]},
+    {"moves": [5, 5]},
+    {"moves": [0, 1]},
+    {"moves": [0, 16, 1, 17, 2, 18, 3]},
+    {"board": [[[0] * 4] * 4] * 3},
+    {"board": [[[True, 0, 0, 0]] + [[0] * 4] * 3] + [[[0] * 4] * 4] * 3},
+    {"board": [[[2, 0, 0, 0]] + [[0] * 4] * 3] + [[[0] * 4] * 4] * 3},
+])
+def test_malformed_positions_are_rejected(request_):
+    with pytest.raises(ValueError):
+        game_server.parse_position(request_)
+
+
+def test_positions_are_read_from_moves_or_board():
+    assert game_server.parse_position({"moves": [21]}) == BOARD
+    assert game_server.parse_position({"board": BOARD}) == BOARD
+
+
+@pytest.fixture
+def server():
+    # No request here reaches a worker, so no worker process is ever started
+    server = game_server.MoveServer(workers=1)
+    yield server
+    server.close()
+
+
+@pytest.mark.parametrize("fields", [
+    {"op": "resign"},
+    {"difficulty": True},
+    {"difficulty": 0},
+    {"difficulty": game_server.MAX_DIFFICULTY + 1},
+    {"difficulty": 2.0},
+    {"time_ms": False},
+    {"time_ms": 0},
+    {"time_ms": "100"},
+    {"time_ms": float("nan")},
+    {"time_ms": float("inf")},
+])
+def test_malformed_requests_are_rejected(server, fields):
+    with pytest.raises(ValueError):
+        asyncio.run(server._serve(dict({"moves": [21]}, **fields)))
+    assert server.pending == 0
@@ -0,0 +1,67 @@
+"""
+test_symmetry.py
+
+Tests the board symmetries of game_symmetry: that they are the 192 line-preserving
+permutations, that the evaluation symmetries keep the loop-based reference evaluate of
+reference_logic.py, and canonicalization and move pruning.
+"""
+
+import random
+
+import game_bitboard
+import game_symmetry
+import reference_logic
+
+
+def random_position(rng):
+    """Random player and AI masks with 0 to 40 stones."""
+    cells = rng.sample(range(game_bitboard.CELLS), rng.randint(0, 40))
+    return sum(1 << cell for cell in cells[0::2]), sum(1 << cell for cell in cells[1::2])
+
+
+def test_transform_tables():
+    game_symmetry.check_transforms()
+    assert len(game_symmetry.TRANSFORMS) == 192
+    assert game_symmetry.IDENTITY == tuple(range(game_bitboard.CELLS))
+    assert len(game_symmetry.EVALUATION_SYMMETRIES) == 16
+    assert game_symmetry.EVALUATION_SYMMETRIES[0] == game_symmetry.IDENTITY
+
+
+def test_transforms_keep_reference_wins():
+    rng = random.Random(1)
+    for _ in range(40):
+        xs, os = random_position(rng)
+        board = game_bitboard.to_board(xs, os)
+        for perm in game_symmetry.TRANSFORMS:
+            image = game_bitboard.to_board(game_symmetry.transform_mask(xs, perm), game_symmetry.transform_mask(os, perm))
+            for player in (1, -1):
+                assert reference_logic.check_win(player, image) == reference_logic.check_win(player, board)
+
+
+def test_evaluation_symmetries_keep_reference_evaluate():
+    rng = random.Random(2)
+    for _ in range(200):
+        xs, os = random_position(rng)
+        expected = reference_logic.evaluate(game_bitboard.to_board(xs, os), 0)
+        for perm in game_symmetry.EVALUATION_SYMMETRIES:
+            image = game_bitboard.to_board(game_symmetry.transform_mask(xs, perm), game_symmetry.transform_mask(os, perm))
+            assert reference_logic.evaluate(image, 0) == expected
+
+
+def test_canonical_form_is_shared_by_all_images():
+    rng = random.Random(3)
+    for _ in range(20):
+        xs, os = random_position(rng)
+        cxs, cos, index = game_symmetry.canonicalize(xs, os)
+        perm = game_symmetry.TRANSFORMS[index]
+        assert (game_symmetry.transform_mask(xs, perm), game_symmetry.transform_mask(os, perm)) == (cxs, cos)
+        for perm in rng.sample(game_symmetry.TRANSFORMS, 10):
+            image = game_symmetry.transform_mask(xs, perm), game_symmetry.transform_mask(os, perm)
+            assert game_symmetry.canonicalize(*image)[:2] == (cxs, cos)
+
+
+def test_empty_board_has_two_move_classes():
+    # Corners and center cells (on 7 lines) form one class, every other cell (on 4) the other
+    assert game_symmetry.stabilizer(0, 0) == game_symmetry.TRANSFORMS
+    unique = game_symmetry.unique_moves(range(game_bitboard.CELLS), game_symmetry.TRANSFORMS)
+    assert sorted(len(game_bitboard.LINES_THROUGH[cell]) for cell in unique) == [4, 7]
@@ -0,0 +1,54 @@
+"""
+test_tournament.py
+
+Tests the engine specs of game_tournament and that its games are played through
+game_play.computer_move with the stages the spec switches on.
+"""
+
+import pytest
+
+import game_ai
+import game_bitboard
+import game_play
+import game_tournament
+
+
+def test_defaults_are_the_games_settings():
+    engine = game_tournament.parse_engine("")
+    assert engine["algorithm"] == game_ai.ENGINE_ALGORITHM
+    assert engine["book"] and engine["threats"] and engine["solver"]
+    engine = game_tournament.parse_engine("depth=3, algorithm=pvs, book=0, threats=0, solver=1")
+    assert (engine["depth"], engine["algorithm"]) == (3, "pvs")
+    assert not engine["book"] and not engine["threats"] and engine["solver"]
+
+
+@pytest.mark.parametrize("spec", ["algorithm=mtdf", "book=yes", "threats=2", "evaluator=none", "speed=1"])
+def test_bad_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        game_tournament.parse_engine(spec)
+
+
+def test_moves_come_from_computer_move(monkeypatch):
+    calls = []
+    move = game_play.computer_move
+
+    def recorded(board, difficulty, time_budget_ms=None, **options):
+        calls.append((difficulty, time_budget_ms, options))
+        return move(board, difficulty, time_budget_ms, **options)
+
+    monkeypatch.setattr(game_play, "computer_move", recorded)
+    engine_x = game_tournament.parse_engine("depth=2,threats=0")
+    engine_o = game_tournament.parse_engine("depth=1,algorithm=alpha-beta,solver=0")
+    game = game_tournament.play_game(engine_x, engine_o, (0, 21))
+
+    assert len(set(game["moves"])) == game["plies"] == len(calls) + 2
+    for difficulty, time_budget_ms, options in calls:
+        player = options["player"]
+        assert difficulty == (2 if player == 1 else 1)
+        assert time_budget_ms == float('inf') and not options["cache"]
+        assert options["threats"] == (player == -1)
+        assert options["solver"] == (player == 1)
+        assert options["algorithm"] == (game_ai.ENGINE_ALGORITHM if player == 1 else "alpha-beta")
+    if game["winner"] != 0:
+        winner_cells = game["moves"][0::2] if game["winner"] == 1 else game["moves"][1::2]
+        assert game_bitboard.check_win(sum(1 << cell for cell in winner_cells))
@@ -0,0 +1,56 @@
+"""
+test_trace.py
+
+Tests the search instrumentation of game_trace: a traced search finds what an untraced
+one finds, its counters add up, and it writes them out as JSON and CSV.
+"""
+
+import csv
+import json
+
+import game_ai
+import game_bitboard
+import game_trace
+import game_tt
+
+BOARD = game_bitboard.to_board(sum(1 << cell for cell in (0, 21, 42, 5, 60)),
+                               sum(1 << cell for cell in (63, 22, 41, 15)))
+
+
+def traced_search(trace, depth=3):
+    """Run iterative deepening with a trace and a table, and return its result."""
+    return game_ai.iterative_deepening(-1, BOARD, None, depth, game_tt.TranspositionTable(), trace=trace)
+
+
+def test_trace_leaves_the_search_unchanged():
+    trace = game_trace.SearchTrace(timings=True)
+    assert traced_search(trace) == game_ai.iterative_deepening(-1, BOARD, None, 3, game_tt.TranspositionTable())
+
+
+def test_counters_add_up():
+    trace = game_trace.SearchTrace()
+    value, move, _ = traced_search(trace)
+    totals = trace.totals()
+    assert [iteration["depth"] for iteration in trace.iterations] == [1, 2, 3]
+    assert sum(iteration["nodes"] for iteration in trace.iterations) == totals["nodes"]
+    assert trace.iterations[-1]["value"] == value and trace.iterations[-1]["move"] == list(move)
+    assert trace.nodes[0] == 3  # One root node per iteration
+    assert 0 < totals["leaf_evals"] < totals["nodes"]
+    assert totals["cutoffs"] > 0 and totals["tt_hits"] + totals["tt_misses"] > 0
+    assert all(row["seconds"] is None for row in trace.ply_rows())
+
+
+def test_dump_json_and_csv(tmp_path):
+    trace = game_trace.SearchTrace(timings=True)
+    traced_search(trace, 2)
+    trace.dump(str(tmp_path / "trace.json"))
+    trace.dump(str(tmp_path / "trace.csv"))
+
+    with open(tmp_path / "trace.json") as file:
+        data = json.load(file)
+    assert data["totals"] == trace.totals()
+    assert len(data["iterations"]) == 2
+    with open(tmp_path / "trace.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [int(row["nodes"]) for row in rows] == trace.nodes
+    assert all(float(row["seconds"]) >= 0 for row in rows)
@@ -0,0 +1,74 @@
+"""
+test_tt.py
+
+Tests the Zobrist keys and the transposition table of game_tt: incremental keys,
+probe and store, the two-entry replacement scheme, and that a search with a table
+finds the same values as one without.
+"""
+
+import random
+
+import game_ai
+import game_bitboard
+import game_tt
+
+
+def test_incremental_keys_match_hash_position():
+    rng = random.Random(1)
+    for _ in range(20):
+        xs = os = 0
+        player = 1
+        key = game_tt.hash_position(xs, os, player)
+        for cell in rng.sample(range(game_bitboard.CELLS), 30):
+            key ^= game_tt.KEYS[player][cell] ^ game_tt.SIDE_KEY
+            if player == 1:
+                xs |= 1 << cell
+            else:
+                os |= 1 << cell
+            player = -player
+            assert key == game_tt.hash_position(xs, os, player)
+
+
+def test_probe_and_store():
+    tt = game_tt.TranspositionTable()
+    assert tt.probe(12345) is None
+    tt.store(12345, -40, 3, game_tt.EXACT, 7)
+    assert tt.probe(12345) == (12345, -40, 3, game_tt.EXACT, 7)
+    assert tt.probe(12345 + tt.size) is None
+    assert (tt.hits, tt.misses, tt.stores) == (1, 2, 1)
+    tt.clear()
+    assert tt.probe(12345) is None
+    assert (tt.hits, tt.misses, tt.stores) == (0, 1, 0)
+
+
+def test_replacement_keeps_the_deeper_entry():
+    tt = game_tt.TranspositionTable(size=4)
+    assert tt.size == 4
+    buckets = tt.size // 2
+    first, second, third = 1, 1 + buckets, 1 + 2 * buckets  # All in the same bucket
+    tt.store(first, 10, 5, game_tt.EXACT, 0)
+    # A shallower search goes to the always-replace entry, keeping the deep one
+    tt.store(second, 20, 2, game_tt.LOWER, 1)
+    assert tt.probe(first)[1] == 10 and tt.probe(second)[1] == 20
+    tt.store(third, 30, 1, game_tt.UPPER, 2)
+    assert tt.probe(second) is None and tt.probe(third)[1] == 30 and tt.probe(first)[1] == 10
+    # The same position, or a search at least as deep, takes the depth-preferred entry
+    tt.store(first, 11, 1, game_tt.EXACT, 0)
+    assert tt.probe(first)[1:3] == (11, 1)
+    tt.store(second, 21, 1, game_tt.EXACT, 1)
+    assert tt.probe(second)[1] == 21 and tt.probe(first) is None
+
+
+def test_search_with_a_table_finds_the_same_values():
+    rng = random.Random(2)
+    tt = game_tt.TranspositionTable()
+    for _ in range(5):
+        cells = rng.sample(range(game_bitboard.CELLS), 12)
+        board = game_bitboard.to_board(sum(1 << cell for cell in cells[0::2]), sum(1 << cell for cell in cells[1::2]))
+        tt.clear()
+        for depth in (1, 2, 3):
+            expected, _ = game_ai.alpha_beta(1, depth, float('-inf'), float('inf'), board)
+            assert game_ai.alpha_beta(1, depth, float('-inf'), float('inf'), board, tt)[0] == expected
+            # The second search is answered from the table
+            assert game_ai.alpha_beta(1, depth, float('-inf'), float('inf'), board, tt)[0] == expected
+        assert tt.hits > 0
@@ -0,0 +1,64 @@
+"""
+test_worker.py
+
+Tests the background search of game_worker: results are collected with poll, and a
+cancelled search stops, with cancel(wait=True) returning only once it has.
+"""
+
+import threading
+import time
+
+import pytest
+
+import game_bitboard
+import game_logic
+import game_play
+import game_worker
+
+
+@pytest.fixture
+def worker():
+    worker = game_worker.AIWorker()
+    yield worker
+    worker.shutdown()
+
+
+def test_result_is_collected_once(worker):
+    board = game_logic.initialize_board()
+    board[0][0][0] = 1
+    job = worker.submit(board, 1)
+    move = job.result(timeout=10)
+    assert worker.poll() == (True, move)
+    assert game_play.is_valid_move(board, move)
+    assert worker.poll() == (False, None)
+    assert not worker.thinking
+
+
+def test_cancel_waits_for_the_search_to_stop(worker, monkeypatch):
+    started, stopped = threading.Event(), threading.Event()
+
+    def slow_move(board, difficulty, time_budget_ms=None, stop_event=None):
+        started.set()
+        while not stop_event.is_set():
+            time.sleep(0.001)
+        time.sleep(0.05)  # Still writing to the search state after seeing the stop event
+        stopped.set()
+        return game_bitboard.cell_to_move(0)
+
+    monkeypatch.setattr(game_play, "computer_move", slow_move)
+    worker.submit(game_logic.initialize_board(), 4)
+    assert started.wait(10) and worker.thinking
+    worker.cancel(wait=True)
+    assert stopped.is_set()
+    assert worker.poll() == (False, None)
+
+
+def test_real_search_stops_when_cancelled(worker):
+    board = game_logic.initialize_board()
+    board[0][0][0] = 1
+    job = worker.submit(board, 10, time_budget_ms=60000)
+    time.sleep(0.2)
+    start = time.perf_counter()
+    worker.cancel(wait=True)
+    assert job.done()
+    assert time.perf_counter() - start < 5